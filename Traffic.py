@@ -1,68 +1,296 @@
 from traffic_network import Network
+from snapshot_stream import SnapshotStreamWriter, SnapshotStreamReader, check_stream_IDs
+from event_engine import EventTickEngine
 import copy
+import logging
+import os
+
+logger = logging.getLogger("Traffic_Simulator." + __name__)
+
+
+class TickResult:
+    def __init__(self, timestamp, steps_count, expended_energy, sum_maximum_expendible_energy, energy_used_percent) -> None:
+        '''Per-tick statistics returned by TrafficManager.tick().
+        Attributes:
+            timestamp:  Timestamp of the tick that was processed.
+            steps_count:  Number of Network passes needed until no more movement was possible (tick_engine = 'passes'),
+                or number of Node crossing events processed (tick_engine = 'event').
+            expended_energy:  Work actually done by all Cars on this tick.
+            sum_maximum_expendible_energy:  Maximum work possible on this tick.
+            energy_used_percent:  expended_energy / sum_maximum_expendible_energy (a fraction), or None if no Car could move.
+        '''
+        self.timestamp = timestamp
+        self.steps_count = steps_count
+        self.expended_energy = expended_energy
+        self.sum_maximum_expendible_energy = sum_maximum_expendible_energy
+        self.energy_used_percent = energy_used_percent
+
+    def get_snapshot(self):
+        '''Outputs dictionary of TickResult attributes.
+        '''
+        return dict(self.__dict__)
+
 
 class TrafficManager:
-    def __init__(self, network_config) -> None:
+    def __init__(self, network_config, route_cache_size = 100000, precompute_routes = False, route_table_file = None, edge_backend = 'python', check_invariants = False, tick_engine = 'passes', seed = None, shuffle_rng = 'mersenne', car_archive_file = None) -> None:
         '''Establishes an instance of TrafficManager to run on the given network structure.
+        route_cache_size bounds the number of routes remembered for reuse by Cars sharing the same destination (0 disables caching).
+        If precompute_routes is True, next-hop tables for 'Shortest' and 'Fastest' routes are built for the whole Network up front,
+        making route assignment proportional to path length.  If route_table_file is also given, the tables are loaded from it when
+        it matches this Network, and (re)written to it otherwise; keep it alongside the network config file.
+        edge_backend selects how Cars are advanced along Edges:  'python' (default) or 'numpy' (batched vector operations, requires NumPy).
+        check_invariants = True (debug mode) verifies after every Edge tick that the Edge's Cars are still ordered by position.
+        tick_engine selects how a tick is processed:  'passes' (default) ticks every active Node repeatedly until no more movement is possible,
+        while 'event' ticks each active Edge once and then processes Node crossings in order of arrival (see event_engine.py).
+        seed seeds the simulation's own random number generators (tick order shuffles and 'Random' routes), so that runs can be
+        reproduced exactly and simulations in the same process do not affect each other.  If not given, a seed is drawn
+        from the operating system;  it can be read back with get_seed().
+        shuffle_rng selects the generator for the tick order shuffles:  'mersenne' (default, random.Random) or 'counter'
+        (CounterRandom, a stateless SplitMix64 sequence, see simulation_random.py).
+        Cars that complete their route or are removed are moved to an archive at the end of the tick, so that later ticks only
+        visit active Cars.  If car_archive_file is given, archived Cars are spilled to it (JSON lines) instead of kept in memory.
         Attributes:
             graph:  Network object that the TrafficManager runs on.
             timestamp:  Simulation timestamp.
+            snapshot_stream:  SnapshotStreamWriter receiving the state of every Car after each tick (Cars that finished their trip
+                are written on the tick they finish, and not after), or None.  See open_snapshot_stream().
+            event_tick_engine:  EventTickEngine used when tick_engine = 'event', otherwise None.
+            demand_generator:  DemandGenerator whose Cars are added at the start of every tick, or None.  See set_demand_generator().
         '''
-        self.graph = Network(self, network_config)
+        self.graph = Network(self, network_config, route_cache_size, edge_backend, check_invariants, seed, shuffle_rng, car_archive_file)
         self.timestamp = 0
+        self.snapshot_stream = None
+        self.demand_generator = None
+
+        if tick_engine == 'passes':
+            self.event_tick_engine = None
+        elif tick_engine == 'event':
+            self.event_tick_engine = EventTickEngine(self.graph)
+        else:
+            raise Exception('"', tick_engine, '" is not a supported tick engine.  Instead try "passes" or "event".')
+
+        if precompute_routes:
+            self.precompute_routes(route_table_file)
         
+
+    def precompute_routes(self, route_table_file = None):
+        '''API function:  builds next-hop route tables for 'Shortest' and 'Fastest' over the whole Network.
+        If route_table_file exists and was built for this Network, it is loaded instead; otherwise the new tables are saved to it.
+        Tables are discarded if the Network is later modified (ex: set_edge_max_speed).
+        '''
+        router = self.graph.router
+        if route_table_file is not None and os.path.exists(route_table_file):
+            if router.load_route_tables(route_table_file):
+                return
+
+        router.build_route_tables()
+        if route_table_file is not None:
+            router.save_route_tables(route_table_file)
+
+    def precompute_route_landmarks(self, number_landmarks = 8):
+        '''API function:  prepares A* routing with landmarks for 'Shortest' and 'Fastest' (see Router.build_landmarks()).
+        Uncached route queries on large Networks then settle far fewer Edges than Dijkstra, at the cost of two searches per landmark
+        and metric up front, and memory proportional to number_landmarks x (number of Edges).  Unlike precompute_routes(), this stays
+        practical for Networks of 100k Edges.  Landmarks are discarded if the Network is later modified (ex: set_edge_max_speed).
+        '''
+        self.graph.router.build_landmarks(('Shortest', 'Fastest'), number_landmarks)
     
     def tick(self):
         '''API function:  advance state of network by one unit of time.
+        Returns a TickResult holding the tick's step count and energy usage.
+        These statistics are also logged at DEBUG level (see set_log_level()).
         '''
         self.timestamp += 1  
+        if self.demand_generator is not None:
+            generated_cars = self.demand_generator.get_cars(self.timestamp, self.graph.edge_ID_to_edge)
+            if self.graph.check_valid_cars(generated_cars, generated = True) == True:
+                self.graph.add_cars(generated_cars)
+        self.graph.start_tick()      # refreshes every Car's tick potential (lazily, as Cars move)
         steps_count = 0
 
         expended_energy = 0                       # work actually done
         sum_maximum_expendible_energy = 0         # maximum work possible
         energy_used_percent = 0
 
-        while True:
-            steps_count += 1
-
-            network_tick_outputs = self.graph.tick()
-            expended_energy += network_tick_outputs[0]
-            sum_maximum_expendible_energy += network_tick_outputs[1]
-            if not network_tick_outputs[0]:
-                # no more movement possible
-                break            
+        if self.event_tick_engine is not None:
+            expended_energy, sum_maximum_expendible_energy, steps_count = self.event_tick_engine.tick()
+        else:
+            while True:
+                steps_count += 1
 
-        print("Steps needed to process tick: ", steps_count)
-        self.graph.restore_tick_potential()      # refresh for next tick
+                network_tick_outputs = self.graph.tick()
+                expended_energy += network_tick_outputs[0]
+                sum_maximum_expendible_energy += network_tick_outputs[1]
+                if not network_tick_outputs[0] and not network_tick_outputs[2]:
+                    # no more movement possible (Cars that just crossed a Node move on the next pass)
+                    break            
 
         if sum_maximum_expendible_energy != 0:
             energy_used_percent = expended_energy / sum_maximum_expendible_energy
         else:
             energy_used_percent = None 
-        print("Percent of available energy used on tick: ", energy_used_percent*100, "%")
-        return energy_used_percent
+        logger.debug("Tick %s:  %s steps, energy used %s of %s (%s)", self.timestamp, steps_count,
+                     expended_energy, sum_maximum_expendible_energy, energy_used_percent)
+
+        if self.snapshot_stream is not None:
+            self.snapshot_stream.write_tick(self.timestamp, self.graph.car_ID_to_car.values())
+        self.graph.update_travel_time_estimates()
+        self.graph.archive_finished_cars()
+        if not self.graph.track_changes:
+            self.graph.discard_changes()
+        return TickResult(self.timestamp, steps_count, expended_energy, sum_maximum_expendible_energy, energy_used_percent)
+
+
+    def set_demand_generator(self, demand_generator):
+        '''API function:  at the start of every following tick, add the Cars that demand_generator (see demand_generator.py)
+        generates for that tick, as add_cars() would.  Pass None to stop generating Cars.
+        Every OD entry is checked against the Network first, so an Edge that does not exist or an end Edge that cannot be reached
+        raises an Exception here rather than during a tick.  Integer Car IDs from the generator's next Car ID up are reserved
+        for generated Cars (see Network.reserve_generated_car_IDs()).
+        Cars are created only on the tick they depart.  Together with a car_archive_file and set_change_tracking(False),
+        the memory used stays bounded by the number of Cars on the Network, however long the simulation runs.
+        '''
+        if self.demand_generator is not None:    # later generators must start after the IDs this one generated
+            self.graph.next_generated_car_ID = self.demand_generator.get_next_car_ID()
+        if demand_generator is not None:
+            self.graph.check_valid_od_entries(demand_generator.get_od_entries())
+            self.graph.reserve_generated_car_IDs(demand_generator.get_next_car_ID())
+        self.demand_generator = demand_generator
+
+    def set_change_tracking(self, track_changes):
+        '''API function:  if track_changes is False, stop recording which Nodes, Edges, and Cars changed between calls to
+        get_snapshot_deltas(), so that this record does not grow with the length of a simulation that never exports deltas.
+        Tracking is on by default.  Take a new base snapshot (get_snapshot()) before recording deltas again.
+        '''
+        self.graph.track_changes = track_changes
+        if not track_changes:
+            self.graph.discard_changes()
+
+
+    def set_log_level(self, level):
+        '''API function:  sets the level (ex: logging.DEBUG, "INFO", logging.WARNING) of the "Traffic_Simulator" logger used by every module.
+        Nothing below WARNING is emitted by default;  messages are only formatted when their level is enabled.
+        Handlers are left to the application (ex: logging.basicConfig()).
+        '''
+        logging.getLogger("Traffic_Simulator").setLevel(level)
+
+
+    def open_snapshot_stream(self, file_path, buffer_size = 4194304):
+        '''API function:  after every tick, append the ID, Edge, position, tick potential, and route status of every Car
+        to the binary snapshot stream at file_path (33 bytes per Car per tick), instead of writing one JSON snapshot per tick.
+        Ticks are buffered and written in batches of buffer_size bytes;  call close_snapshot_stream() when done.
+        Car and Edge IDs must be 64-bit integers (and no Edge ID may be -1):  the IDs of every Edge and current Car are checked here,
+        and a Car added later with another ID raises an Exception on the next tick.  Read the file back with read_snapshot_stream().
+        '''
+        check_stream_IDs(self.graph.car_ID_to_car, self.graph.edge_ID_to_edge)
+        if self.snapshot_stream is not None:
+            self.close_snapshot_stream()
+        self.snapshot_stream = SnapshotStreamWriter(file_path, buffer_size)
+
+    def close_snapshot_stream(self):
+        '''API function:  writes any buffered ticks to the snapshot stream and closes it.
+        '''
+        if self.snapshot_stream is not None:
+            self.snapshot_stream.close()
+            self.snapshot_stream = None
+
+    def read_snapshot_stream(self, file_path):
+        '''API function:  returns a SnapshotStreamReader for the snapshot stream at file_path.
+        The file is memory-mapped;  use reader.get_timestamps() and reader.read_tick(timestamp) or reader.read_tick_cars(timestamp)
+        to jump straight to any tick.
+        '''
+        return SnapshotStreamReader(file_path)
               
 
-    def get_snapshot(self):
+    def get_snapshot(self, deep_copy = False, include_completed_cars = True):
         '''API function:  outputs list of nodes, edge attributes, car attributes.
         Output is formatted in such a way that it can be used as input for a new simulation.
+        The output is built directly from the simulation's fields and only shares immutable values and configured
+        stoplight patterns with the running simulation;  set deep_copy = True to receive a fully independent copy.
+        Cars that finished their trip are read back from the archive;  set include_completed_cars = False to leave them out.
         '''
-        raw = copy.deepcopy(self.__dict__)
-        raw_graph = raw["graph"]
-        nodes =  raw_graph.__dict__.pop("node_ID_to_node", None)
-        edges =  raw_graph.__dict__.pop("edge_ID_to_edge", None)
-        new = {}
-        new["nodes"] = [k for k in nodes.keys()]
-        new["edges"] = [k for k in edges.keys()]
-        network_raw = self.graph.get_snapshot()
+        network_raw = self.graph.get_snapshot(include_completed_cars)
+        if deep_copy:
+            return copy.deepcopy(network_raw)
         return network_raw
 
 
     def get_snapshot_deltas(self):
         '''API function:  list of changes from previous state.  
-        Will be created in future versions.
+        Outputs the same keys as get_snapshot() (plus "timestamp"), but only for Nodes, Edges, and Cars that changed
+        since the previous call to get_snapshot_deltas().  Call it after every tick to record a delta chain, then rebuild
+        the state at any tick with apply_snapshot_deltas().
+        '''
+        if not self.graph.track_changes:
+            raise Exception("Change tracking is off;  see set_change_tracking().")
+        deltas = self.graph.get_snapshot_deltas()
+        deltas["timestamp"] = self.get_timestamp()
+        return deltas
+
+    def apply_snapshot_deltas(self, base_snapshot, snapshot_deltas_list):
+        '''API function:  reconstructs a full snapshot from base_snapshot (as output by get_snapshot()) and an ordered list
+        of later outputs of get_snapshot_deltas().  base_snapshot itself is not modified.
+        Entries are matched on "id":  changed Nodes and Edges replace their previous entries, and Cars move from
+        "current_cars" to "completed_cars" once they complete their route or are removed.
+        Deltas only list archived Cars under their Edge's "completed_cars" on the tick they finish, so an Edge's
+        "completed_cars" keeps the IDs from its previous entry and adds those of the Cars that finished on it since.
+        '''
+        edge_ID_to_snapshot = {edge["id"]: edge for edge in base_snapshot["edge_list"]}
+        node_ID_to_snapshot = {node["id"]: node for node in base_snapshot["node_list"]}
+        current_car_ID_to_snapshot = {car["id"]: car for car in base_snapshot["current_cars"]}
+        completed_car_ID_to_snapshot = {car["id"]: car for car in base_snapshot["completed_cars"]}
+
+        edge_ID_to_completed_car_IDs = {}    # rebuilt "completed_cars" of every Edge (list, set) once it differs from its snapshot
+        for deltas in snapshot_deltas_list:
+            for edge in deltas["edge_list"]:
+                previous_edge = edge_ID_to_snapshot.get(edge["id"])
+                if edge["id"] not in edge_ID_to_completed_car_IDs and previous_edge is not None:
+                    edge_ID_to_completed_car_IDs[edge["id"]] = (list(previous_edge["completed_cars"]), set(previous_edge["completed_cars"]))
+                edge_ID_to_snapshot[edge["id"]] = edge
+                if edge["id"] in edge_ID_to_completed_car_IDs:
+                    completed_car_IDs, completed_car_ID_set = edge_ID_to_completed_car_IDs[edge["id"]]
+                    for car_ID in edge["completed_cars"]:
+                        if car_ID not in completed_car_ID_set:
+                            completed_car_IDs.append(car_ID)
+                            completed_car_ID_set.add(car_ID)
+            for node in deltas["node_list"]:
+                node_ID_to_snapshot[node["id"]] = node
+            for car in deltas["current_cars"]:
+                current_car_ID_to_snapshot[car["id"]] = car
+            for car in deltas["completed_cars"]:
+                current_car_ID_to_snapshot.pop(car["id"], None)
+                completed_car_ID_to_snapshot[car["id"]] = car
+                edge_ID = car["current_edge"]
+                if edge_ID in edge_ID_to_snapshot:
+                    if edge_ID not in edge_ID_to_completed_car_IDs:
+                        edge_completed_cars = edge_ID_to_snapshot[edge_ID]["completed_cars"]
+                        edge_ID_to_completed_car_IDs[edge_ID] = (list(edge_completed_cars), set(edge_completed_cars))
+                    completed_car_IDs, completed_car_ID_set = edge_ID_to_completed_car_IDs[edge_ID]
+                    if car["id"] not in completed_car_ID_set:
+                        completed_car_IDs.append(car["id"])
+                        completed_car_ID_set.add(car["id"])
+
+        for edge_ID, (completed_car_IDs, completed_car_ID_set) in edge_ID_to_completed_car_IDs.items():
+            edge = dict(edge_ID_to_snapshot[edge_ID])
+            edge["completed_cars"] = completed_car_IDs
+            edge_ID_to_snapshot[edge_ID] = edge
+
+        snapshot = {}
+        snapshot["edge_list"] = list(edge_ID_to_snapshot.values())
+        snapshot["node_list"] = list(node_ID_to_snapshot.values())
+        snapshot["current_cars"] = list(current_car_ID_to_snapshot.values())
+        snapshot["completed_cars"] = list(completed_car_ID_to_snapshot.values())
+        return snapshot
+
+    def get_seed(self):
+        '''API function:  returns the seed of the simulation's random number generators (see set_seed()).
         '''
-        pass  
+        return self.graph.get_seed()
+
+    def set_seed(self, seed = None):
+        '''API function:  resets the simulation's random number generators to seed (drawn from the operating system if None).
+        '''
+        self.graph.set_seed(seed)
 
     def get_timestamp(self):
         '''API function:  returns (sequential) state number.
@@ -90,6 +318,16 @@ class TrafficManager:
         if self.graph.check_valid_car(car) == True:
             self.graph.add_car(car)
 
+    def add_cars(self, cars):
+        '''API function:  place every car (dictionary object) in the iterable cars onto the network's waiting queues,
+        with the same result as calling add_car() on each of them in order.
+        The whole batch is validated before any Car is placed, so an invalid car raises an Exception and places none of them.
+        Cars sharing a start Edge, end Edge, and route_preference have their path calculated once.
+        '''
+        car_list = list(cars)
+        if self.graph.check_valid_cars(car_list) == True:
+            self.graph.add_cars(car_list)
+
     def remove_car(self, car_id):
         '''API function:  removes the Car associated with 'car_id' from the simulation.
         This is done by forcing it into Car.status = 'Removed from simulation'.
@@ -103,9 +341,12 @@ class TrafficManager:
 
         car_object.route_status = 'Removed from simulation at tick #' + str(self.get_timestamp())
         car_edge.completed_cars.append(car_id)
+        self.graph.finished_car_IDs.append(car_id)
 
         car_edge.current_cars.remove(car_object)
         car_edge.edge_car_ID_to_car.pop(car_id) 
+        self.graph.changed_car_IDs[car_id] = None
+        self.graph.changed_edge_IDs[car_edge_ID] = None
 
 
     def pause_car(self, car_id):
@@ -118,6 +359,7 @@ class TrafficManager:
         car_object = self.graph.car_ID_to_car[car_id]
         car_object.set_mobility(False)
         car_object.route_status = 'Paused'        
+        self.graph.changed_car_IDs[car_id] = None
 
     def resume_car(self, car_id):
         '''API function:  allows the Car associated with 'car_id' to resume moving.
@@ -128,17 +370,40 @@ class TrafficManager:
         car_object = self.graph.car_ID_to_car[car_id]
         car_object.set_mobility(True)
         car_object.route_status = 'In progress'
+        self.graph.changed_car_IDs[car_id] = None
+
+    def get_route_A_to_B(self, start_edge_ID, end_edge_ID, metric):
+        '''API function:  Given a start and end Edge id, returns the "best" path between them with regards to input metric
+        ("Shortest", "Fastest", "Fastest_now", or "Random") without enumerating every possible path.  Returns [] if there is no possible path.
+        '''
+        return self.graph.calculate_path(start_edge_ID, end_edge_ID, metric)
+
+    def get_route_cache_statistics(self):
+        '''API function:  returns a dictionary with the size, hit count, and miss count of the Network's route cache.
+        '''
+        return self.graph.router.get_cache_statistics()
+
+    def set_edge_max_speed(self, edge_ID, new_max_speed):
+        '''API function:  changes the speed limit of an Edge mid-simulation.  Cached routes are recalculated on next use.
+        '''
+        self.graph.set_edge_max_speed(edge_ID, new_max_speed)
+
+    def set_edge_max_capacity(self, edge_ID, new_max_capacity):
+        '''API function:  changes the maximum number of Cars allowed on an Edge mid-simulation.
+        '''
+        self.graph.set_edge_max_capacity(edge_ID, new_max_capacity)
 
     def get_all_paths_A_to_B(self, start_edge_ID, end_edge_ID):
         '''API function:  Given a start and end Edge id, return a list of all valid paths that do not repeat Edges.
+        Note:  this enumerates every path and is only practical on small Networks.  See get_route_A_to_B().
         '''
-        return self.graph.all_paths_depth_first_search(self, start_edge_ID, end_edge_ID, [], [])
+        return self.graph.all_paths_depth_first_search(start_edge_ID, end_edge_ID, [], [])
 
     def get_path_distance(self, path):
         '''API function:  Given the ordered list of Edges as "path", evaluate the total distance it would take to travel.
         This function assumes that the entirety of each Edge is traveled.
         '''
-        return self.graph.path_cost_distance(self, path)
+        return self.graph.path_cost_distance(path)
 
     def get_path_minimum_time(self, path):
         '''API function:  Given the ordered list of Edges as "path", evaluate the the minimum time it would take to travel (in ticks) given each Edge's speed limit.
@@ -146,16 +411,22 @@ class TrafficManager:
         This function assumes that the entirety of each Edge is traveled and includes any Node-crossing time penalties.
         Note:  time cost does NOT include Node-crossing time out of the final edge as the Car is expected to exit the Network before the Edge's end.
         '''
-        return self.graph.path_cost_minimum_time(self, path)
+        return self.graph.path_cost_minimum_time(path)
+
+    def get_path_current_time(self, path):
+        '''API function:  Given the ordered list of Edges as "path", evaluate the time it is currently expected to take to travel (in ticks),
+        given the congestion observed on each Edge (see Edge.update_travel_time_estimate()).  Includes any Node-crossing time penalties.
+        '''
+        return self.graph.path_cost_current_time(path)
 
     def get_shortest_path_A_to_B(self, all_paths_list):
         '''API function:  Given all_paths_list (a list of paths from A to B as calculated using self.get_all_paths_A_to_B()),
         returns the path with the shortest total distance in terms of length.
         '''
-        return self.graph.choose_path(self, all_paths_list, "Shortest")
+        return self.graph.choose_path(all_paths_list, "Shortest")
 
     def get_theoretical_fastest_path_A_to_B(self, all_paths_list):
         '''API function:  Given all_paths_list (a list of paths from A to B as calculated using self.get_all_paths_A_to_B()),
         returns the path with the minimum total travel time (assuming no congestion).
         '''
-        return self.graph.choose_path(self, all_paths_list, "Fastest")
\ No newline at end of file
+        return self.graph.choose_path(all_paths_list, "Fastest")
\ No newline at end of file
@@ -0,0 +1,141 @@
+from Traffic import TrafficManager
+from car_archive import CarArchive
+
+import multiprocessing
+import os
+import random
+import time
+
+# TrafficManager (with its Network already built) that every scenario of the running batch starts from.
+# Set by BatchRunner.run() before worker processes are forked, so that workers inherit it copy-on-write.
+TEMPLATE_TRAFFIC_MANAGER = None
+
+
+def run_scenario(scenario_index_and_scenario):
+    '''Worker process function:  runs one scenario on the inherited TEMPLATE_TRAFFIC_MANAGER and returns its summary dictionary.
+    Each worker process only runs one scenario (see BatchRunner.run()), so the template can be modified in place.
+    '''
+    scenario_index, scenario = scenario_index_and_scenario
+    summary = {"name": scenario.get("name", scenario_index),
+               "number_ticks": scenario["number_ticks"],
+               "error": None}
+    start_time = time.perf_counter()
+    try:
+        tm = TEMPLATE_TRAFFIC_MANAGER
+        if scenario.get("car_archive_file") is not None:    # never shared with the other scenarios
+            tm.graph.car_archive = CarArchive(scenario["car_archive_file"])
+            summary["car_archive_file"] = scenario["car_archive_file"]
+        seed = scenario.get("seed", 0)
+        tm.set_seed(seed)
+        rng = random.Random(seed)
+
+        for edge_ID, new_max_speed in scenario.get("edge_max_speed", {}).items():
+            tm.set_edge_max_speed(edge_ID, new_max_speed)
+        for edge_ID, new_max_capacity in scenario.get("edge_max_capacity", {}).items():
+            tm.set_edge_max_capacity(edge_ID, new_max_capacity)
+
+        route_preference_mix = scenario.get("route_preference_mix")
+        car_list = scenario.get("car_list", [])
+        if route_preference_mix:
+            for car in car_list:
+                if "route_preference" not in car:
+                    car["route_preference"] = rng.choices(list(route_preference_mix.keys()), list(route_preference_mix.values()))[0]
+        tm.add_cars(car_list)
+
+        expended_energy = 0
+        sum_maximum_expendible_energy = 0
+        steps_count = 0
+        for tick in range(scenario["number_ticks"]):
+            tick_result = tm.tick()
+            expended_energy += tick_result.expended_energy
+            sum_maximum_expendible_energy += tick_result.sum_maximum_expendible_energy
+            steps_count += tick_result.steps_count
+
+        route_status_counts = {"In progress": 0, "Waiting": 0, "Paused": 0, "Route Completed": 0, "Removed from simulation": 0}
+        for car in tm.graph.car_ID_to_car.values():
+            if car is None:
+                continue
+            route_status = car.get_route_status()
+            if route_status.startswith('Removed from simulation'):
+                route_status = 'Removed from simulation'
+            elif car.get_current_edge() is None:
+                route_status = 'Waiting'
+            route_status_counts[route_status] = route_status_counts.get(route_status, 0) + 1
+        for car_snapshot in tm.graph.car_archive.get_car_snapshots():    # Cars that finished their trip
+            route_status = car_snapshot["route_status"]
+            if route_status.startswith('Removed from simulation'):
+                route_status = 'Removed from simulation'
+            route_status_counts[route_status] = route_status_counts.get(route_status, 0) + 1
+
+        summary["number_cars"] = sum(route_status_counts.values())
+        summary["route_status_counts"] = route_status_counts
+        summary["expended_energy"] = expended_energy
+        summary["sum_maximum_expendible_energy"] = sum_maximum_expendible_energy
+        if sum_maximum_expendible_energy != 0:
+            summary["energy_used_percent"] = expended_energy / sum_maximum_expendible_energy
+        else:
+            summary["energy_used_percent"] = None
+        summary["steps_count"] = steps_count
+    except Exception as E:
+        summary["error"] = repr(E)
+    summary["seconds"] = time.perf_counter() - start_time
+    return summary
+
+
+class BatchRunner:
+    def __init__(self, network_config, number_workers = None, **traffic_manager_options) -> None:
+        '''Runs many variations ("scenarios") of a simulation on one network config in parallel, one worker process per scenario.
+        The Network is built once, here;  worker processes are forked from this process and share it copy-on-write,
+        so each scenario starts from the same freshly built Network without parsing the config or building routes again.
+        traffic_manager_options are passed on to TrafficManager (ex: precompute_routes = True, tick_engine = 'event'),
+        except car_archive_file:  scenarios run at the same time, so each one spills its archived Cars to its own file,
+        named after car_archive_file with the scenario index added (ex: archive.jsonl -> archive_3.jsonl).
+        Requires the 'fork' process start method (Linux, macOS).
+        Attributes:
+            template_traffic_manager:  TrafficManager holding the built Network (and no Cars) that every scenario starts from.
+            number_workers:  Maximum number of scenarios running at the same time (default:  number of CPU cores).
+            car_archive_file:  Path that the archive file of every scenario is named after, or None (archived Cars kept in memory).
+        '''
+        if "fork" not in multiprocessing.get_all_start_methods():
+            raise Exception("BatchRunner requires the 'fork' process start method, which this platform does not support.")
+        self.car_archive_file = traffic_manager_options.pop("car_archive_file", None)
+        self.template_traffic_manager = TrafficManager(network_config, **traffic_manager_options)
+        self.number_workers = number_workers or os.cpu_count() or 1
+
+
+    def run(self, scenarios, number_ticks):
+        '''API function:  runs every scenario for number_ticks ticks and yields its summary dictionary as soon as it completes
+        (in completion order, not scenario order).
+        A scenario is a dictionary with any of the following keys:
+            name:  Identifier copied into the summary (default:  index of the scenario in scenarios).
+            car_list:  Car dictionaries to add (as with TrafficManager.add_cars()) before the first tick.
+            route_preference_mix:  Dictionary of route_preference weights (ex: {"Fastest": 0.8, "Shortest": 0.2}),
+                used to draw a route_preference for every Car in car_list that does not specify one.
+            edge_max_speed, edge_max_capacity:  Dictionaries mapping Edge IDs to the values to use in this scenario.
+            number_ticks:  Overrides number_ticks for this scenario.
+            seed:  Random seed for the scenario (default 0);  the same scenario and seed always give the same summary.
+            car_archive_file:  File this scenario's archived Cars are spilled to (default:  derived from the BatchRunner's
+                car_archive_file, or None).  Must differ between scenarios.
+        Summaries hold "name", "number_ticks", "number_cars", "route_status_counts" (Cars per route status, with Cars not yet
+        on the Network counted as "Waiting"), "expended_energy", "sum_maximum_expendible_energy", "energy_used_percent",
+        "steps_count", "seconds", and "error" (None, or the Exception raised by the scenario, which does not stop the batch),
+        plus "car_archive_file" for scenarios that spilled archived Cars to a file.
+        '''
+        global TEMPLATE_TRAFFIC_MANAGER
+        indexed_scenarios = []
+        for scenario_index, scenario in enumerate(scenarios):
+            scenario = dict(scenario)
+            scenario.setdefault("number_ticks", number_ticks)
+            if self.car_archive_file is not None:
+                file_root, file_extension = os.path.splitext(self.car_archive_file)
+                scenario.setdefault("car_archive_file", file_root + "_" + str(scenario_index) + file_extension)
+            indexed_scenarios.append((scenario_index, scenario))
+
+        TEMPLATE_TRAFFIC_MANAGER = self.template_traffic_manager
+        try:
+            # a new worker process is forked for every scenario (maxtasksperchild = 1), so each starts from the unmodified template
+            with multiprocessing.get_context("fork").Pool(min(self.number_workers, max(1, len(indexed_scenarios))), maxtasksperchild=1) as pool:
+                for summary in pool.imap_unordered(run_scenario, indexed_scenarios):
+                    yield summary
+        finally:
+            TEMPLATE_TRAFFIC_MANAGER = None
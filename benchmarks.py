@@ -0,0 +1,511 @@
+from Traffic import TrafficManager
+from network_cars import Car
+from cmath import inf
+
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+class Benchmarks:
+    def __init__(self) -> None:
+        '''Collection of performance benchmarks for the Traffic_Simulator.
+        Run from the repository root, e.g.:  python benchmarks.py car_memory
+        Each benchmark prints its measurements and returns them as a dictionary.
+        '''
+        self.info = "Please see individual benchmark functions for more information."
+
+
+    def measure_car_memory(self, car_class, number_cars):
+        '''Returns the number of bytes allocated per Car when number_cars instances of car_class are held in memory.
+        '''
+        tracemalloc.start()
+        baseline_bytes = tracemalloc.get_traced_memory()[0]
+
+        path = [1, 2, 3]     # shared between Cars so that only the Car objects themselves are measured
+        cars = [car_class(car_ID, 2.5, 1, 0, 3, 10, path, "Static", "Fastest", 1) for car_ID in range(number_cars)]
+
+        allocated_bytes = tracemalloc.get_traced_memory()[0] - baseline_bytes
+        tracemalloc.stop()
+        del cars
+        return allocated_bytes / number_cars
+
+
+    def car_memory(self, car_counts = (100000, 1000000)):
+        '''Compares bytes per Car for the current (__slots__) Car against the former __dict__-based layout.
+        The former layout is reproduced by running the same __init__ on a class without __slots__.
+        Numbers include the Car object, its attribute storage, and its per-Car numeric values (IDs, positions).
+        '''
+        DictCar = type("DictCar", (), {"__init__": Car.__init__})
+
+        results = {}
+        for number_cars in car_counts:
+            dict_bytes = self.measure_car_memory(DictCar, number_cars)
+            slots_bytes = self.measure_car_memory(Car, number_cars)
+            results[number_cars] = {"__dict__": dict_bytes, "__slots__": slots_bytes}
+            print(number_cars, "Cars:  __dict__ layout", round(dict_bytes, 1), "bytes/Car,  __slots__ layout", round(slots_bytes, 1), "bytes/Car")
+        return results
+
+
+    def grid_network_config(self, number_rows, number_columns, edge_length = 80, max_speed = 10):
+        '''Returns a network config for a bidirectional grid of number_rows x number_columns Nodes.
+        '''
+        node_list = [{"id": node_ID} for node_ID in range(number_rows * number_columns)]
+        edge_list = []
+        for row in range(number_rows):
+            for column in range(number_columns):
+                node_ID = row * number_columns + column
+                neighbour_IDs = []
+                if column + 1 < number_columns:
+                    neighbour_IDs.append(node_ID + 1)
+                if row + 1 < number_rows:
+                    neighbour_IDs.append(node_ID + number_columns)
+                for neighbour_ID in neighbour_IDs:
+                    for start_node_ID, end_node_ID in ((node_ID, neighbour_ID), (neighbour_ID, node_ID)):
+                        edge_list.append({"id": len(edge_list),
+                                          "start_node_id": start_node_ID,
+                                          "end_node_id": end_node_ID,
+                                          "edge_length": edge_length,
+                                          "max_speed": max_speed})
+        return {"node_list": node_list, "edge_list": edge_list}
+
+
+    def populated_traffic_manager(self, number_edges, cars_per_edge, **traffic_manager_options):
+        '''Returns a TrafficManager on a square grid of about number_edges Edges, with cars_per_edge Cars queued on every Edge.
+        Cars stay on their start Edge (start_edge = end_edge) and are placed on the Network by one tick.
+        '''
+        side = max(2, round((number_edges / 4) ** 0.5))
+        network_config = self.grid_network_config(side, side)
+        tm = TrafficManager(network_config, **traffic_manager_options)
+
+        car_ID = 0
+        for edge in network_config["edge_list"]:
+            for car_index in range(cars_per_edge):
+                car = {"id": car_ID,
+                       "start_edge": edge["id"],
+                       "start_pos_meter": car_index * edge["edge_length"] / cars_per_edge,
+                       "end_edge": edge["id"],
+                       "end_pos_meter": edge["edge_length"],
+                       "path": []}
+                tm.graph.add_car(car)
+                car_ID += 1
+        tm.tick()
+        return tm
+
+
+    def snapshot(self, number_edges = 50000, number_cars = 500000):
+        '''Measures TrafficManager.get_snapshot() time and peak memory on a grid of about number_edges Edges holding number_cars Cars.
+        Peak memory is the largest amount of memory allocated while the snapshot is built (tracked by tracemalloc).
+        '''
+        tm = self.populated_traffic_manager(number_edges, max(1, number_cars // number_edges))
+        print("Network:", len(tm.graph.edge_ID_to_edge), "Edges,", len(tm.graph.car_ID_to_car), "Cars")
+
+        results = {}
+        for deep_copy in (False, True):
+            start_time = time.perf_counter()
+            tm.get_snapshot(deep_copy)
+            elapsed_time = time.perf_counter() - start_time
+
+            tracemalloc.start()
+            tm.get_snapshot(deep_copy)
+            peak_bytes = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            results[deep_copy] = {"seconds": elapsed_time, "peak_bytes": peak_bytes}
+            print("get_snapshot(deep_copy =", str(deep_copy) + "):", round(elapsed_time, 2), "s,  peak", round(peak_bytes / 2**20, 1), "MiB")
+        return results
+
+
+    def exit_queue(self, number_cars = 1000, car_length = 4, car_spacing = 5):
+        '''Measures Node exit-candidate extraction with number_cars Cars queued bumper to bumper on a single inbound Edge.
+        extraction:  calls to Node.get_inbound_exit_candidates() until the queue is empty, each removing the Car at the head of the queue.
+        drain:  ticks of the full simulation until every queued Car has crossed the Node.
+        '''
+        queue_length = number_cars * car_spacing
+        network_config = {"node_list": [{"id": 0}, {"id": 1}, {"id": 2}],
+                          "edge_list": [{"id": 0, "start_node_id": 0, "end_node_id": 1, "edge_length": queue_length, "max_speed": 10},
+                                        {"id": 1, "start_node_id": 1, "end_node_id": 2, "edge_length": queue_length, "max_speed": 10}]}
+        results = {}
+        for benchmark_name in ("extraction", "drain"):
+            tm = TrafficManager(network_config)
+            for car_ID in range(number_cars):
+                tm.add_car({"id": car_ID,
+                            "car_length": car_length,
+                            "start_edge": 0,
+                            "start_pos_meter": queue_length - car_ID * car_spacing,
+                            "end_edge": 1,
+                            "end_pos_meter": queue_length / 2,
+                            "car_type": "Static",
+                            "path": [1]})
+            tm.tick()    # place the queue on Edge 0, head Car first
+            queue_edge = tm.graph.edge_ID_to_edge[0]
+            queue_node = queue_edge.get_end_node()
+
+            start_time = time.perf_counter()
+            number_ticks = 0
+            if benchmark_name == "extraction":
+                while queue_edge.get_current_cars():
+                    queue_edge.get_current_cars()[0].set_current_pos_meter_car_front(queue_length)
+                    queue_node.get_inbound_exit_candidates()
+            else:
+                while queue_edge.get_current_cars():
+                    tm.tick()
+                    number_ticks += 1
+            elapsed_time = time.perf_counter() - start_time
+
+            results[benchmark_name] = {"seconds": elapsed_time, "ticks": number_ticks}
+            print(benchmark_name + ":", number_cars, "Cars,", round(elapsed_time, 4), "s", ("(" + str(number_ticks) + " ticks)") if number_ticks else "")
+        return results
+
+
+    def random_car_list(self, network_config, number_cars, seed = 0):
+        '''Returns number_cars Car dictionaries with random start and end Edges;  their paths are assigned on placement.
+        '''
+        rng = random.Random(seed)
+        car_list = []
+        for car_ID in range(number_cars):
+            start_edge, end_edge = rng.sample(network_config["edge_list"], 2)
+            car_list.append({"id": car_ID,
+                             "car_length": 4,
+                             "start_edge": start_edge["id"],
+                             "start_pos_meter": rng.uniform(0, start_edge["edge_length"] / 2),
+                             "end_edge": end_edge["id"],
+                             "end_pos_meter": rng.uniform(1, end_edge["edge_length"] - 1),
+                             "car_type": "Static",
+                             "route_preference": "Fastest"})
+        return car_list
+
+
+    def origin_destination_car_list(self, network_config, number_cars, number_routes = 2000, seed = 0):
+        '''Returns number_cars Car dictionaries (without paths) spread over number_routes random (start Edge, end Edge) pairs,
+        as produced by an origin-destination demand matrix.
+        '''
+        rng = random.Random(seed)
+        routes = [rng.sample(network_config["edge_list"], 2) for route_index in range(number_routes)]
+        car_list = []
+        for car_ID in range(number_cars):
+            start_edge, end_edge = rng.choice(routes)
+            car_list.append({"id": car_ID,
+                             "car_length": 4,
+                             "start_edge": start_edge["id"],
+                             "start_pos_meter": 0,
+                             "end_edge": end_edge["id"],
+                             "end_pos_meter": end_edge["edge_length"] / 2,
+                             "car_type": "Static",
+                             "route_preference": "Fastest"})
+        return car_list
+
+
+    def bulk_insertion(self, number_cars = 1000000, number_rows = 30, number_routes = 2000):
+        '''Measures placing number_cars Cars (over number_routes origin-destination pairs) on a number_rows x number_rows grid,
+        with one TrafficManager.add_car() call per Car and with a single TrafficManager.add_cars() call.
+        Both times include calculating the number_routes paths (once each:  add_car() reuses them through the route cache).
+        '''
+        network_config = self.grid_network_config(number_rows, number_rows)
+        car_list = self.origin_destination_car_list(network_config, number_cars, number_routes)
+
+        results = {}
+        for benchmark_name in ("add_car", "add_cars"):
+            tm = TrafficManager(network_config)
+            start_time = time.perf_counter()
+            if benchmark_name == "add_car":
+                for car in car_list:
+                    tm.add_car(car)
+            else:
+                tm.add_cars(car_list)
+            elapsed_time = time.perf_counter() - start_time
+            results[benchmark_name] = elapsed_time
+            print(benchmark_name + ":", number_cars, "Cars,", round(elapsed_time, 2), "s")
+            del tm
+        return results
+
+
+    def routing_latency(self, number_rows = 158, number_queries = 200, number_landmarks = 8, metric = 'Fastest'):
+        '''Measures the latency of uncached route queries between random Edges of a number_rows x number_rows grid
+        (about 99k Edges by default), with Dijkstra and with A* using number_landmarks landmarks (TrafficManager.precompute_route_landmarks()),
+        and checks that both find paths of the same cost.  Reports the landmark build time and the mean, median and 95th percentile latency.
+        '''
+        network_config = self.grid_network_config(number_rows, number_rows)
+        tm = TrafficManager(network_config, route_cache_size = 0, seed = 0)    # every query is a new search
+        rng = random.Random(0)
+        edge_IDs = list(tm.graph.edge_ID_to_edge)
+        queries = [(rng.choice(edge_IDs), rng.choice(edge_IDs)) for query_index in range(number_queries)]
+        print("Network:", len(edge_IDs), "Edges,", number_queries, "'" + metric + "' queries")
+
+        results = {}
+        paths = {}
+        for search in ("Dijkstra", "A* with landmarks"):
+            if search != "Dijkstra":
+                start_time = time.perf_counter()
+                tm.precompute_route_landmarks(number_landmarks)
+                results["landmark_build_seconds"] = time.perf_counter() - start_time
+                print(number_landmarks, "landmarks built in", round(results["landmark_build_seconds"], 2), "s")
+            latencies = []
+            paths[search] = []
+            for start_edge_ID, end_edge_ID in queries:
+                start_time = time.perf_counter()
+                paths[search].append(tm.get_route_A_to_B(start_edge_ID, end_edge_ID, metric))
+                latencies.append(time.perf_counter() - start_time)
+            latencies.sort()
+            results[search] = {"mean_ms": 1000 * sum(latencies) / len(latencies),
+                               "median_ms": 1000 * latencies[len(latencies) // 2],
+                               "p95_ms": 1000 * latencies[int(len(latencies) * 0.95)]}
+            print(search + ":  mean", round(results[search]["mean_ms"], 2), "ms,  median", round(results[search]["median_ms"], 2),
+                  "ms,  95th percentile", round(results[search]["p95_ms"], 2), "ms")
+
+        path_cost = tm.graph.path_cost_distance if metric == 'Shortest' else tm.graph.path_cost_minimum_time
+        results["same_costs"] = all(abs(path_cost(dijkstra_path) - path_cost(landmark_path)) <= 1e-9 * path_cost(dijkstra_path)
+                                    if dijkstra_path else not landmark_path
+                                    for dijkstra_path, landmark_path in zip(paths["Dijkstra"], paths["A* with landmarks"]))
+        print("Path costs identical:", results["same_costs"])
+        return results
+
+
+    def get_car_states(self, tm):
+        '''Returns the sorted (id, current_edge, position, route_status) tuples of every Car placed on the Network,
+        including archived Cars that finished their trip.
+        '''
+        car_states = []
+        for car in tm.graph.car_ID_to_car.values():
+            if car is not None and car.get_current_edge() is not None:
+                car_states.append((car.get_car_ID(), car.get_current_edge(), round(car.get_current_pos_meter_car_front(), 6), car.get_route_status()))
+        for car in tm.graph.car_archive.get_car_snapshots():
+            car_states.append((car["id"], car["current_edge"], round(car["current_pos_meter_car_front"], 6), car["route_status"]))
+        return sorted(car_states)
+
+
+    def tick_engines(self, number_rows = 20, number_cars = 4000, number_ticks = 30):
+        '''Validates tick_engine = 'event' against the default 'passes' engine, then compares their speed.
+        validation:  both engines run the example configs (as in main.py) and must produce the same Car states after every tick.
+        speed:  both engines run number_cars random trips on a number_rows x number_rows grid for number_ticks ticks.
+        Congested runs are not expected to match Car for Car, as the engines break ties between simultaneous crossings differently.
+        '''
+        with open("./configs/EXAMPLE_network_config.json") as network_file, open("./configs/EXAMPLE_car_config.json") as car_file:
+            example_configs = {"EXAMPLE_network_config": (json.load(network_file), json.load(car_file)["car_list"])}
+        with open("./configs/output_as_input_example.json") as output_file:
+            output_config = json.load(output_file)
+        example_configs["output_as_input_example"] = (output_config, output_config["current_cars"] + output_config["completed_cars"])
+
+        results = {}
+        for config_name, (network_config, car_list) in example_configs.items():
+            engine_car_states = {}
+            for tick_engine in ("passes", "event"):
+                tm = TrafficManager(network_config, tick_engine = tick_engine, check_invariants = True, seed = 0)
+                for car in car_list:
+                    tm.add_car(json.loads(json.dumps(car)))     # Cars keep (and change) the given path list
+                engine_car_states[tick_engine] = []
+                for tick in range(8):
+                    tm.tick()
+                    engine_car_states[tick_engine].append(self.get_car_states(tm))
+            matching_ticks = sum(passes_states == event_states for passes_states, event_states in zip(engine_car_states["passes"], engine_car_states["event"]))
+            results[config_name] = matching_ticks
+            print("validation", config_name + ":", matching_ticks, "of 8 ticks identical")
+
+        network_config = self.grid_network_config(number_rows, number_rows)
+        car_list = self.random_car_list(network_config, number_cars)
+        for tick_engine in ("passes", "event"):
+            tm = TrafficManager(network_config, tick_engine = tick_engine, seed = 0)
+            for car in car_list:
+                tm.add_car(car)
+            steps_count = 0
+            start_time = time.perf_counter()
+            for tick in range(number_ticks):
+                steps_count += tm.tick().steps_count
+            elapsed_time = time.perf_counter() - start_time
+            number_completed = sum(car["route_status"] == 'Route Completed' for car in tm.graph.car_archive.get_car_snapshots())
+            results[tick_engine] = {"seconds": elapsed_time, "steps": steps_count, "completed_cars": number_completed}
+            print(tick_engine + ":", number_ticks, "ticks,", round(elapsed_time, 2), "s,", steps_count, "steps,", number_completed, "Cars completed")
+        return results
+
+
+    def random_walk_car_list(self, network_config, number_cars, path_length = 40, seed = 0):
+        '''Returns number_cars Car dictionaries following random walks of path_length Edges (no U-turns), with Static paths.
+        Paths are given explicitly, so placing the Cars does not depend on routing speed.
+        '''
+        rng = random.Random(seed)
+        node_ID_to_outbound_edges = {}
+        for edge in network_config["edge_list"]:
+            node_ID_to_outbound_edges.setdefault(edge["start_node_id"], []).append(edge)
+        car_list = []
+        for car_ID in range(number_cars):
+            edge = rng.choice(network_config["edge_list"])
+            path = [edge]
+            for step in range(path_length):
+                next_edges = [next_edge for next_edge in node_ID_to_outbound_edges[edge["end_node_id"]] if next_edge["end_node_id"] != edge["start_node_id"]]
+                edge = rng.choice(next_edges or node_ID_to_outbound_edges[edge["end_node_id"]])
+                path.append(edge)
+            car_list.append({"id": car_ID,
+                             "car_length": 4,
+                             "start_edge": path[0]["id"],
+                             "start_pos_meter": rng.uniform(0, path[0]["edge_length"] / 2),
+                             "end_edge": path[-1]["id"],
+                             "end_pos_meter": path[-1]["edge_length"] / 2,
+                             "car_type": "Static",
+                             "path": [path_edge["id"] for path_edge in path[1:]]})
+        return car_list
+
+
+    def partitioned_scaling(self, number_rows = 60, number_cars = 40000, number_ticks = 20, worker_counts = (1, 2, 4, 8), edge_capacities = (inf, 3),
+                            number_random_route_cars = 300):
+        '''Runs the same random-walk traffic on a number_rows x number_rows grid with PartitionedTrafficManager for every worker count,
+        checks that every run ends with the same Car states, and reports tick time and speedup over a single worker.
+        number_random_route_cars Dynamic Cars with 'Random' routes (redrawn at every Node) are added to the random walks,
+        so that the check also covers route choices.
+        This is repeated for every max_capacity in edge_capacities (given to every Edge), so that Edges filling up
+        (including Edges between partitions) are covered as well.
+        Speedup is bounded by the number of available CPU cores (printed first).
+        '''
+        from network_partitioning import PartitionedTrafficManager    # only needed by this benchmark
+        import multiprocessing
+
+        results = {}
+        for edge_capacity in edge_capacities:
+            network_config = self.grid_network_config(number_rows, number_rows)
+            if edge_capacity != inf:
+                for edge in network_config["edge_list"]:
+                    edge["max_capacity"] = edge_capacity
+            car_list = self.random_walk_car_list(network_config, number_cars)
+            for car in self.random_car_list(network_config, number_random_route_cars):
+                car.update({"id": number_cars + car["id"], "car_type": "Dynamic", "route_preference": "Random"})
+                car_list.append(car)
+            print("Network:", len(network_config["edge_list"]), "Edges with max_capacity", edge_capacity, ",", len(car_list), "Cars,",
+                  multiprocessing.cpu_count(), "CPU cores")
+
+            reference_car_states = None
+            for number_workers in worker_counts:
+                tm = PartitionedTrafficManager(network_config, number_workers)
+                for car in car_list:
+                    tm.add_car(json.loads(json.dumps(car)))     # Cars keep (and change) the given path list
+                start_time = time.perf_counter()
+                for tick in range(number_ticks):
+                    tm.tick()
+                elapsed_time = time.perf_counter() - start_time
+                car_states = tm.get_car_states()
+                tm.close()
+
+                if reference_car_states is None:
+                    reference_car_states = car_states
+                results[(edge_capacity, number_workers)] = {"seconds": elapsed_time, "identical": car_states == reference_car_states}
+                print(number_workers, "workers:", number_ticks, "ticks,", round(elapsed_time, 2), "s,  speedup",
+                      round(results[(edge_capacity, worker_counts[0])]["seconds"] / elapsed_time, 2),
+                      ",  Car states identical:", results[(edge_capacity, number_workers)]["identical"])
+        return results
+
+
+    def batch_scenarios(self, number_rows = 20, number_scenarios = 8, number_cars = 1000, number_ticks = 10):
+        '''Runs number_scenarios demand levels (up to number_cars random trips) on a number_rows x number_rows grid,
+        first one after another with a new TrafficManager each (as in main.py), then with BatchRunner.
+        Speedup is bounded by the number of available CPU cores (printed first).
+        '''
+        from batch_runner import BatchRunner    # only needed by this benchmark
+        import os
+
+        network_config = self.grid_network_config(number_rows, number_rows)
+        scenarios = []
+        for scenario_index in range(number_scenarios):
+            scenario_number_cars = number_cars * (scenario_index + 1) // number_scenarios
+            scenarios.append({"name": scenario_number_cars, "car_list": self.random_car_list(network_config, scenario_number_cars, scenario_index)})
+        print("Network:", len(network_config["edge_list"]), "Edges,", number_scenarios, "scenarios,", os.cpu_count(), "CPU cores")
+
+        start_time = time.perf_counter()
+        for scenario in scenarios:
+            tm = TrafficManager(network_config, seed = 0)
+            for car in scenario["car_list"]:
+                tm.add_car(dict(car))
+            for tick in range(number_ticks):
+                tm.tick()
+        sequential_time = time.perf_counter() - start_time
+        print("sequential:", round(sequential_time, 2), "s")
+
+        start_time = time.perf_counter()
+        summaries = list(BatchRunner(network_config).run(scenarios, number_ticks))
+        batch_time = time.perf_counter() - start_time
+        print("BatchRunner:", round(batch_time, 2), "s,  speedup", round(sequential_time / batch_time, 2), ",", sum(summary["error"] is None for summary in summaries), "scenarios completed")
+        return {"sequential": sequential_time, "batch": batch_time}
+
+
+    def tick_potential_overhead(self, number_registered_cars = 1000000, number_active_cars = 1000, number_rows = 20, number_ticks = 20):
+        '''Measures the time per tick of number_active_cars random trips on a number_rows x number_rows grid,
+        while number_registered_cars more Cars are registered on the Network but waiting to enter a metered Edge (max_capacity = 0).
+        Tick potential is restored lazily (see Network.start_tick()), so the waiting Cars should add (almost) nothing to the time per tick.
+        '''
+        network_config = self.grid_network_config(number_rows, number_rows)
+        car_list = self.random_car_list(network_config, number_active_cars)
+
+        # metered Edge leading to an exit Edge, away from the grid
+        metered_edge_ID, exit_edge_ID = len(network_config["edge_list"]), len(network_config["edge_list"]) + 1
+        first_node_ID = len(network_config["node_list"])
+        network_config["node_list"] += [{"id": first_node_ID + node_index} for node_index in range(3)]
+        network_config["edge_list"].append({"id": metered_edge_ID, "start_node_id": first_node_ID, "end_node_id": first_node_ID + 1,
+                                            "edge_length": 80, "max_speed": 10, "max_capacity": 0})
+        network_config["edge_list"].append({"id": exit_edge_ID, "start_node_id": first_node_ID + 1, "end_node_id": first_node_ID + 2,
+                                            "edge_length": 80, "max_speed": 10})
+
+        results = {}
+        for registered_cars in (0, number_registered_cars):
+            tm = TrafficManager(network_config, seed = 0)
+            tm.add_cars(dict(car) for car in car_list)
+            tm.add_cars({"id": number_active_cars + car_index,
+                         "start_edge": metered_edge_ID,
+                         "start_pos_meter": 0,
+                         "end_edge": exit_edge_ID,
+                         "end_pos_meter": 80,
+                         "car_type": "Static",
+                         "path": [exit_edge_ID]} for car_index in range(registered_cars))
+
+            start_time = time.perf_counter()
+            for tick in range(number_ticks):
+                tm.tick()
+            seconds_per_tick = (time.perf_counter() - start_time) / number_ticks
+            results[registered_cars] = seconds_per_tick
+            print(number_active_cars, "active Cars,", registered_cars, "waiting Cars:", round(seconds_per_tick * 1000, 2), "ms per tick")
+            del tm
+        return results
+
+
+    def network_loading(self, number_rows = 500):
+        '''Measures TrafficManager start-up time on a number_rows x number_rows grid (about 1M Edges for 500 rows):
+        add_node_add_edge:  Network built one Node and Edge at a time (Network.add_node() and Network.add_edge()), as before the fast loader.
+        json:  network config read from a JSON file with read_network_file(), then loaded through its NetworkIndex.
+        binary:  network read from a binary network file (see write_network_file()).
+        '''
+        from network_loader import build_network_index, read_network_file, write_network_file    # only needed by this benchmark
+        import os
+        import tempfile
+
+        network_config = self.grid_network_config(number_rows, number_rows)
+        print("Network:", len(network_config["node_list"]), "Nodes,", len(network_config["edge_list"]), "Edges")
+        results = {}
+        with tempfile.TemporaryDirectory() as directory:
+            json_file_path = os.path.join(directory, "network.json")
+            binary_file_path = os.path.join(directory, "network.tsnet")
+            with open(json_file_path, 'w') as json_file:
+                json.dump(network_config, json_file)
+            write_network_file(build_network_index(network_config), binary_file_path)
+
+            for benchmark_name in ("add_node_add_edge", "json", "binary"):
+                start_time = time.perf_counter()
+                if benchmark_name == "add_node_add_edge":
+                    tm = TrafficManager({"node_list": [], "edge_list": []}, seed = 0)
+                    for node in network_config["node_list"]:
+                        tm.graph.add_node(node)
+                    for edge in network_config["edge_list"]:
+                        tm.graph.add_edge(edge)
+                elif benchmark_name == "json":
+                    tm = TrafficManager(read_network_file(json_file_path), seed = 0)
+                else:
+                    tm = TrafficManager(read_network_file(binary_file_path), seed = 0)
+                elapsed_time = time.perf_counter() - start_time
+                results[benchmark_name] = elapsed_time
+                print(benchmark_name + ":", round(elapsed_time, 2), "s")
+                del tm
+        return results
+
+
+if __name__ == "__main__":
+    benchmarks = Benchmarks()
+    benchmark_names = sys.argv[1:] or ["car_memory"]
+    for benchmark_name in benchmark_names:
+        print("Running benchmark:", benchmark_name)
+        getattr(benchmarks, benchmark_name)()
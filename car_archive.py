@@ -0,0 +1,93 @@
+import json
+import os
+
+class CarArchive:
+    def __init__(self, file_path = None, memory_limit = 100000) -> None:
+        '''Store for Cars that finished their trip ('Route Completed' or 'Removed from simulation'), kept out of Network.car_ID_to_car
+        so that per-tick work and memory only cover active Cars.  See Network.archive_finished_cars().
+        If file_path is given, archived Cars beyond memory_limit are spilled to it as JSON lines (one Car snapshot per line);
+        an existing file at file_path is replaced.  Otherwise every archived Car is kept in memory.
+        Attributes:
+            file_path:  Path of the file archived Cars are spilled to, or None.
+            memory_limit:  Number of archived Cars held in memory before they are spilled to file_path.
+            car_ID_to_car:  Archived Car objects held in memory, in archiving order.
+            car_IDs:  IDs of every archived Car (held in memory or spilled), so that Car IDs stay unique within the simulation,
+                except for IDs reserved for generated Cars.
+            first_unrecorded_car_ID:  First integer Car ID reserved for generated Cars, whose uniqueness is guaranteed by their
+                DemandGenerator, or None.  These IDs are not added to car_IDs (see Network.reserve_generated_car_IDs()).
+            number_cars:  Number of archived Cars.
+            number_spilled_cars:  Number of Cars written to file_path.
+        '''
+        self.file_path = file_path
+        self.memory_limit = memory_limit
+        self.car_ID_to_car = {}
+        self.car_IDs = set()
+        self.first_unrecorded_car_ID = None
+        self.number_cars = 0
+        self.number_spilled_cars = 0
+        if file_path is not None:
+            with open(file_path, 'w'):
+                pass
+
+
+    def add_cars(self, cars):
+        '''Archives the given Car objects.
+        Cars already in memory are spilled first if the memory limit is reached, so the Cars of the latest call stay in memory
+        (see Network.get_snapshot_deltas()).
+        '''
+        if self.file_path is not None and len(self.car_ID_to_car) >= self.memory_limit:
+            self.spill()
+        first_unrecorded_car_ID = self.first_unrecorded_car_ID
+        for car in cars:
+            car_ID = car.get_car_ID()
+            self.car_ID_to_car[car_ID] = car
+            if first_unrecorded_car_ID is None or not isinstance(car_ID, int) or car_ID < first_unrecorded_car_ID:
+                self.car_IDs.add(car_ID)
+        self.number_cars += len(cars)
+
+
+    def spill(self):
+        '''Appends the snapshots of every Car held in memory to file_path, then releases them.
+        '''
+        with open(self.file_path, 'a') as archive_file:
+            for car in self.car_ID_to_car.values():
+                archive_file.write(json.dumps(car.get_snapshot()) + "\n")
+        self.number_spilled_cars += len(self.car_ID_to_car)
+        self.car_ID_to_car = {}
+
+
+    def set_first_unrecorded_car_ID(self, first_unrecorded_car_ID):
+        '''Stops recording the IDs of archived Cars from first_unrecorded_car_ID up (see first_unrecorded_car_ID).
+        '''
+        self.first_unrecorded_car_ID = first_unrecorded_car_ID
+
+
+    def contains(self, car_ID):
+        '''Returns True if the Car associated with car_ID has been archived (always False for IDs reserved for generated Cars).
+        '''
+        return car_ID in self.car_IDs
+
+
+    def get_number_cars(self):
+        '''Returns the number of archived Cars.
+        '''
+        return self.number_cars
+
+
+    def get_car_snapshots(self, car_IDs = None):
+        '''Yields the snapshot (see Car.get_snapshot()) of every archived Car, in archiving order,
+        or only of those whose ID is in car_IDs (a set) if given.
+        Spilled Cars are read back from file_path, which is only opened if some of car_IDs are not held in memory.
+        '''
+        spilled_car_IDs = None
+        if car_IDs is not None:
+            spilled_car_IDs = {car_ID for car_ID in car_IDs if car_ID not in self.car_ID_to_car}
+        if self.number_spilled_cars and spilled_car_IDs != set() and os.path.exists(self.file_path):
+            with open(self.file_path) as archive_file:
+                for line in archive_file:
+                    car_snapshot = json.loads(line)
+                    if spilled_car_IDs is None or car_snapshot["id"] in spilled_car_IDs:
+                        yield car_snapshot
+        for car_ID, car in self.car_ID_to_car.items():
+            if car_IDs is None or car_ID in car_IDs:
+                yield car.get_snapshot()
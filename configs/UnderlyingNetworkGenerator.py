@@ -1,37 +1,88 @@
+from array import array
 import collections
 from cmath import inf
+import math
 import random
 
+from network_loader import NODE_COLUMNS, NetworkIndex, load_default_config
+
+MINIMUM_EDGE_LENGTH = 1    # Edges between (nearly) coincident Nodes are given this length instead of 0
+
 class NetworkGenerator:
-    def __init__(self) -> None:
+    def __init__(self, seed = None) -> None:
         '''Class containing various functions for generation Network objects for the simulation to run on.
         A Network can also be provided via custom JSON file instead.
+        Attributes:
+            rng:  random.Random generator used by probabilistic generator functions;  the same seed always generates the same Networks.
         '''
         self.info = "Please see individual generator functions for more information."
+        self.rng = random.Random(seed)
 
 
     def output_Network_dictionary(self, node_dict, edge_dict):
-        '''Returns dictionary containing all Node and Edge information for the newly generated Network.
+        '''Returns dictionary containing all Node and Edge information for the newly generated Network,
+        with "node_list" and "edge_list" as accepted by TrafficManager() / Network().
+        Attributes that were not generated (None) are left out, so that they are filled in from the DEFAULT_*.json files.
         '''
         snapshot = {}
 
         edge_snapshots = []
         for edge_key in edge_dict:
             edge = edge_dict[edge_key]
-            edge_raw = edge.__dict__
+            edge_raw = {key: value for key, value in edge.__dict__.items() if value is not None}
             edge_snapshots.append(edge_raw)
-        snapshot["edges"] = edge_snapshots
+        snapshot["edge_list"] = edge_snapshots
 
         node_snapshots = []
         for node_key in node_dict:
             node = node_dict[node_key]
-            node_raw = node.__dict__  
+            node_raw = {key: value for key, value in node.__dict__.items() if value is not None}
             node_snapshots.append(node_raw)
-        snapshot["nodes"] = node_snapshots
+        snapshot["node_list"] = node_snapshots
 
         return snapshot
 
 
+    def output_network(self, number_nodes, edge_start_node_IDs, edge_end_node_IDs, edge_lengths = None, output_format = "config"):
+        '''Returns a generated Network with Node IDs 0 to number_nodes - 1, and one Edge per entry of edge_start_node_IDs / edge_end_node_IDs
+        (Edge IDs in the same order), in one of the following output formats:
+            "config":  dictionary with "node_list" and "edge_list", as accepted by TrafficManager() / Network() and json.dump().
+            "index":  NetworkIndex (see network_loader.py), which skips the per-Node and per-Edge dictionaries altogether.
+                      Intended for very large Networks;  it can be passed to TrafficManager() directly or saved with write_network_file().
+        Attributes that are not generated (all Node attributes, max_speed, max_capacity, and edge_length if edge_lengths is None)
+        are filled in from the DEFAULT_*.json files.
+        '''
+        if output_format == "config":
+            node_list = [{"id": node_ID} for node_ID in range(number_nodes)]
+            edge_list = [{"id": edge_ID, "start_node_id": start_node_ID, "end_node_id": end_node_ID}
+                         for edge_ID, (start_node_ID, end_node_ID) in enumerate(zip(edge_start_node_IDs, edge_end_node_IDs))]
+            if edge_lengths is not None:
+                for edge, edge_length in zip(edge_list, edge_lengths):
+                    edge["edge_length"] = edge_length
+            return {"node_list": node_list, "edge_list": edge_list}
+
+        elif output_format == "index":
+            node_default_config = load_default_config("node") or {}
+            edge_default_config = load_default_config("edge") or {}
+            default_max_capacity = edge_default_config.get("max_capacity")
+            if default_max_capacity == 'Infinity':
+                default_max_capacity = inf
+
+            number_edges = len(edge_start_node_IDs)
+            node_columns = {column_name: [node_default_config.get(column_name)] * number_nodes for column_name in NODE_COLUMNS}
+            if edge_lengths is None:
+                edge_lengths = [edge_default_config.get("edge_length")] * number_edges
+            edge_columns = {"edge_length": list(edge_lengths),
+                            "max_speed": [edge_default_config.get("max_speed")] * number_edges,
+                            "max_capacity": [default_max_capacity] * number_edges}
+            # Node IDs equal Node indices here
+            return NetworkIndex(list(range(number_nodes)), list(range(number_edges)), edge_start_node_IDs, edge_end_node_IDs,
+                                node_columns, edge_columns, {})
+
+        else:
+            raise Exception('"', output_format, '" is not a supported output format.  Instead try "config" or "index".')
+
+
     def generate_complete_bidirectional_network_default_values(self, number_nodes):
         '''Generates a complete Network consisting of number_nodes Nodes, each connected to every other Node in both directions.
         This Network uses the following default value:
@@ -68,41 +119,149 @@ class NetworkGenerator:
         return network_dict
 
 
-    def create_ER_network_default_values(self, number_nodes, probability_joining = 0.5):
+    def create_ER_network_default_values(self, number_nodes, probability_joining = 0.5, output_format = "config"):
         '''Creates an Erdos Renyi Network based on the given parameters:
-        A each pair of nodes has a probability_joining (0 < p < 1) of being connected in an ER Network.
+        A each pair of nodes has a probability_joining (0 <= p <= 1) of being connected in an ER Network.
         As this is a directional Network, each pair will be considered separately per direction.
+        Instead of drawing a random number for each of the number_nodes * (number_nodes - 1) pairs, the number of pairs skipped
+        before the next Edge is drawn from a geometric distribution, so generation takes time proportional to the number of Edges.
         This Network uses the following default values:
             probability_joining = 0.5           # can be overwriten via user input
             node.intersection_time_cost = 0
         Please note that this NetworkGenerator function only generates the barebone structures necessary for a Network. 
         All additional attributes will be loaded via "DEFAULT_edge_values_config.json" during the simulation process.
+        See output_network() for output_format.
         '''
-        number_nodes = number_nodes
-        # create Node objects
-        complete_network_node_ID_to_node = collections.defaultdict(lambda: None)
-        complete_network_edge_ID_to_edge = collections.defaultdict(lambda: None)
+        if not 0 <= probability_joining <= 1:
+            raise Exception("probability_joining must be between 0 and 1.")
 
-        for node_index in range(0,number_nodes):
-            node_ID = node_index
-            new_node = GeneratorNode(node_ID)
-            complete_network_node_ID_to_node[node_ID] = new_node
-            
-        # create Edge objects -- requires Nodes to exist first
-        edge_index_counter = 0
+        edge_start_node_IDs = array('q')
+        edge_end_node_IDs = array('q')
+        number_pairs = number_nodes * (number_nodes - 1)    # no looping roads allowed
+        if probability_joining > 0:
+            log_probability_not_joining = math.log(1 - probability_joining) if probability_joining < 1 else -inf
+            pair_index = -1
+            while True:
+                # pairs skipped before the next Edge (always 0 if probability_joining = 1)
+                pair_index += 1 + int(math.log(1 - self.rng.random()) / log_probability_not_joining)
+                if pair_index >= number_pairs:
+                    break
+                start_node, end_offset = divmod(pair_index, number_nodes - 1)
+                edge_start_node_IDs.append(start_node)
+                edge_end_node_IDs.append(end_offset + (end_offset >= start_node))   # skip start_node itself
 
-        for start_node in range(0,number_nodes):
-            for end_node in range(0,number_nodes):
-                if start_node == end_node:
-                    pass  # no looping roads allowed
-                else:
-                    # generate random number
-                    random_number = random.uniform(0,1)
-                    if random_number <= probability_joining:
-                        edge_ID = edge_index_counter
-                        edge_index_counter += 1
-                        new_inbound_edge = GeneratorEdge(edge_ID, start_node, end_node)
-                        complete_network_edge_ID_to_edge[edge_ID] = new_inbound_edge
+        return self.output_network(number_nodes, edge_start_node_IDs, edge_end_node_IDs, output_format = output_format)
+
+
+    def generate_grid_network(self, number_rows, number_columns, block_length = 80, one_way = False, output_format = "config"):
+        '''Generates a Manhattan grid of number_rows x number_columns Nodes (Node ID = row * number_columns + column),
+        with Edges of length block_length between horizontally and vertically adjacent Nodes.
+        Streets are two-way (one Edge in each direction) unless one_way is True, in which case the inner streets alternate direction
+        (even rows run east, odd rows west, even columns south, odd columns north) and only the outer ring stays two-way,
+        which keeps every Node reachable from every other Node.
+        See output_network() for output_format.
+        '''
+        edge_start_node_IDs = array('q')
+        edge_end_node_IDs = array('q')
+
+        def add_street(node_ID, neighbour_ID, forward, two_way):
+            if forward or two_way:
+                edge_start_node_IDs.append(node_ID)
+                edge_end_node_IDs.append(neighbour_ID)
+            if not forward or two_way:
+                edge_start_node_IDs.append(neighbour_ID)
+                edge_end_node_IDs.append(node_ID)
+
+        for row in range(number_rows):
+            for column in range(number_columns):
+                node_ID = row * number_columns + column
+                if column + 1 < number_columns:
+                    add_street(node_ID, node_ID + 1, row % 2 == 0, not one_way or row == 0 or row == number_rows - 1)
+                if row + 1 < number_rows:
+                    add_street(node_ID, node_ID + number_columns, column % 2 == 0, not one_way or column == 0 or column == number_columns - 1)
+
+        edge_lengths = [block_length] * len(edge_start_node_IDs)
+        return self.output_network(number_rows * number_columns, edge_start_node_IDs, edge_end_node_IDs, edge_lengths, output_format)
+
+
+    def generate_ring_radial_network(self, number_rings, number_spokes, ring_spacing = 200, output_format = "config"):
+        '''Generates a ring-radial city:  a centre Node (ID 0) surrounded by number_rings concentric ring roads, each with
+        number_spokes Nodes (ring k, spoke s has Node ID 1 + (k - 1) * number_spokes + s), placed ring_spacing apart.
+        Neighbouring Nodes on a ring, and on a spoke (including the centre), are joined by two-way roads.
+        Edge lengths are the straight-line distances between the Nodes.
+        See output_network() for output_format.
+        '''
+        if number_spokes < 3:
+            raise Exception("A ring-radial Network needs at least 3 spokes.")
+
+        node_coordinates = [(0, 0)]
+        for ring in range(1, number_rings + 1):
+            for spoke in range(number_spokes):
+                angle = 2 * math.pi * spoke / number_spokes
+                node_coordinates.append((ring * ring_spacing * math.cos(angle), ring * ring_spacing * math.sin(angle)))
+
+        edge_start_node_IDs = array('q')
+        edge_end_node_IDs = array('q')
+        for ring in range(1, number_rings + 1):
+            first_node_ID = 1 + (ring - 1) * number_spokes
+            for spoke in range(number_spokes):
+                node_ID = first_node_ID + spoke
+                inner_node_ID = node_ID - number_spokes if ring > 1 else 0
+                next_node_ID = first_node_ID + (spoke + 1) % number_spokes
+                for neighbour_ID in (inner_node_ID, next_node_ID):
+                    edge_start_node_IDs.extend((node_ID, neighbour_ID))
+                    edge_end_node_IDs.extend((neighbour_ID, node_ID))
+
+        edge_lengths = self.get_edge_lengths(node_coordinates, edge_start_node_IDs, edge_end_node_IDs)
+        return self.output_network(len(node_coordinates), edge_start_node_IDs, edge_end_node_IDs, edge_lengths, output_format)
+
+
+    def generate_random_geometric_network(self, number_nodes, connection_radius, side_length = 1000, output_format = "config"):
+        '''Generates a random geometric Network:  number_nodes Nodes are placed uniformly at random in a side_length x side_length square,
+        and every pair of Nodes at most connection_radius apart is joined by a two-way road whose length is their distance.
+        Nodes are bucketed into square cells of width connection_radius, so only pairs in neighbouring cells are compared
+        and generation takes expected time proportional to the number of Nodes plus Edges.
+        The expected number of roads per Node is about number_nodes * pi * connection_radius^2 / side_length^2.
+        See output_network() for output_format.
+        '''
+        if connection_radius <= 0:
+            raise Exception("connection_radius must be positive.")
+
+        node_coordinates = [(self.rng.uniform(0, side_length), self.rng.uniform(0, side_length)) for node_ID in range(number_nodes)]
+        cell_to_node_IDs = collections.defaultdict(list)
+        for node_ID, (x, y) in enumerate(node_coordinates):
+            cell_to_node_IDs[(int(x // connection_radius), int(y // connection_radius))].append(node_ID)
+
+        edge_start_node_IDs = array('q')
+        edge_end_node_IDs = array('q')
+        edge_lengths = array('d')
+        squared_radius = connection_radius * connection_radius
+        for (cell_x, cell_y), node_IDs in cell_to_node_IDs.items():
+            # each pair of cells is visited once:  the cell itself, then the neighbours "after" it
+            for neighbour_cell in ((cell_x, cell_y), (cell_x + 1, cell_y - 1), (cell_x + 1, cell_y), (cell_x + 1, cell_y + 1), (cell_x, cell_y + 1)):
+                neighbour_node_IDs = cell_to_node_IDs.get(neighbour_cell)
+                if neighbour_node_IDs is None:
+                    continue
+                same_cell = neighbour_cell == (cell_x, cell_y)
+                for position, node_ID in enumerate(node_IDs):
+                    x, y = node_coordinates[node_ID]
+                    for neighbour_ID in (node_IDs[position + 1:] if same_cell else neighbour_node_IDs):
+                        neighbour_x, neighbour_y = node_coordinates[neighbour_ID]
+                        squared_distance = (x - neighbour_x) ** 2 + (y - neighbour_y) ** 2
+                        if squared_distance <= squared_radius:
+                            edge_length = max(math.sqrt(squared_distance), MINIMUM_EDGE_LENGTH)
+                            edge_start_node_IDs.extend((node_ID, neighbour_ID))
+                            edge_end_node_IDs.extend((neighbour_ID, node_ID))
+                            edge_lengths.extend((edge_length, edge_length))
+
+        return self.output_network(number_nodes, edge_start_node_IDs, edge_end_node_IDs, edge_lengths, output_format)
+
+
+    def get_edge_lengths(self, node_coordinates, edge_start_node_IDs, edge_end_node_IDs):
+        '''Returns the straight-line length of every Edge (at least MINIMUM_EDGE_LENGTH), given the (x, y) coordinates of every Node.
+        '''
+        return array('d', (max(math.dist(node_coordinates[start_node_ID], node_coordinates[end_node_ID]), MINIMUM_EDGE_LENGTH)
+                           for start_node_ID, end_node_ID in zip(edge_start_node_IDs, edge_end_node_IDs)))
 
 
 class GeneratorNode:
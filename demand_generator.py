@@ -0,0 +1,150 @@
+from simulation_random import create_seed
+
+import bisect
+import itertools
+import logging
+import math
+import random
+
+logger = logging.getLogger("Traffic_Simulator." + __name__)
+
+POISSON_CHUNK_MEAN = 500    # larger means are drawn as a sum of chunks, since exp(-mean) underflows beyond about 745
+DEMAND_ENTRY_KEYS = ("start_edge", "end_edge", "rate")
+
+
+def draw_poisson(rng, mean):
+    '''Returns a Poisson distributed number of arrivals with the given mean, drawn with rng (inversion, one random number per chunk).
+    Takes time proportional to mean, the same order as placing the resulting Cars.
+    '''
+    count = 0
+    while mean > 0:
+        chunk_mean = min(mean, POISSON_CHUNK_MEAN)
+        mean -= chunk_mean
+
+        uniform = rng.random()
+        probability = math.exp(-chunk_mean)    # P(k = 0)
+        cumulative_probability = probability
+        k = 0
+        while uniform > cumulative_probability and probability > 0:
+            k += 1
+            probability *= chunk_mean / k
+            cumulative_probability += probability
+        count += k
+    return count
+
+
+class DemandGenerator:
+    def __init__(self, demand_config, seed = None, first_car_ID = 0) -> None:
+        '''Generates trips (car dictionaries, as accepted by TrafficManager.add_car()) tick by tick from an origin-destination (OD) matrix,
+        so that only the Cars of the current tick exist before they are placed on the Network.
+        demand_config is a dictionary with:
+            "od_list":  list of OD entries {"start_edge", "end_edge", "rate"}, where rate is the mean number of trips per tick
+                from start_edge to end_edge.  Trips of each entry arrive as a Poisson process.  Any other keys of an entry
+                (ex: "car_type", "route_preference", "car_length", "end_pos_meter") are copied into each of its cars;
+                missing attributes are filled in from "DEFAULT_car_values_config.json" when the Car is added.
+            "time_of_day_profile":  (optional) list of rate multipliers, dividing each day into equal periods (ex: 24 hourly values).
+            "ticks_per_day":  (optional, required with time_of_day_profile) number of ticks in one day.
+        Cars start at position 0 of their start Edge and, unless their entry gives end_pos_meter, finish at the end of their end Edge.
+        Car IDs are assigned consecutively from first_car_ID;  TrafficManager.set_demand_generator() reserves them, so that Cars added
+        by other means cannot use them.
+        Attributes:
+            od_entries:  List of OD entries (dictionaries), in demand_config order.
+            cumulative_rates:  Running sum of the OD entry rates, used to pick the entry of each trip.
+            total_rate:  Sum of all OD entry rates (trips per tick, before the time-of-day multiplier).
+            time_of_day_profile:  List of rate multipliers per period of the day, or None (constant demand).
+            ticks_per_day:  Number of ticks in one day, or None.
+            next_car_ID:  ID given to the next generated car.
+            seed:  Seed of rng.
+            rng:  random.Random generator used for arrivals and OD entry choices;  the same seed always generates the same trips.
+        '''
+        self.od_entries = []
+        self.cumulative_rates = []
+        self.total_rate = 0
+        for entry in demand_config["od_list"]:
+            for key in DEMAND_ENTRY_KEYS:
+                if key not in entry:
+                    raise Exception("OD entry is missing '" + key + "'.")
+            if entry["rate"] < 0:
+                raise Exception("OD entry rates cannot be negative.")
+            self.od_entries.append(entry)
+            self.total_rate += entry["rate"]
+            self.cumulative_rates.append(self.total_rate)
+
+        self.time_of_day_profile = demand_config.get("time_of_day_profile")
+        self.ticks_per_day = demand_config.get("ticks_per_day")
+        if self.time_of_day_profile is not None:
+            if not self.time_of_day_profile or self.ticks_per_day is None or self.ticks_per_day <= 0:
+                raise Exception("A time_of_day_profile requires a non-empty list of multipliers and a positive ticks_per_day.")
+
+        self.next_car_ID = first_car_ID
+        self.set_seed(seed)
+
+
+    def set_seed(self, seed = None):
+        '''Resets rng to seed (drawn from the operating system if None).
+        '''
+        if seed is None:
+            seed = create_seed()
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+    def get_seed(self):
+        '''Returns the seed of rng.
+        '''
+        return self.seed
+
+    def get_od_entries(self):
+        '''Returns the list of OD entries (dictionaries), in demand_config order.
+        '''
+        return self.od_entries
+
+    def get_next_car_ID(self):
+        '''Returns the ID that will be given to the next generated car.
+        '''
+        return self.next_car_ID
+
+    def get_rate_multiplier(self, tick):
+        '''Returns the time-of-day multiplier applied to every OD entry rate on tick (1 without a time_of_day_profile).
+        '''
+        if self.time_of_day_profile is None:
+            return 1
+        time_of_day = tick % self.ticks_per_day
+        return self.time_of_day_profile[time_of_day * len(self.time_of_day_profile) // self.ticks_per_day]
+
+    def get_expected_trips(self, tick):
+        '''Returns the mean number of trips generated on tick.
+        '''
+        return self.total_rate * self.get_rate_multiplier(tick)
+
+
+    def get_cars(self, tick, edge_ID_to_edge = None):
+        '''Returns the list of car dictionaries departing on tick.
+        The number of trips is drawn once for the whole OD matrix (a Poisson process is the sum of its entries' processes),
+        and each trip picks its OD entry in proportion to the entry rates, so the time taken is proportional to the number of trips,
+        not to the number of OD entries.
+        edge_ID_to_edge (Edge ID to Edge object) is used for the end_pos_meter of entries that do not give one.
+        '''
+        number_trips = draw_poisson(self.rng, self.get_expected_trips(tick))
+        cars = []
+        for _ in range(number_trips):
+            entry_index = bisect.bisect_right(self.cumulative_rates, self.rng.random() * self.total_rate)
+            entry = self.od_entries[min(entry_index, len(self.od_entries) - 1)]    # guards against rounding up to total_rate
+            car = {key: value for key, value in entry.items() if key != "rate"}
+            car["id"] = self.next_car_ID
+            self.next_car_ID += 1
+            car.setdefault("start_pos_meter", 0)
+            if "end_pos_meter" not in car:
+                if edge_ID_to_edge is None or entry["end_edge"] not in edge_ID_to_edge:
+                    raise Exception("The end_pos_meter of this OD entry is unknown;  give end_pos_meter or edge_ID_to_edge.")
+                car["end_pos_meter"] = edge_ID_to_edge[entry["end_edge"]].get_length()
+            cars.append(car)
+
+        logger.debug("Tick %s:  %s trips generated", tick, number_trips)
+        return cars
+
+    def iterate_cars(self, first_tick = 1, last_tick = None, edge_ID_to_edge = None):
+        '''Lazily yields (tick, list of car dictionaries) for every tick from first_tick to last_tick (forever if None), as get_cars().
+        '''
+        ticks = itertools.count(first_tick) if last_tick is None else range(first_tick, last_tick + 1)
+        for tick in ticks:
+            yield tick, self.get_cars(tick, edge_ID_to_edge)
@@ -0,0 +1,108 @@
+import collections
+import heapq
+import itertools
+
+class EventTickEngine:
+    def __init__(self, Network_reference) -> None:
+        '''Event-driven replacement for the repeated Network.tick() passes of TrafficManager.tick(), selected with TrafficManager(tick_engine = 'event').
+        A tick first lets every active Edge tick once (waiting Cars enter, every Car advances as far as it can).
+        Node crossings are then processed from a priority queue of exit events, one per Edge whose head Car has reached the Edge end,
+        ordered by the fraction of its tick that Car used to get there (earliest first).  After a crossing only the two Edges involved
+        are updated:  the Cars that were held back by the crossing Car advance until the first Car that cannot move further,
+        and the crossing Car advances along its new Edge.  Each Car is therefore only revisited when a Car ahead of it leaves,
+        rather than once per pass over the whole Network.
+        Attributes:
+            Network_pointer:  Network this engine ticks.
+            exit_events:  Heap of (tick fraction used, sequence number, Edge ID, head Car ID) for the current tick.
+            sequence_counter:  Tie-breaker keeping events with equal tick fractions in scheduling order.
+            edge_ID_to_scheduled_car_ID:  Dictionary mapping the IDs of Edges with a queued exit event to the ID of their head Car.
+            edge_ID_to_blocked_edges:  Dictionary mapping the ID of a full Edge to the Edges whose head Car is waiting to enter it.
+                Those head Cars are queued again as soon as the full Edge loses a Car.
+        '''
+        self.Network_pointer = Network_reference
+        self.exit_events = []
+        self.sequence_counter = itertools.count()
+        self.edge_ID_to_scheduled_car_ID = {}
+        self.edge_ID_to_blocked_edges = collections.defaultdict(list)
+
+
+    def tick(self):
+        '''Advances the Network by one global tick.
+        Returns [expended, max] energy and the number of exit events processed.
+        '''
+        network = self.Network_pointer
+        expended_energy = 0                       # work actually done
+        sum_maximum_expendible_energy = 0         # maximum work possible
+        number_events = 0
+        self.exit_events = []
+        self.edge_ID_to_scheduled_car_ID = {}
+        self.edge_ID_to_blocked_edges = collections.defaultdict(list)
+
+        # every active Edge ticks once, in random order so that no Edge is favored
+        edge_keys = list(network.active_edge_ID_to_edge.keys())
+        network.shuffle_rng.shuffle(edge_keys)
+        for edge_ID in edge_keys:
+            edge_tick_outputs = network.edge_ID_to_edge[edge_ID].tick()
+            expended_energy += edge_tick_outputs[0]
+            sum_maximum_expendible_energy += edge_tick_outputs[1]
+        for edge_ID in edge_keys:
+            self.schedule_exit_event(network.edge_ID_to_edge[edge_ID])
+
+        while self.exit_events:
+            tick_fraction, sequence_number, edge_ID, car_ID = heapq.heappop(self.exit_events)
+            if self.edge_ID_to_scheduled_car_ID.get(edge_ID) != car_ID:
+                continue    # superseded
+            del self.edge_ID_to_scheduled_car_ID[edge_ID]
+            edge = network.edge_ID_to_edge[edge_ID]
+            number_events += 1
+
+            node = edge.get_end_node()
+            next_edge = node.cross_car(edge.pop_head_car())
+            if next_edge is None:
+                head_car = edge.get_head_car()
+                if head_car.get_current_tick_potential() >= node.get_intersection_time_cost():
+                    # next Edge is full:  try again once it loses a Car
+                    self.edge_ID_to_blocked_edges[head_car.get_path()[0]].append(edge)
+                continue
+
+            # Cars held back by the crossing Car move up;  the crossing Car moves along its new Edge
+            expended_energy += edge.advance_unblocked_cars()
+            expended_energy += next_edge.advance_arriving_cars()
+
+            for changed_edge in (edge, next_edge):
+                if network.check_invariants:
+                    changed_edge.check_car_order()
+                if len(changed_edge.get_current_cars()) < changed_edge.get_max_capacity():
+                    # room on the Edge:  waiting Cars enter, and head Cars held back by the full Edge try again
+                    if changed_edge.waiting_cars:
+                        entry_outputs = changed_edge.enter_waiting_cars()
+                        expended_energy += entry_outputs[0]
+                        sum_maximum_expendible_energy += entry_outputs[1]
+                    for blocked_edge in self.edge_ID_to_blocked_edges.pop(changed_edge.get_edge_ID(), []):
+                        self.schedule_exit_event(blocked_edge)
+                self.schedule_exit_event(changed_edge)
+
+        return expended_energy, sum_maximum_expendible_energy, number_events
+
+
+    def schedule_exit_event(self, edge):
+        '''Queues an exit event for edge if its head Car is at the end of the Edge and not already queued.
+        '''
+        head_car = edge.get_head_car()
+        if head_car is None or head_car.get_current_pos_meter_car_front() != edge.get_length() or not head_car.get_path():
+            return      # no Car at the end of the Edge, or it is at the exit of its end Edge
+        if not edge.get_end_node().is_inbound_edge_open(edge.get_edge_ID()):
+            return      # red light:  the head Car cannot cross for the rest of the tick
+        edge_ID = edge.get_edge_ID()
+        car_ID = head_car.get_car_ID()
+        if self.edge_ID_to_scheduled_car_ID.get(edge_ID) == car_ID:
+            return
+
+        head_car.refresh_tick_potential(self.Network_pointer.global_tick)
+        max_tick_potential = head_car.get_max_tick_potential()
+        if max_tick_potential > 0:
+            tick_fraction = 1 - head_car.get_current_tick_potential() / max_tick_potential
+        else:
+            tick_fraction = 1
+        self.edge_ID_to_scheduled_car_ID[edge_ID] = car_ID
+        heapq.heappush(self.exit_events, (tick_fraction, next(self.sequence_counter), edge_ID, car_ID))
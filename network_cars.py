@@ -1,7 +1,27 @@
-import copy
 from cmath import inf
 
 class Car:
+    # fixed attribute layout (no per-instance __dict__):  keeps memory low when millions of Cars are simulated
+    __slots__ = ("id",
+                 "car_length",
+                 "start_edge",
+                 "start_pos_meter",
+                 "end_edge",
+                 "end_pos_meter",
+                 "car_type",
+                 "route_preference",
+                 "path",
+                 "mobile",
+                 "route_status",
+                 "current_edge",
+                 "current_pos_meter_car_front",
+                 "max_tick_potential",
+                 "current_tick_potential",
+                 "potential_refresh_tick")
+
+    # attributes reported by get_snapshot() (potential_refresh_tick is internal bookkeeping)
+    snapshot_attributes = __slots__[:-1]
+
     def __init__(self, 
                  car_ID,
                  car_length,
@@ -25,6 +45,7 @@ class Car:
             path:  Ordered list of Edges that the Car will traverse to get from start to end.
             route_preference:  Classification determining which type of path will be followed:
                 if 'Fastest': chooses path with minimum total travel time (assuming no congestion).
+                if 'Fastest_now': chooses path with minimum travel time given current congestion (see Edge.update_travel_time_estimate()).
                 if 'Shortest': chooses path with shortest total distance in terms of length.
                 if 'Random':  pays no heed to metics and instead chooses an available path at random.
             car_type:  Car classification for path-following:
@@ -42,6 +63,8 @@ class Car:
             current_pos_meter_car_front:  Unit distance along current_edge corresponding to the Car's current location.  If car_length > 0, this refers to the position of the front of the Car.
             max_tick_potential:  Proportion of global maximum tick time-distance that the Car is eligible to move (default = 1, full potential).
             current_tick_potential:  Portion of tick time-distance that the car has not (yet) utilized on this tick.
+                Only valid once refreshed on the current tick (see refresh_tick_potential()).
+            potential_refresh_tick:  Network global tick on which current_tick_potential was last restored to max_tick_potential.
             '''
         # immutable attributes
         self.id = car_ID
@@ -62,7 +85,8 @@ class Car:
         self.current_edge = None
         self.current_pos_meter_car_front = None 
         self.max_tick_potential = max_tick_potential
-        self.current_tick_potential = copy.deepcopy(self.max_tick_potential)    # only for initialization
+        self.current_tick_potential = self.max_tick_potential    # only for initialization (numbers are immutable, no copy needed)
+        self.potential_refresh_tick = None
 
 
     def tick(self, old_potential):
@@ -71,10 +95,23 @@ class Car:
         '''
         return old_potential - self.current_tick_potential
 
+    def refresh_tick_potential(self, global_tick):
+        '''Restores current_tick_potential to max_tick_potential, unless this already happened on global_tick.
+        Replaces a pass over every Car at the end of each tick:  a Car is only refreshed when it is about to be moved.
+        '''
+        if self.potential_refresh_tick != global_tick:
+            self.current_tick_potential = self.max_tick_potential
+            self.potential_refresh_tick = global_tick
+
     def get_snapshot(self):
         '''Outputs dictionary of Car attributes.
+        The path is copied, as it keeps changing while the Car moves.
+        Snapshots are taken between ticks, when every Car's potential is restored, so current_tick_potential is reported as max_tick_potential.
         '''
-        return self.__dict__
+        raw = {attribute: getattr(self, attribute) for attribute in Car.snapshot_attributes}
+        raw["path"] = list(self.path)
+        raw["current_tick_potential"] = self.max_tick_potential
+        return raw
 
     def get_car_ID(self):
         '''Returns self.id.
@@ -155,7 +192,7 @@ class Car:
     
     def get_route_metric(self):
         '''Returns self.route_preference.  Used when a Car's path needs to be (re)calculated.
-        Value is "Shortest", "Fastest", "Random", with "Random" being the default value if none specified.
+        Value is "Shortest", "Fastest", "Fastest_now", "Random", with "Random" being the default value if none specified.
         Used when calling value from outside the Car class.
         '''
         return self.route_preference
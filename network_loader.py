@@ -0,0 +1,296 @@
+from array import array
+from cmath import inf
+import copy
+import gc
+import json
+import logging
+import os
+import struct
+import sys
+
+logger = logging.getLogger("Traffic_Simulator." + __name__)
+
+# DEFAULT_*.json files are found relative to this module, so Networks can be created from any working directory.
+CONFIG_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "configs")
+DEFAULT_CONFIG_FILE_NAMES = {"edge": "DEFAULT_edge_values_config.json",
+                             "node": "DEFAULT_node_values_config.json",
+                             "car": "DEFAULT_car_values_config.json"}
+default_config_cache = {}      # parsed default configs (None if missing), read once per process
+
+# Binary network file layout (little-endian):
+#   FILE_MAGIC, FILE_HEADER (byte length of the JSON header), JSON header, zero padding to a multiple of 8 bytes,
+#   then one column per entry of header["columns"] ([name, typecode, length]), each padded to a multiple of 8 bytes.
+# A float64 column that also holds integers is followed by a "<name>_is_integer" column of int8 flags (1 where the value is an integer).
+# A column holding None values (stored as 0) is followed by a "<name>_is_none" column of int8 flags (1 where the value is None).
+# The JSON header holds the Node and Edge IDs when they are not integers, and every Node's stoplight_pattern that is not None.
+FILE_MAGIC = b"TSNETv1\0"
+FILE_HEADER = struct.Struct("<q")
+NODE_COLUMNS = ("intersection_time_cost", "stoplight_duration", "stoplight_delay")
+EDGE_COLUMNS = ("edge_length", "max_speed", "max_capacity")
+
+
+def load_default_config(config_name):
+    '''Returns a copy of the default values for config_name ('edge', 'node', or 'car'), read from configs/DEFAULT_<config_name>_values_config.json,
+    or None if the file is missing.  Each file is parsed once per process;  the copy may be adjusted freely by its Network.
+    '''
+    if config_name not in default_config_cache:
+        try:
+            with open(os.path.join(CONFIG_DIRECTORY, DEFAULT_CONFIG_FILE_NAMES[config_name])) as default_file:
+                default_config_cache[config_name] = json.load(default_file)
+        except (OSError, ValueError):
+            default_config_cache[config_name] = None
+    return copy.deepcopy(default_config_cache[config_name])
+
+
+def pause_garbage_collection():
+    '''Disables the cyclic garbage collector while millions of objects are created (it would otherwise rescan them over and over).
+    Returns whether it was enabled, to be passed to resume_garbage_collection().
+    '''
+    was_enabled = gc.isenabled()
+    gc.disable()
+    return was_enabled
+
+
+def resume_garbage_collection(was_enabled):
+    '''Re-enables the cyclic garbage collector if it was enabled before pause_garbage_collection().
+    '''
+    if was_enabled:
+        gc.enable()
+
+
+class NetworkIndex:
+    def __init__(self, node_IDs, edge_IDs, edge_start_node_indices, edge_end_node_indices, node_columns, edge_columns, node_index_to_stoplight_pattern) -> None:
+        '''Compact form of a network config:  Node and Edge IDs are interned into dense integer indices (their position in the config),
+        attributes are stored column by column with defaults already filled in, and adjacency is held in compressed sparse row (CSR) arrays.
+        Network() accepts a NetworkIndex in place of a config dictionary, and loads it without per-field lookups.
+        Build one with build_network_index(), or read one with read_network_file().
+        Attributes:
+            node_IDs:  List mapping Node indices to Node IDs.
+            node_ID_to_index:  Dictionary mapping Node IDs to Node indices.
+            edge_IDs:  List mapping Edge indices to Edge IDs.
+            edge_ID_to_index:  Dictionary mapping Edge IDs to Edge indices.
+            edge_start_node_indices, edge_end_node_indices:  Index of every Edge's start and end Node.
+            node_columns:  Dictionary mapping each name in NODE_COLUMNS to the list of that value for every Node.
+            edge_columns:  Dictionary mapping each name in EDGE_COLUMNS to the list of that value for every Edge.
+            node_index_to_stoplight_pattern:  Dictionary mapping Node indices to stoplight patterns, for Nodes that have one.
+            outbound_offsets, outbound_edge_indices:  CSR adjacency;  the outbound Edges of Node index i are
+                outbound_edge_indices[outbound_offsets[i]:outbound_offsets[i + 1]], in config order.
+            inbound_offsets, inbound_edge_indices:  Same as above, for inbound Edges.
+        '''
+        self.node_IDs = node_IDs
+        self.node_ID_to_index = {node_ID: node_index for node_index, node_ID in enumerate(node_IDs)}
+        if len(self.node_ID_to_index) != len(node_IDs):
+            raise Exception("There is already a Node with this ID")
+        self.edge_IDs = edge_IDs
+        self.edge_ID_to_index = {edge_ID: edge_index for edge_index, edge_ID in enumerate(edge_IDs)}
+        if len(self.edge_ID_to_index) != len(edge_IDs):
+            raise Exception("There is already an Edge with this ID")
+
+        self.edge_start_node_indices = edge_start_node_indices
+        self.edge_end_node_indices = edge_end_node_indices
+        self.node_columns = node_columns
+        self.edge_columns = edge_columns
+        self.node_index_to_stoplight_pattern = node_index_to_stoplight_pattern
+
+        self.outbound_offsets, self.outbound_edge_indices = self.build_adjacency(edge_start_node_indices)
+        self.inbound_offsets, self.inbound_edge_indices = self.build_adjacency(edge_end_node_indices)
+
+
+    def build_adjacency(self, edge_node_indices):
+        '''Groups Edge indices by Node index (counting sort, keeping config order within each Node).
+        Returns the CSR (offsets, edge_indices) arrays.
+        '''
+        number_nodes = len(self.node_IDs)
+        offsets = [0] * (number_nodes + 1)
+        for node_index in edge_node_indices:
+            offsets[node_index + 1] += 1
+        for node_index in range(number_nodes):
+            offsets[node_index + 1] += offsets[node_index]
+
+        next_position = offsets[:-1]
+        edge_indices = [0] * len(edge_node_indices)
+        for edge_index, node_index in enumerate(edge_node_indices):
+            edge_indices[next_position[node_index]] = edge_index
+            next_position[node_index] += 1
+        return array('q', offsets), array('q', edge_indices)
+
+
+    def get_outbound_edge_indices(self, node_index):
+        '''Returns the indices of the Edges leaving Node index node_index.
+        '''
+        return self.outbound_edge_indices[self.outbound_offsets[node_index]:self.outbound_offsets[node_index + 1]]
+
+    def get_inbound_edge_indices(self, node_index):
+        '''Returns the indices of the Edges arriving at Node index node_index.
+        '''
+        return self.inbound_edge_indices[self.inbound_offsets[node_index]:self.inbound_offsets[node_index + 1]]
+
+    def get_number_nodes(self):
+        '''Returns the number of Nodes.
+        '''
+        return len(self.node_IDs)
+
+    def get_number_edges(self):
+        '''Returns the number of Edges.
+        '''
+        return len(self.edge_IDs)
+
+
+def build_network_index(config, node_default_config = None, edge_default_config = None):
+    '''Returns the NetworkIndex of config (dictionary with "node_list" and "edge_list", as accepted by Network()).
+    Attributes missing from a Node or Edge are filled in from node_default_config and edge_default_config
+    (the DEFAULT_*.json files if not given).
+    '''
+    if node_default_config is None:
+        node_default_config = load_default_config("node") or {}
+    if edge_default_config is None:
+        edge_default_config = load_default_config("edge") or {}
+    default_max_capacity = edge_default_config.get("max_capacity")
+    if default_max_capacity == 'Infinity':
+        default_max_capacity = inf
+
+    was_enabled = pause_garbage_collection()
+    try:
+        node_list = config["node_list"]
+        node_IDs = [node["id"] for node in node_list]
+        node_columns = {}
+        for column_name in NODE_COLUMNS:
+            default_value = node_default_config.get(column_name)
+            node_columns[column_name] = [node.get(column_name, default_value) for node in node_list]
+        node_index_to_stoplight_pattern = {}
+        for node_index, node in enumerate(node_list):
+            if node.get("stoplight_pattern") is not None:
+                node_index_to_stoplight_pattern[node_index] = node["stoplight_pattern"]
+
+        edge_list = config["edge_list"]
+        edge_IDs = [edge["id"] for edge in edge_list]
+        edge_columns = {}
+        edge_columns["edge_length"] = [edge.get("edge_length", edge_default_config.get("edge_length")) for edge in edge_list]
+        edge_columns["max_speed"] = [edge.get("max_speed", edge_default_config.get("max_speed")) for edge in edge_list]
+        edge_columns["max_capacity"] = [edge.get("max_capacity", default_max_capacity) for edge in edge_list]
+
+        node_ID_to_index = {node_ID: node_index for node_index, node_ID in enumerate(node_IDs)}
+        try:
+            edge_start_node_indices = [node_ID_to_index[edge["start_node_id"]] for edge in edge_list]
+        except KeyError:
+            raise Exception("Start Node ID is not part of the network.")
+        try:
+            edge_end_node_indices = [node_ID_to_index[edge["end_node_id"]] for edge in edge_list]
+        except KeyError:
+            raise Exception("End Node ID is not part of the network.")
+
+        return NetworkIndex(node_IDs, edge_IDs, edge_start_node_indices, edge_end_node_indices,
+                            node_columns, edge_columns, node_index_to_stoplight_pattern)
+    finally:
+        resume_garbage_collection(was_enabled)
+
+
+def get_column_typecode(values):
+    '''Returns the array typecode used to store values:  'q' (int64) if they are all integers, otherwise 'd' (float64).
+    '''
+    if all(type(value) is int for value in values):
+        return 'q'
+    return 'd'
+
+
+def write_network_file(network_index, file_path):
+    '''Writes network_index to file_path in the binary network format (see FILE_MAGIC), which read_network_file() loads
+    much faster than JSON.  Columns of integers are stored as int64 and all other columns as float64;  integers in a float64 column
+    (ex:  max_capacity 5 next to an Infinity default) and None values (optional attributes set to null) are flagged,
+    so every value is read back as it was.  Any other non-numeric value raises an Exception naming its column and Node or Edge.
+    '''
+    columns = []
+    header = {"number_nodes": network_index.get_number_nodes(), "number_edges": network_index.get_number_edges()}
+    for ID_name, IDs in (("node_IDs", network_index.node_IDs), ("edge_IDs", network_index.edge_IDs)):
+        if get_column_typecode(IDs) == 'q':
+            columns.append((ID_name, IDs))
+            header[ID_name] = None
+        else:
+            header[ID_name] = IDs
+    columns.append(("edge_start_node_indices", network_index.edge_start_node_indices))
+    columns.append(("edge_end_node_indices", network_index.edge_end_node_indices))
+    for column_name in NODE_COLUMNS:
+        columns.append(("node_" + column_name, network_index.node_columns[column_name]))
+    for column_name in EDGE_COLUMNS:
+        columns.append(("edge_" + column_name, network_index.edge_columns[column_name]))
+    header["stoplight_patterns"] = [[node_index, pattern] for node_index, pattern in network_index.node_index_to_stoplight_pattern.items()]
+
+    encoded_columns = []
+    header["columns"] = []
+    for column_name, values in columns:
+        none_flags = array('b', (value is None for value in values))
+        if any(none_flags):
+            values = [0 if value is None else value for value in values]
+        for value_index, value in enumerate(values):
+            if not isinstance(value, (int, float)):
+                item_IDs = network_index.node_IDs if column_name.startswith("node_") else network_index.edge_IDs
+                raise Exception("Column " + column_name + " of " + ("Node " if column_name.startswith("node_") else "Edge ")
+                                + repr(item_IDs[value_index]) + " holds " + repr(value) + ", which the binary network format cannot store.")
+
+        typecode = get_column_typecode(values)
+        encoded_columns.append(array(typecode, values))
+        header["columns"].append([column_name, typecode, len(values)])
+        if typecode == 'd':
+            integer_flags = array('b', (type(value) is int for value in values))
+            if any(integer_flags):
+                encoded_columns.append(integer_flags)
+                header["columns"].append([column_name + "_is_integer", 'b', len(values)])
+        if any(none_flags):
+            encoded_columns.append(none_flags)
+            header["columns"].append([column_name + "_is_none", 'b', len(values)])
+
+    encoded_header = json.dumps(header).encode()
+    encoded_header += b" " * (-(len(FILE_MAGIC) + FILE_HEADER.size + len(encoded_header)) % 8)
+    with open(file_path, 'wb') as network_file:
+        network_file.write(FILE_MAGIC)
+        network_file.write(FILE_HEADER.pack(len(encoded_header)))
+        network_file.write(encoded_header)
+        for column in encoded_columns:
+            if sys.byteorder == 'big':
+                column.byteswap()
+            network_file.write(column.tobytes())
+            network_file.write(bytes(-len(column) * column.itemsize % 8))
+
+
+def read_network_file(file_path):
+    '''Reads a network from file_path:  a binary network file (see write_network_file()) is returned as a NetworkIndex,
+    and a JSON network config as a dictionary.  Either can be passed to TrafficManager() / Network().
+    '''
+    with open(file_path, 'rb') as network_file:
+        if network_file.read(len(FILE_MAGIC)) != FILE_MAGIC:
+            network_file.seek(0)
+            was_enabled = pause_garbage_collection()
+            try:
+                return json.load(network_file)
+            finally:
+                resume_garbage_collection(was_enabled)
+
+        header = json.loads(network_file.read(FILE_HEADER.unpack(network_file.read(FILE_HEADER.size))[0]))
+        columns = {}
+        for column_name, typecode, length in header["columns"]:
+            column = array(typecode)
+            column.frombytes(network_file.read(length * column.itemsize))
+            if sys.byteorder == 'big':
+                column.byteswap()
+            network_file.read(-length * column.itemsize % 8)
+            columns[column_name] = column.tolist()
+
+    for column_name, typecode, length in header["columns"]:
+        if column_name.endswith("_is_integer"):
+            values = columns[column_name[:-len("_is_integer")]]
+            for value_index, is_integer in enumerate(columns[column_name]):
+                if is_integer:
+                    values[value_index] = int(values[value_index])
+        elif column_name.endswith("_is_none"):
+            values = columns[column_name[:-len("_is_none")]]
+            for value_index, is_none in enumerate(columns[column_name]):
+                if is_none:
+                    values[value_index] = None
+
+    node_IDs = header["node_IDs"] if header["node_IDs"] is not None else columns["node_IDs"]
+    edge_IDs = header["edge_IDs"] if header["edge_IDs"] is not None else columns["edge_IDs"]
+    node_columns = {column_name: columns["node_" + column_name] for column_name in NODE_COLUMNS}
+    edge_columns = {column_name: columns["edge_" + column_name] for column_name in EDGE_COLUMNS}
+    node_index_to_stoplight_pattern = {node_index: pattern for node_index, pattern in header["stoplight_patterns"]}
+    return NetworkIndex(node_IDs, edge_IDs, columns["edge_start_node_indices"], columns["edge_end_node_indices"],
+                        node_columns, edge_columns, node_index_to_stoplight_pattern)
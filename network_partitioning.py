@@ -0,0 +1,402 @@
+from Traffic import TickResult
+from traffic_network import Network
+
+import collections
+import multiprocessing
+import random
+from cmath import inf
+
+class NetworkPartitioner:
+    def __init__(self, seed = 0) -> None:
+        '''Splits a network config into connected regions of (nearly) equal Node count for partitioned execution.
+        Attributes:
+            seed:  Seed for choosing where the first region starts;  the same seed always gives the same partitions.
+        '''
+        self.seed = seed
+
+
+    def partition_nodes(self, network_config, number_partitions):
+        '''Returns a dictionary mapping every Node ID in network_config to a partition index in range(number_partitions).
+        Regions are grown one at a time by breadth-first search over the (undirected) Edges, starting each new region
+        next to the regions already built, so that regions stay compact and few Edges cross between them.
+        '''
+        node_IDs = sorted(node["id"] for node in network_config["node_list"])
+        node_ID_to_neighbour_IDs = collections.defaultdict(set)
+        for edge in network_config["edge_list"]:
+            node_ID_to_neighbour_IDs[edge["start_node_id"]].add(edge["end_node_id"])
+            node_ID_to_neighbour_IDs[edge["end_node_id"]].add(edge["start_node_id"])
+
+        rng = random.Random(self.seed)
+        node_ID_to_partition = {}
+        unassigned_node_IDs = set(node_IDs)
+        for partition in range(number_partitions):
+            region_size = round(len(unassigned_node_IDs) / (number_partitions - partition))
+            region = []
+            queue = collections.deque()
+            while len(region) < region_size and unassigned_node_IDs:
+                if not queue:
+                    queue.append(self.choose_region_start(node_ID_to_partition, unassigned_node_IDs, node_ID_to_neighbour_IDs, rng))
+                node_ID = queue.popleft()
+                if node_ID not in unassigned_node_IDs:
+                    continue
+                unassigned_node_IDs.remove(node_ID)
+                node_ID_to_partition[node_ID] = partition
+                region.append(node_ID)
+                for neighbour_ID in sorted(node_ID_to_neighbour_IDs[node_ID], key=repr):
+                    if neighbour_ID in unassigned_node_IDs:
+                        queue.append(neighbour_ID)
+        return node_ID_to_partition
+
+
+    def choose_region_start(self, node_ID_to_partition, unassigned_node_IDs, node_ID_to_neighbour_IDs, rng):
+        '''Returns the unassigned Node with the most already-assigned neighbours (a random Node for the first region).
+        '''
+        candidate_node_IDs = sorted(unassigned_node_IDs, key=repr)
+        if not node_ID_to_partition:
+            return rng.choice(candidate_node_IDs)
+        return max(candidate_node_IDs,
+                   key=lambda node_ID: sum(neighbour_ID in node_ID_to_partition for neighbour_ID in node_ID_to_neighbour_IDs[node_ID]))
+
+
+class PartitionWorker:
+    def __init__(self, network_config, partition_ID, node_ID_to_partition, seed = 0) -> None:
+        '''Runs the Nodes and Edges of one partition inside a worker process (see PartitionedTrafficManager).
+        Every worker holds the whole Network topology (for routing), but only the Cars currently on its own Edges.
+        An Edge belongs to the partition of its end Node, so every Node's inbound Edges are local and Node crossings
+        are decided locally;  a Car crossing onto an Edge of another partition is sent to that partition.
+        Attributes:
+            graph:  Network holding this partition's Cars.
+            partition_ID:  Index of this partition.
+            edge_ID_to_partition:  Dictionary mapping every Edge ID to the partition it belongs to.
+            owned_boundary_edge_IDs:  IDs of this partition's capacity-limited Edges that start at another partition's Node.
+                Their number of Cars is reported after every pass, so that the other partition can respect their capacity.
+            pending_crossings:  Cars that crossed onto one of this partition's Edges during the current pass (from this partition
+                or another one).  They are placed on their Edges at the start of the next pass.
+        '''
+        self.graph = Network(None, network_config, seed = seed)    # seed only used for 'Random' routes
+        self.graph.car_keyed_random_routes = True     # the same route for a Car whichever worker draws it
+        self.graph.track_changes = False     # snapshot deltas are not exported from workers
+        self.graph.start_tick()     # the first tick is global tick 1, as in TrafficManager (stoplights depend on it)
+        self.partition_ID = partition_ID
+        self.edge_ID_to_partition = {}
+        self.owned_boundary_edge_IDs = []
+        for edge_ID, edge in self.graph.edge_ID_to_edge.items():
+            self.edge_ID_to_partition[edge_ID] = node_ID_to_partition[edge.get_end_node_id()]
+            if (self.edge_ID_to_partition[edge_ID] == partition_ID
+                    and node_ID_to_partition[edge.get_start_node_id()] != partition_ID
+                    and edge.get_max_capacity() != inf):
+                self.owned_boundary_edge_IDs.append(edge_ID)
+        self.pending_crossings = []
+
+
+    def add_cars(self, car_list):
+        '''Places the given Car dictionaries (all starting on this partition's Edges) on their Edges' waiting queues.
+        '''
+        self.graph.add_cars(car_list)
+
+
+    def run_crossings(self, edge_ID_to_occupancy):
+        '''Runs the first half of a pass over this partition:
+            1. Cars that crossed onto this partition's Edges during the previous pass are placed behind the Cars on those Edges.
+            2. Every Node decides which head Cars (at the end of its inbound Edges) cross, highest remaining potential first.
+               Each outbound Edge accepts as many Cars as it had room for at the start of the pass (after step 1),
+               whichever Node is processed first.
+        Step 2 only depends on the state at the start of the step, so results do not depend on the processing order
+        (nor on how the Network is partitioned).  edge_ID_to_occupancy gives the number of Cars, at the start of this pass,
+        on capacity-limited Edges of other partitions that start at this partition's Nodes.
+        Returns the number of crossings and the crossing Cars to send to each other partition (see run_edge_ticks()).
+        '''
+        number_crossings = 0
+        partition_to_outbound_cars = collections.defaultdict(list)
+
+        # 1. place crossing Cars
+        for car in self.pending_crossings:
+            self.graph.car_ID_to_car[car.get_car_ID()] = car
+            self.graph.edge_ID_to_edge[car.get_current_edge()].append_tail_car(car)
+        self.pending_crossings = []
+
+        # 2. Node crossings:  the room on every capacity-limited Edge is taken before any Node pops a Car
+        edge_ID_to_room = {}
+        for edge_ID, number_cars in edge_ID_to_occupancy.items():
+            edge_ID_to_room[edge_ID] = self.graph.edge_ID_to_edge[edge_ID].get_max_capacity() - number_cars
+        for edge_ID, edge in self.graph.active_edge_ID_to_edge.items():
+            if edge.get_max_capacity() != inf:
+                edge_ID_to_room[edge_ID] = edge.get_max_capacity() - len(edge.get_current_cars())
+
+        node_IDs = sorted({edge.get_end_node_id() for edge in self.graph.active_edge_ID_to_edge.values()}, key=repr)
+        for node_ID in node_IDs:
+            node = self.graph.node_ID_to_node[node_ID]
+            if node.is_all_red():
+                continue    # no Car can cross this Node for the rest of the tick
+            intersection_crossing_cost = node.get_intersection_time_cost()
+            open_edge_IDs = node.get_open_inbound_edge_IDs()
+            candidates = []
+            for inbound_edge in node.active_inbound_edge_ID_to_edge.values():
+                if open_edge_IDs is not None and inbound_edge.get_edge_ID() not in open_edge_IDs:
+                    continue    # red light
+                head_car = inbound_edge.get_head_car()
+                if head_car is not None and head_car.get_current_pos_meter_car_front() == inbound_edge.get_length() and head_car.get_path():
+                    head_car.refresh_tick_potential(self.graph.global_tick)
+                    candidates.append((-head_car.get_current_tick_potential(), repr(inbound_edge.get_edge_ID()), inbound_edge))
+            candidates.sort(key=lambda candidate: candidate[:2])    # cars with the highest potential left move first
+            node.recalculate_car_paths([inbound_edge.get_head_car() for negative_potential, sort_key, inbound_edge in candidates
+                                        if inbound_edge.get_head_car().get_car_type() == 'Dynamic' and -negative_potential >= intersection_crossing_cost])
+
+            for negative_potential, sort_key, inbound_edge in candidates:
+                car = inbound_edge.get_head_car()
+                remaining_potential = car.get_current_tick_potential()
+                if remaining_potential < intersection_crossing_cost:
+                    continue
+                next_edge_ID = car.get_path()[0]
+                if next_edge_ID not in edge_ID_to_room:
+                    # infinite capacity, or a local Edge without Cars at the start of the pass
+                    edge_ID_to_room[next_edge_ID] = self.graph.edge_ID_to_edge[next_edge_ID].get_max_capacity()
+                if edge_ID_to_room[next_edge_ID] <= 0:
+                    continue    # next Edge is full;  the Car stays at the head of its Edge
+
+                # cross onto the next Edge at position 0
+                edge_ID_to_room[next_edge_ID] -= 1
+                inbound_edge.pop_head_car()
+                car.set_current_edge(next_edge_ID)
+                car.set_current_pos_meter_car_front(0)
+                car.set_current_tick_potential(remaining_potential - intersection_crossing_cost)
+                car.get_path().pop(0)      # remove current edge from upcoming path
+                number_crossings += 1
+
+                next_partition = self.edge_ID_to_partition[next_edge_ID]
+                if next_partition == self.partition_ID:
+                    self.pending_crossings.append(car)
+                else:
+                    del self.graph.car_ID_to_car[car.get_car_ID()]
+                    partition_to_outbound_cars[next_partition].append(car)
+
+        return number_crossings, dict(partition_to_outbound_cars)
+
+
+    def run_edge_ticks(self, inbound_cars):
+        '''Runs the second half of a pass over this partition:
+            3. Every active Edge ticks:  waiting Cars enter and Cars advance.
+        inbound_cars (Cars that crossed onto this partition's Edges from other partitions during this pass) join pending_crossings.
+        Pending crossings count against the capacity of their Edge, so waiting Cars only enter an Edge that has room for them as well.
+        Returns [expended, max] energy and the number of Cars on each owned boundary Edge at the start of the next pass.
+        '''
+        expended_energy = 0                       # work actually done
+        sum_maximum_expendible_energy = 0         # maximum work possible
+
+        self.pending_crossings.extend(inbound_cars)
+        edge_ID_to_pending_cars = collections.Counter(car.get_current_edge() for car in self.pending_crossings)
+
+        # 3. Edge ticks
+        for edge_ID in sorted(self.graph.active_edge_ID_to_edge.keys(), key=repr):
+            edge_tick_outputs = self.graph.edge_ID_to_edge[edge_ID].tick(edge_ID_to_pending_cars[edge_ID])
+            expended_energy += edge_tick_outputs[0]
+            sum_maximum_expendible_energy += edge_tick_outputs[1]
+
+        boundary_edge_occupancy = {}
+        for edge_ID in self.owned_boundary_edge_IDs:
+            boundary_edge_occupancy[edge_ID] = len(self.graph.edge_ID_to_edge[edge_ID].get_current_cars()) + edge_ID_to_pending_cars[edge_ID]
+        return expended_energy, sum_maximum_expendible_energy, boundary_edge_occupancy
+
+
+    def end_tick(self):
+        '''Updates the travel_time_estimate of this partition's Edges, archives the Cars that finished their trip on them,
+        and starts the next tick, which refreshes the tick potential of the others (see Network.start_tick()).
+        Returns a dictionary mapping the IDs of the Edges whose travel_time_estimate was updated to their new estimate,
+        to be shared with the other partitions (see set_travel_time_estimates()).
+        '''
+        updated_edge_ID_to_edge = self.graph.update_travel_time_estimates()     # only this partition's Edges are observed
+        self.graph.archive_finished_cars()
+        self.graph.discard_changes()
+        self.graph.start_tick()
+        return {edge_ID: edge.get_travel_time_estimate() for edge_ID, edge in updated_edge_ID_to_edge.items()}
+
+
+    def set_travel_time_estimates(self, edge_ID_to_estimate):
+        '''Takes over the travel_time_estimate of other partitions' Edges, so that 'Fastest_now' routes are the same
+        for any number of workers.
+        '''
+        self.graph.set_travel_time_estimates(edge_ID_to_estimate)
+
+
+    def get_car_states(self):
+        '''Returns (id, current_edge, current_pos_meter_car_front, route_status) for every Car placed on this partition's Edges,
+        including Cars that completed their route here.
+        '''
+        car_states = []
+        for car in self.graph.car_ID_to_car.values():
+            if car is not None and car.get_current_edge() is not None:
+                car_states.append((car.get_car_ID(), car.get_current_edge(), car.get_current_pos_meter_car_front(), car.get_route_status()))
+        for car in self.graph.car_archive.get_car_snapshots():
+            car_states.append((car["id"], car["current_edge"], car["current_pos_meter_car_front"], car["route_status"]))
+        return car_states
+
+
+def run_partition_worker(connection, network_config, partition_ID, node_ID_to_partition, seed):
+    '''Worker process loop:  receives (command, arguments) messages from the PartitionedTrafficManager and sends back the results.
+    '''
+    worker = PartitionWorker(network_config, partition_ID, node_ID_to_partition, seed)
+    while True:
+        command, arguments = connection.recv()
+        if command == "close":
+            connection.close()
+            return
+        connection.send(getattr(worker, command)(*arguments))
+
+
+class PartitionedTrafficManager:
+    def __init__(self, network_config, number_workers, seed = 0) -> None:
+        '''Runs a simulation on number_workers processes, each ticking one region of the Network (see NetworkPartitioner).
+        Workers run each pass in lockstep, in two halves (see PartitionWorker.run_crossings() and run_edge_ticks()):  between the halves
+        they exchange the Cars crossing onto another region's Edges, and after each pass the number of Cars on capacity-limited
+        boundary Edges.  Given the same seed, results are identical for any number of workers, as every half pass only depends
+        on the state at its start, and every 'Random' route is drawn from a generator keyed on its Car and tick
+        (see Network.get_car_route_rng()).
+        Note:  passes differ from TrafficManager.tick() passes (a Car that crosses a Node moves on at the next pass), so results
+        are close to, but not identical with, those of a TrafficManager.
+        Attributes:
+            number_workers:  Number of worker processes (and Network regions).
+            node_ID_to_partition:  Dictionary mapping Node IDs to the worker that ticks them.
+            edge_ID_to_partition:  Dictionary mapping Edge IDs to the worker holding their Cars (that of their end Node).
+            connections:  Pipe connection to each worker process.
+            processes:  Worker processes.
+            partition_to_new_cars:  Cars added since the last tick, for each worker.
+            graph:  Network (without Cars) used to validate Cars before they are sent to a worker (see check_valid_cars()).
+            car_IDs:  IDs of every Car added, so that Car IDs stay unique across workers.
+            edge_ID_to_occupancy:  Number of Cars (including pending crossings) on each capacity-limited boundary Edge after the last pass.
+            timestamp:  Simulation timestamp.
+        '''
+        self.number_workers = number_workers
+        self.node_ID_to_partition = NetworkPartitioner(seed).partition_nodes(network_config, number_workers)
+        self.edge_ID_to_partition = {edge["id"]: self.node_ID_to_partition[edge["end_node_id"]] for edge in network_config["edge_list"]}
+        self.partition_to_new_cars = collections.defaultdict(list)
+        self.edge_ID_to_occupancy = {}
+        for edge in network_config["edge_list"]:
+            if (self.node_ID_to_partition[edge["start_node_id"]] != self.edge_ID_to_partition[edge["id"]]
+                    and edge.get("max_capacity", inf) != inf):
+                self.edge_ID_to_occupancy[edge["id"]] = 0
+        self.timestamp = 0
+
+        self.connections = []
+        self.processes = []
+        for partition_ID in range(number_workers):
+            parent_connection, child_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=run_partition_worker,
+                                              args=(child_connection, network_config, partition_ID, self.node_ID_to_partition, seed),
+                                              daemon=True)
+            process.start()
+            self.connections.append(parent_connection)
+            self.processes.append(process)
+        self.graph = Network(None, network_config, seed = seed)
+        self.car_IDs = set()
+
+
+    def call_workers(self, command, partition_to_arguments):
+        '''Sends command to every worker (with its arguments) and returns their results, in partition order.
+        '''
+        for partition_ID, connection in enumerate(self.connections):
+            connection.send((command, partition_to_arguments[partition_ID]))
+        return [connection.recv() for connection in self.connections]
+
+
+    def add_car(self, car):
+        '''API function:  place car (dictionary object) onto the network's waiting queue at the next tick.
+        '''
+        self.add_cars([car])
+
+
+    def add_cars(self, cars):
+        '''API function:  place every car (dictionary object) in the iterable cars onto the network's waiting queues at the next tick.
+        The whole batch is validated before any Car is queued, so an invalid car raises an Exception and places none of them
+        (as TrafficManager.add_cars() does), instead of failing inside a worker process.
+        '''
+        car_list = list(cars)
+        if self.check_valid_cars(car_list) == True:
+            for car in car_list:
+                self.partition_to_new_cars[self.edge_ID_to_partition[car["start_edge"]]].append(car)
+                self.car_IDs.add(car["id"])
+
+
+    def check_valid_cars(self, car_list):
+        '''Returns a detailed Exception (naming the Car) if any car in car_list does not conform to expected input structure
+        (see Network.check_valid_cars()), reuses the ID of a Car added before, or has no path to its destination.
+        Whether a path exists does not depend on the route_preference, so Cars without a given path are checked with a 'Shortest' path,
+        once per (start_edge, end_edge) pair.
+        '''
+        self.graph.check_valid_cars(car_list)
+        routable_edge_ID_pairs = set()
+        for car in car_list:
+            if car["id"] in self.car_IDs:
+                raise Exception("Invalid car", car["id"], ":", "That car ID already exists.")
+            if "path" not in car:
+                edge_ID_pair = (car["start_edge"], car["end_edge"])
+                if edge_ID_pair not in routable_edge_ID_pairs:
+                    if self.graph.calculate_path(car["start_edge"], car["end_edge"], 'Shortest') == []:
+                        raise Exception("Invalid car", car["id"], ":", "There is no possible path to this car's destination.")
+                    routable_edge_ID_pairs.add(edge_ID_pair)
+        return True
+
+
+    def tick(self):
+        '''API function:  advance state of network by one unit of time.
+        Returns a TickResult (steps_count is the number of passes).
+        '''
+        self.timestamp += 1
+        self.call_workers("add_cars", [(self.partition_to_new_cars[partition_ID],) for partition_ID in range(self.number_workers)])
+        self.partition_to_new_cars = collections.defaultdict(list)
+
+        expended_energy = 0                       # work actually done
+        sum_maximum_expendible_energy = 0         # maximum work possible
+        steps_count = 0
+        while True:
+            steps_count += 1
+            crossing_outputs = self.call_workers("run_crossings", [(self.edge_ID_to_occupancy,) for partition_ID in range(self.number_workers)])
+
+            number_crossings = 0
+            partition_to_inbound_cars = collections.defaultdict(list)
+            for worker_crossings, partition_to_outbound_cars in crossing_outputs:
+                number_crossings += worker_crossings
+                for partition_ID, cars in partition_to_outbound_cars.items():
+                    partition_to_inbound_cars[partition_ID].extend(cars)
+
+            tick_outputs = self.call_workers("run_edge_ticks", [(partition_to_inbound_cars[partition_ID],) for partition_ID in range(self.number_workers)])
+            for worker_expended, worker_maximum, boundary_edge_occupancy in tick_outputs:
+                expended_energy += worker_expended
+                sum_maximum_expendible_energy += worker_maximum
+                self.edge_ID_to_occupancy.update(boundary_edge_occupancy)
+            if not tick_outputs or (not any(output[0] for output in tick_outputs) and not number_crossings):
+                # no more movement possible
+                break
+
+        # share the travel-time estimates of every partition's Edges with the other partitions ('Fastest_now' routes)
+        partition_to_estimates = self.call_workers("end_tick", [() for partition_ID in range(self.number_workers)])
+        estimate_arguments = []
+        for partition_ID in range(self.number_workers):
+            edge_ID_to_estimate = {}
+            for other_partition_ID, other_edge_ID_to_estimate in enumerate(partition_to_estimates):
+                if other_partition_ID != partition_ID:
+                    edge_ID_to_estimate.update(other_edge_ID_to_estimate)
+            estimate_arguments.append((edge_ID_to_estimate,))
+        self.call_workers("set_travel_time_estimates", estimate_arguments)
+        if sum_maximum_expendible_energy != 0:
+            energy_used_percent = expended_energy / sum_maximum_expendible_energy
+        else:
+            energy_used_percent = None
+        return TickResult(self.timestamp, steps_count, expended_energy, sum_maximum_expendible_energy, energy_used_percent)
+
+
+    def get_car_states(self):
+        '''API function:  returns the sorted (id, current_edge, current_pos_meter_car_front, route_status) tuples of every Car on the Network.
+        '''
+        car_states = []
+        for worker_car_states in self.call_workers("get_car_states", [() for partition_ID in range(self.number_workers)]):
+            car_states.extend(worker_car_states)
+        return sorted(car_states, key=repr)
+
+
+    def close(self):
+        '''API function:  stops the worker processes.
+        '''
+        for connection in self.connections:
+            connection.send(("close", ()))
+        for process in self.processes:
+            process.join()
@@ -0,0 +1,595 @@
+import collections
+import hashlib
+import heapq
+import json
+from array import array
+from cmath import inf
+
+ACTIVE_LANDMARKS = 8    # landmarks used by each A* query (those giving the best bound between its start and end Edges)
+
+class Router:
+    def __init__(self, Network_reference, cache_size = 100000) -> None:
+        '''Contains the shortest-path engine used to assign and recalculate Car routes.
+        Paths are searched over the Edge graph:  Edge A leads to Edge B if A.end_node is B.start_node.
+        Returned paths follow the same format as Network.all_paths_depth_first_search():
+        an ordered list of Edge IDs beginning with the start Edge and ending with the end Edge.
+        Attributes:
+            Network_pointer:  Network whose Edges are being routed over.
+            route_cache:  Least-recently-used mapping of (start Edge ID, end Edge ID, metric) to previously calculated paths.
+                'Random' paths are never cached.
+            cache_size:  Maximum number of paths kept in route_cache.  0 disables caching.
+            cache_hits:  Number of path requests answered from route_cache.
+            cache_misses:  Number of path requests that required a new search.
+            topology_version:  Incremented every time the Network changes in a way that may alter routes (clears route_cache).
+            route_tables:  Optional precomputed next-hop tables, mapping metric -> end Edge ID -> {Edge ID: next Edge ID}.
+                Built with build_route_tables() (or loaded from disk) and discarded on any topology change.
+            live_route_cache:  Mapping of (start Edge ID, end Edge ID) to 'Fastest_now' paths, valid until the Edge travel-time estimates
+                are next updated (once per global tick, see Network.update_travel_time_estimates()).  Holds at most cache_size paths.
+            landmark_costs:  Optional landmark tables, mapping metric -> list of (cost_from_landmark, cost_to_landmark) arrays
+                indexed by landmark_edge_ID_to_index.  Built with build_landmarks() and discarded on any topology change.
+            landmark_edge_ID_to_index:  Dictionary mapping every Edge ID to its index in the landmark_costs arrays.
+        '''
+        self.Network_pointer = Network_reference
+
+        self.route_cache = collections.OrderedDict()
+        self.cache_size = cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.topology_version = 0
+        self.route_tables = {}
+        self.live_route_cache = {}
+        self.landmark_costs = {}
+        self.landmark_edge_ID_to_index = {}
+
+
+    def get_path(self, start_edge_ID, end_edge_ID, metric, rng = None):
+        '''Returns the "best" path from start_edge_ID to end_edge_ID with regards to input metric, or [] if no path exists.
+        Currently supported input metrics:
+            'Fastest': best path = minimum total travel time (assuming no congestion), as in Network.path_cost_minimum_time().
+            'Fastest_now': best path = minimum travel time given the current Edge travel_time_estimate values, as in Network.path_cost_current_time().
+            'Shortest': best path = shortest total distance in terms of length, as in Network.path_cost_distance().
+            'Random':  pay no heed to metics, choose an available path at random.
+                Edge weights are drawn from rng, or from the Network's rng if None.
+        Paths are returned as new lists, so callers may modify them freely.
+        '''
+        if metric == 'Fastest' or metric == 'Shortest':
+            if metric in self.route_tables and start_edge_ID != end_edge_ID:
+                return self.get_table_path(start_edge_ID, end_edge_ID, metric)
+            return list(self.get_cached_path(start_edge_ID, end_edge_ID, metric))
+        elif metric == 'Fastest_now':
+            return list(self.get_live_path(start_edge_ID, end_edge_ID))
+        elif metric == 'Random':
+            random_weights = {}   # drawn once per Edge so that the query stays consistent
+            if rng is None:
+                rng = self.Network_pointer.rng
+            return self.shortest_path(start_edge_ID, end_edge_ID, metric, random_weights, rng)
+        else:
+            raise Exception('"', metric, '" is not a supported metric.  Instead try "Fastest", "Fastest_now", "Shortest", or "Random".')
+
+
+    def get_paths(self, start_edge_IDs, end_edge_ID, metric):
+        '''Returns a dictionary mapping each of start_edge_IDs to its "best" path to end_edge_ID, as get_path() would ([] if no path exists).
+        Paths that are not already cached are answered together by one reverse search from end_edge_ID (see reverse_shortest_path_tree()),
+        so the cost scales with the number of distinct destinations instead of the number of start Edges.
+        'Random' paths are still drawn one query at a time.
+        '''
+        start_edge_ID_to_path = {}
+        uncached_start_edge_IDs = []
+        for start_edge_ID in start_edge_IDs:
+            if start_edge_ID in start_edge_ID_to_path:
+                continue
+            if metric == 'Random' or start_edge_ID == end_edge_ID or self.is_path_cached(start_edge_ID, end_edge_ID, metric):
+                start_edge_ID_to_path[start_edge_ID] = self.get_path(start_edge_ID, end_edge_ID, metric)
+            else:
+                start_edge_ID_to_path[start_edge_ID] = None
+                uncached_start_edge_IDs.append(start_edge_ID)
+
+        if len(uncached_start_edge_IDs) == 1:    # a single forward search stops sooner than a reverse one
+            start_edge_ID = uncached_start_edge_IDs[0]
+            start_edge_ID_to_path[start_edge_ID] = self.get_path(start_edge_ID, end_edge_ID, metric)
+        elif uncached_start_edge_IDs:
+            if metric not in ('Fastest', 'Fastest_now', 'Shortest'):
+                raise Exception('"', metric, '" is not a supported metric.  Instead try "Fastest", "Fastest_now", "Shortest", or "Random".')
+            self.cache_misses += len(uncached_start_edge_IDs)
+            next_hop = self.reverse_shortest_path_tree(end_edge_ID, metric, uncached_start_edge_IDs)[1]
+            for start_edge_ID in uncached_start_edge_IDs:
+                path = []
+                if start_edge_ID in next_hop:
+                    path.append(start_edge_ID)
+                    edge_ID = start_edge_ID
+                    while edge_ID != end_edge_ID:
+                        edge_ID = next_hop[edge_ID]
+                        path.append(edge_ID)
+                self.store_path(start_edge_ID, end_edge_ID, metric, tuple(path))
+                start_edge_ID_to_path[start_edge_ID] = path
+        return start_edge_ID_to_path
+
+
+    def is_path_cached(self, start_edge_ID, end_edge_ID, metric):
+        '''Returns True if get_path() can answer this query without searching (from route_tables, route_cache or live_route_cache).
+        '''
+        if metric == 'Fastest' or metric == 'Shortest':
+            return metric in self.route_tables or (start_edge_ID, end_edge_ID, metric) in self.route_cache
+        elif metric == 'Fastest_now':
+            return (start_edge_ID, end_edge_ID) in self.live_route_cache
+        return False
+
+
+    def store_path(self, start_edge_ID, end_edge_ID, metric, path):
+        '''Adds path (a tuple) to route_cache, or to live_route_cache for 'Fastest_now', evicting entries once cache_size is exceeded.
+        '''
+        if self.cache_size <= 0:
+            return
+        if metric == 'Fastest_now':
+            if len(self.live_route_cache) >= self.cache_size:
+                self.live_route_cache = {}
+            self.live_route_cache[(start_edge_ID, end_edge_ID)] = path
+        else:
+            route_key = (start_edge_ID, end_edge_ID, metric)
+            self.route_cache[route_key] = path
+            if len(self.route_cache) > self.cache_size:
+                self.route_cache.popitem(last=False)
+
+
+    def get_cached_path(self, start_edge_ID, end_edge_ID, metric):
+        '''Returns the path (as a tuple) from route_cache if present, otherwise calculates and caches it.
+        The least recently used path is evicted once route_cache exceeds cache_size.
+        '''
+        route_key = (start_edge_ID, end_edge_ID, metric)
+        cached_path = self.route_cache.get(route_key)
+        if cached_path is not None:
+            self.cache_hits += 1
+            self.route_cache.move_to_end(route_key)
+            return cached_path
+
+        self.cache_misses += 1
+        if metric in self.landmark_costs:
+            path = tuple(self.landmark_shortest_path(start_edge_ID, end_edge_ID, metric))
+        else:
+            path = tuple(self.shortest_path(start_edge_ID, end_edge_ID, metric))
+        self.store_path(start_edge_ID, end_edge_ID, metric, path)
+        return path
+
+
+    def get_live_path(self, start_edge_ID, end_edge_ID):
+        '''Returns the 'Fastest_now' path (as a tuple) from live_route_cache if present, otherwise calculates and caches it.
+        '''
+        route_key = (start_edge_ID, end_edge_ID)
+        cached_path = self.live_route_cache.get(route_key)
+        if cached_path is not None:
+            self.cache_hits += 1
+            return cached_path
+
+        self.cache_misses += 1
+        path = tuple(self.shortest_path(start_edge_ID, end_edge_ID, 'Fastest_now'))
+        self.store_path(start_edge_ID, end_edge_ID, 'Fastest_now', path)
+        return path
+
+
+    def invalidate_cache(self):
+        '''Discards all cached paths.  Called whenever Nodes or Edges are added, removed, or have their attributes changed.
+        '''
+        self.route_cache.clear()
+        self.route_tables = {}
+        self.live_route_cache = {}
+        self.landmark_costs = {}
+        self.landmark_edge_ID_to_index = {}
+        self.topology_version += 1
+
+
+    def invalidate_live_routes(self):
+        '''Discards the cached 'Fastest_now' paths.  Called whenever the Edge travel-time estimates are updated.
+        '''
+        if self.live_route_cache:
+            self.live_route_cache = {}
+
+
+    def get_cache_statistics(self):
+        '''Returns a dictionary describing route_cache usage.
+        '''
+        statistics = {}
+        statistics["cache_size"] = self.cache_size
+        statistics["cached_paths"] = len(self.route_cache)
+        statistics["cached_live_paths"] = len(self.live_route_cache)
+        statistics["hits"] = self.cache_hits
+        statistics["misses"] = self.cache_misses
+        statistics["topology_version"] = self.topology_version
+        statistics["precomputed_metrics"] = list(self.route_tables.keys())
+        return statistics
+
+
+    def get_table_path(self, start_edge_ID, end_edge_ID, metric):
+        '''Follows the precomputed next-hop table for metric from start_edge_ID to end_edge_ID.
+        Takes time proportional to the length of the path.  Returns [] if no path exists.
+        '''
+        next_hop = self.route_tables[metric].get(end_edge_ID, {})
+        if start_edge_ID not in next_hop:
+            return []
+
+        path = [start_edge_ID]
+        edge_ID = start_edge_ID
+        while edge_ID != end_edge_ID:
+            edge_ID = next_hop[edge_ID]
+            path.append(edge_ID)
+        return path
+
+
+    def build_route_tables(self, metrics = ('Shortest', 'Fastest')):
+        '''Precomputes next-hop tables for every end Edge in the Network for each given metric.
+        Afterwards, get_path() answers queries for these metrics by following the tables instead of searching.
+        Requires one reverse search per Edge per metric, and memory proportional to (number of Edges)^2 in the worst case,
+        so this is intended for fixed Networks that are simulated many times.
+        '''
+        route_tables = {}
+        for metric in metrics:
+            metric_table = {}
+            for end_edge_ID in self.Network_pointer.edge_ID_to_edge:
+                metric_table[end_edge_ID] = self.reverse_shortest_path_tree(end_edge_ID, metric)[1]
+            route_tables[metric] = metric_table
+        self.route_tables = route_tables
+
+
+    def build_landmarks(self, metrics = ('Shortest', 'Fastest'), number_landmarks = 8):
+        '''Precomputes, for each given metric, the cost of the best path from and to number_landmarks landmark Edges for every Edge.
+        Afterwards, uncached get_path() queries for these metrics run an A* search guided by these costs (see landmark_shortest_path()),
+        which settles far fewer Edges than Dijkstra on large Networks.  Node coordinates are not needed.
+        Landmarks are chosen far apart:  each maximizes its round-trip cost to the landmarks already chosen.
+        Requires two full searches per landmark per metric, and memory proportional to number_landmarks x (number of Edges).
+        '''
+        edge_IDs = list(self.Network_pointer.edge_ID_to_edge)
+        self.landmark_edge_ID_to_index = {edge_ID: index for index, edge_ID in enumerate(edge_IDs)}
+        landmark_costs = {}
+        for metric in metrics:
+            metric_landmark_costs = []
+            cost_from_landmark, cost_to_landmark = self.get_landmark_costs(edge_IDs[0], metric)    # only used to find the first landmark
+            separation = [cost_from + cost_to for cost_from, cost_to in zip(cost_from_landmark, cost_to_landmark)]
+            for landmark_index in range(min(number_landmarks, len(edge_IDs))):
+                landmark_edge_ID = edge_IDs[max(range(len(edge_IDs)), key=separation.__getitem__)]
+                cost_from_landmark, cost_to_landmark = self.get_landmark_costs(landmark_edge_ID, metric)
+                metric_landmark_costs.append((cost_from_landmark, cost_to_landmark))
+                for index, (cost_from, cost_to) in enumerate(zip(cost_from_landmark, cost_to_landmark)):
+                    if cost_from + cost_to < separation[index]:
+                        separation[index] = cost_from + cost_to
+            landmark_costs[metric] = metric_landmark_costs
+        self.landmark_costs = landmark_costs
+
+
+    def get_landmark_costs(self, landmark_edge_ID, metric):
+        '''Returns (cost_from_landmark, cost_to_landmark), arrays indexed by landmark_edge_ID_to_index holding the cost of the best path
+        from landmark_edge_ID to every Edge and from every Edge to landmark_edge_ID (inf if there is none).
+        Only the Edges after the first one are counted, so that costs add up along a path (the triangle inequality holds).
+        '''
+        edge_ID_to_edge = self.Network_pointer.edge_ID_to_edge
+        edge_ID_to_index = self.landmark_edge_ID_to_index
+        landmark_cost = self.get_edge_cost(edge_ID_to_edge[landmark_edge_ID], metric)
+
+        cost_from_landmark = array('d', [inf]) * len(edge_ID_to_index)
+        for edge_ID, cost in self.shortest_path_tree(landmark_edge_ID, metric).items():
+            cost_from_landmark[edge_ID_to_index[edge_ID]] = cost - landmark_cost
+        cost_to_landmark = array('d', [inf]) * len(edge_ID_to_index)
+        for edge_ID, cost in self.reverse_shortest_path_tree(landmark_edge_ID, metric)[0].items():
+            cost_to_landmark[edge_ID_to_index[edge_ID]] = cost - self.get_edge_cost(edge_ID_to_edge[edge_ID], metric)
+        return cost_from_landmark, cost_to_landmark
+
+
+    def shortest_path_tree(self, start_edge_ID, metric):
+        '''Dijkstra search forwards over the whole Edge graph, starting from start_edge_ID.
+        Returns cost_from_start:  dictionary mapping every reachable Edge ID to the cost of the best path from start_edge_ID to that Edge
+        (both Edges included).
+        '''
+        edge_ID_to_edge = self.Network_pointer.edge_ID_to_edge
+
+        start_cost = self.get_edge_cost(edge_ID_to_edge[start_edge_ID], metric)
+        cost_from_start = {start_edge_ID: start_cost}
+        settled = set()
+
+        push_counter = 0          # tie-breaker, keeps heap from comparing Edge IDs
+        heap = [(start_cost, push_counter, start_edge_ID)]
+
+        while heap:
+            cost, _, edge_ID = heapq.heappop(heap)
+            if edge_ID in settled:
+                continue
+            settled.add(edge_ID)
+
+            terminal_node = edge_ID_to_edge[edge_ID].end_node
+            cost += self.get_crossing_cost(terminal_node, metric)
+
+            for next_edge_ID, next_edge in terminal_node.outbound_edge_ID_to_edge.items():
+                if next_edge_ID in settled:
+                    continue
+                new_cost = cost + self.get_edge_cost(next_edge, metric)
+                if new_cost < cost_from_start.get(next_edge_ID, inf):
+                    cost_from_start[next_edge_ID] = new_cost
+                    push_counter += 1
+                    heapq.heappush(heap, (new_cost, push_counter, next_edge_ID))
+
+        return cost_from_start
+
+
+    def reverse_shortest_path_tree(self, end_edge_ID, metric, source_edge_IDs = None):
+        '''Dijkstra search backwards over the Edge graph, starting from end_edge_ID.
+        Returns (cost_to_end, next_hop):
+            cost_to_end:  dictionary mapping Edge IDs to the cost of the best path from that Edge to end_edge_ID (both Edges included).
+            next_hop:  dictionary mapping Edge IDs to the next Edge on that best path.  end_edge_ID itself has no entry.
+        If source_edge_IDs is given, the search stops as soon as all of those Edges have been settled.
+        '''
+        edge_ID_to_edge = self.Network_pointer.edge_ID_to_edge
+
+        end_cost = self.get_edge_cost(edge_ID_to_edge[end_edge_ID], metric)
+        cost_to_end = {end_edge_ID: end_cost}
+        next_hop = {}
+        settled = set()
+
+        if source_edge_IDs is not None:
+            remaining_sources = set(source_edge_IDs)
+            remaining_sources.discard(end_edge_ID)
+
+        push_counter = 0          # tie-breaker, keeps heap from comparing Edge IDs
+        heap = [(end_cost, push_counter, end_edge_ID)]
+
+        while heap:
+            cost, _, edge_ID = heapq.heappop(heap)
+            if edge_ID in settled:
+                continue
+            settled.add(edge_ID)
+
+            if source_edge_IDs is not None:
+                remaining_sources.discard(edge_ID)
+                if not remaining_sources:
+                    break
+
+            origin_node = edge_ID_to_edge[edge_ID].start_node
+            cost += self.get_crossing_cost(origin_node, metric)
+
+            for previous_edge_ID, previous_edge in origin_node.inbound_edge_ID_to_edge.items():
+                if previous_edge_ID == end_edge_ID or previous_edge_ID in settled:
+                    continue
+                new_cost = cost + self.get_edge_cost(previous_edge, metric)
+                if new_cost < cost_to_end.get(previous_edge_ID, inf):
+                    cost_to_end[previous_edge_ID] = new_cost
+                    next_hop[previous_edge_ID] = edge_ID
+                    push_counter += 1
+                    heapq.heappush(heap, (new_cost, push_counter, previous_edge_ID))
+
+        return cost_to_end, next_hop
+
+
+    def get_topology_fingerprint(self):
+        '''Returns a hash of every Node and Edge attribute that routing depends on.
+        Used to make sure that route tables loaded from disk belong to this Network.
+        '''
+        topology = []
+        for node_ID, node in self.Network_pointer.node_ID_to_node.items():
+            topology.append(["node", node_ID, node.get_intersection_time_cost()])
+        for edge_ID, edge in self.Network_pointer.edge_ID_to_edge.items():
+            topology.append(["edge", edge_ID, edge.get_start_node_id(), edge.get_end_node_id(), edge.get_length(), edge.get_max_speed()])
+        return hashlib.sha256(json.dumps(topology).encode()).hexdigest()
+
+
+    def save_route_tables(self, file_path):
+        '''Writes route_tables to file_path (JSON), along with the fingerprint of the Network they were built for.
+        Tables are stored as lists of [Edge ID, next Edge ID] pairs so that Edge ID types are preserved.
+        '''
+        output = {}
+        output["topology_fingerprint"] = self.get_topology_fingerprint()
+        output["route_tables"] = {}
+        for metric, metric_table in self.route_tables.items():
+            output["route_tables"][metric] = [[end_edge_ID, list(next_hop.items())] for end_edge_ID, next_hop in metric_table.items()]
+
+        with open(file_path, 'w') as f:
+            json.dump(output, f)
+
+
+    def load_route_tables(self, file_path):
+        '''Loads route_tables previously written by save_route_tables().
+        Returns False (leaving route_tables untouched) if the file was built for a different Network.
+        '''
+        with open(file_path) as f:
+            raw = json.load(f)
+
+        if raw["topology_fingerprint"] != self.get_topology_fingerprint():
+            return False
+
+        route_tables = {}
+        for metric, metric_table in raw["route_tables"].items():
+            route_tables[metric] = {end_edge_ID: dict(next_hop_pairs) for end_edge_ID, next_hop_pairs in metric_table}
+        self.route_tables = route_tables
+        return True
+
+
+    def get_edge_cost(self, edge_object, metric, random_weights = None, rng = None):
+        '''Returns the cost of traversing the entirety of edge_object with regards to input metric.
+        Node-crossing time penalties are not included here; see get_crossing_cost().
+        'Random' weights are drawn once per Edge from rng (the Network's rng if None) and kept in random_weights.
+        '''
+        if metric == 'Shortest':
+            return edge_object.get_length()
+        elif metric == 'Fastest':
+            return edge_object.get_length() / edge_object.get_max_speed()
+        elif metric == 'Fastest_now':
+            return edge_object.get_travel_time_estimate()
+        else:
+            edge_ID = edge_object.get_edge_ID()
+            if edge_ID not in random_weights:
+                if rng is None:
+                    rng = self.Network_pointer.rng
+                random_weights[edge_ID] = rng.random()
+            return random_weights[edge_ID]
+
+
+    def get_crossing_cost(self, node_object, metric):
+        '''Returns the cost of crossing node_object with regards to input metric.
+        Only time-based metrics are penalized for crossing an intersection.
+        '''
+        if metric == 'Fastest' or metric == 'Fastest_now':
+            return node_object.get_intersection_time_cost()
+        return 0
+
+
+    def shortest_path(self, start_edge_ID, end_edge_ID, metric, random_weights = None, rng = None):
+        '''Dijkstra search over the Edge graph from start_edge_ID to end_edge_ID.
+        Path cost includes the whole start and end Edges (matching Network.path_cost_distance() and Network.path_cost_minimum_time()),
+        so the start Edge is never revisited and the end Edge is never expanded past.
+        If start_edge_ID == end_edge_ID, the cheapest loop back to that Edge is returned (as all_paths_depth_first_search() would).
+        Returns [] if end_edge_ID cannot be reached.
+        '''
+        edge_ID_to_edge = self.Network_pointer.edge_ID_to_edge
+        start_edge = edge_ID_to_edge[start_edge_ID]
+
+        start_cost = self.get_edge_cost(start_edge, metric, random_weights, rng)
+        best_cost = {start_edge_ID: start_cost}
+        previous_edge = {start_edge_ID: None}
+        settled = set()
+
+        goal_cost = inf
+        goal_previous_edge = None
+
+        push_counter = 0          # tie-breaker, keeps heap from comparing Edge IDs
+        heap = [(start_cost, push_counter, start_edge_ID)]
+
+        while heap:
+            cost, _, edge_ID = heapq.heappop(heap)
+            if cost >= goal_cost:
+                break      # no cheaper way to reach the end Edge remains
+            if edge_ID in settled:
+                continue
+            settled.add(edge_ID)
+
+            terminal_node = edge_ID_to_edge[edge_ID].end_node
+            cost += self.get_crossing_cost(terminal_node, metric)
+
+            for next_edge_ID, next_edge in terminal_node.outbound_edge_ID_to_edge.items():
+                # inlined get_edge_cost() -- this loop dominates routing time on large Networks
+                if metric == 'Shortest':
+                    new_cost = cost + next_edge.edge_length
+                elif metric == 'Fastest':
+                    new_cost = cost + next_edge.edge_length / next_edge.max_speed
+                elif metric == 'Fastest_now':
+                    new_cost = cost + next_edge.travel_time_estimate
+                else:
+                    new_cost = cost + self.get_edge_cost(next_edge, metric, random_weights, rng)
+
+                if next_edge_ID == end_edge_ID:   # destination edge reached
+                    if new_cost < goal_cost:
+                        goal_cost = new_cost
+                        goal_previous_edge = edge_ID
+
+                elif next_edge_ID not in settled and new_cost < best_cost.get(next_edge_ID, inf):
+                    best_cost[next_edge_ID] = new_cost
+                    previous_edge[next_edge_ID] = edge_ID
+                    push_counter += 1
+                    heapq.heappush(heap, (new_cost, push_counter, next_edge_ID))
+
+        if goal_previous_edge is None:
+            return []
+
+        path = [end_edge_ID]
+        edge_ID = goal_previous_edge
+        while edge_ID is not None:
+            path.append(edge_ID)
+            edge_ID = previous_edge[edge_ID]
+        path.reverse()
+        return path
+
+
+    def landmark_shortest_path(self, start_edge_ID, end_edge_ID, metric):
+        '''A* search over the Edge graph from start_edge_ID to end_edge_ID for 'Shortest' or 'Fastest', once build_landmarks() has run.
+        Each Edge is ordered by its cost so far plus a lower bound on its remaining cost to end_edge_ID, taken from the landmark costs
+        by the triangle inequality:  remaining >= cost(landmark -> end) - cost(landmark -> Edge), and
+        remaining >= cost(Edge -> landmark) - cost(end -> landmark).  Only the ACTIVE_LANDMARKS landmarks with the best bound
+        from start_edge_ID are used.  Edges that cannot reach end_edge_ID get an infinite bound and are never expanded.
+        Ties are broken in favour of the Edge with the highest cost so far (closest to the end), so that the many equally cheap paths
+        of grid-like Networks are not all explored.
+        Returns a path of the same cost as shortest_path() (up to floating point rounding;  among equally cheap paths, not necessarily
+        the same one), or [] if none exists.
+        '''
+        edge_ID_to_edge = self.Network_pointer.edge_ID_to_edge
+        edge_ID_to_index = self.landmark_edge_ID_to_index
+        start_index = edge_ID_to_index[start_edge_ID]
+        end_index = edge_ID_to_index[end_edge_ID]
+
+        # keep the landmarks that bound the cost between the start and end Edges best;  terms with an unreachable end are left out
+        landmark_bounds = []
+        for cost_from_landmark, cost_to_landmark in self.landmark_costs[metric]:
+            end_cost_from_landmark = cost_from_landmark[end_index]
+            end_cost_to_landmark = cost_to_landmark[end_index]
+            start_bound = 0
+            if end_cost_from_landmark != inf:
+                start_bound = max(start_bound, end_cost_from_landmark - cost_from_landmark[start_index])
+            else:
+                end_cost_from_landmark = None
+            if end_cost_to_landmark != inf:
+                start_bound = max(start_bound, cost_to_landmark[start_index] - end_cost_to_landmark)
+            else:
+                end_cost_to_landmark = None
+            landmark_bounds.append((start_bound, len(landmark_bounds), cost_from_landmark, end_cost_from_landmark, cost_to_landmark, end_cost_to_landmark))
+        landmark_bounds.sort(key=lambda landmark_bound: (-landmark_bound[0], landmark_bound[1]))
+        active_landmarks = [landmark_bound[2:] for landmark_bound in landmark_bounds[:ACTIVE_LANDMARKS]]
+
+        def get_lower_bound(edge_ID):
+            index = edge_ID_to_index[edge_ID]
+            lower_bound = 0
+            for cost_from_landmark, end_cost_from_landmark, cost_to_landmark, end_cost_to_landmark in active_landmarks:
+                if end_cost_from_landmark is not None:
+                    bound = end_cost_from_landmark - cost_from_landmark[index]
+                    if bound > lower_bound:
+                        lower_bound = bound
+                if end_cost_to_landmark is not None:
+                    bound = cost_to_landmark[index] - end_cost_to_landmark
+                    if bound > lower_bound:
+                        lower_bound = bound
+            return lower_bound
+
+        start_cost = self.get_edge_cost(edge_ID_to_edge[start_edge_ID], metric)
+        best_cost = {start_edge_ID: start_cost}
+        previous_edge = {start_edge_ID: None}
+        settled = set()
+
+        goal_cost = inf
+        goal_previous_edge = None
+
+        push_counter = 0          # tie-breaker, keeps heap from comparing Edge IDs
+        heap = [(start_cost + get_lower_bound(start_edge_ID), -start_cost, push_counter, start_edge_ID)]
+
+        while heap:
+            estimated_cost, _, _, edge_ID = heapq.heappop(heap)
+            if estimated_cost >= goal_cost:
+                break      # no cheaper way to reach the end Edge remains
+            if edge_ID in settled:
+                continue
+            settled.add(edge_ID)
+
+            terminal_node = edge_ID_to_edge[edge_ID].end_node
+            cost = best_cost[edge_ID] + self.get_crossing_cost(terminal_node, metric)
+
+            for next_edge_ID, next_edge in terminal_node.outbound_edge_ID_to_edge.items():
+                if metric == 'Shortest':
+                    new_cost = cost + next_edge.edge_length
+                else:
+                    new_cost = cost + next_edge.edge_length / next_edge.max_speed
+
+                if next_edge_ID == end_edge_ID:   # destination edge reached
+                    if new_cost < goal_cost:
+                        goal_cost = new_cost
+                        goal_previous_edge = edge_ID
+
+                elif next_edge_ID not in settled and new_cost < best_cost.get(next_edge_ID, inf):
+                    lower_bound = get_lower_bound(next_edge_ID)
+                    if lower_bound == inf:
+                        continue    # the end Edge cannot be reached from next_edge_ID
+                    best_cost[next_edge_ID] = new_cost
+                    previous_edge[next_edge_ID] = edge_ID
+                    push_counter += 1
+                    heapq.heappush(heap, (new_cost + lower_bound, -new_cost, push_counter, next_edge_ID))
+
+        if goal_previous_edge is None:
+            return []
+
+        path = [end_edge_ID]
+        edge_ID = goal_previous_edge
+        while edge_ID is not None:
+            path.append(edge_ID)
+            edge_ID = previous_edge[edge_ID]
+        path.reverse()
+        return path
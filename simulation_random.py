@@ -0,0 +1,76 @@
+import hashlib
+import random
+
+MASK_64 = (1 << 64) - 1
+
+
+def splitmix64(value):
+    '''Returns the SplitMix64 hash of value (an integer), as a 64-bit unsigned integer.
+    '''
+    value = (value + 0x9E3779B97F4A7C15) & MASK_64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK_64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK_64
+    return value ^ (value >> 31)
+
+
+def hash_key(*values):
+    '''Returns a 64-bit key combining values (integers, or IDs of any other type through their repr()).
+    Unlike hash() of a string, the key is the same in every process and every run.
+    '''
+    key = 0
+    for value in values:
+        if not isinstance(value, int):
+            value = int.from_bytes(hashlib.blake2b(repr(value).encode(), digest_size=8).digest(), 'little')
+        key = splitmix64(key ^ (value & MASK_64))
+    return key
+
+
+def create_seed():
+    '''Returns a new 63-bit seed drawn from the operating system, for simulations created without one.
+    '''
+    return random.SystemRandom().getrandbits(63)
+
+
+class CounterRandom:
+    def __init__(self, seed) -> None:
+        '''Counter-based random number generator used for the Node and Edge tick order shuffles (TrafficManager(shuffle_rng = 'counter')).
+        The k-th number drawn is the SplitMix64 hash of (seed, k), so the whole state is two integers:
+        it is cheap to create, copy, and reset, and every draw can be reproduced from the seed and its position in the sequence.
+        Only shuffle() and random() are provided.  Also used for car-keyed 'Random' routes (see Network.get_car_route_rng()).
+        Attributes:
+            seed:  Seed of the sequence.
+            counter:  Number of values drawn so far.
+        '''
+        self.seed = seed
+        self.counter = 0
+        self.key = splitmix64(seed)
+
+
+    def next_value(self):
+        '''Returns the next 64-bit unsigned integer of the sequence.
+        '''
+        self.counter += 1
+        return splitmix64(self.key ^ self.counter)
+
+
+    def random(self):
+        '''Returns the next float in [0, 1).
+        '''
+        return (self.next_value() >> 11) * (1.0 / 9007199254740992)
+
+
+    def shuffle(self, items):
+        '''Shuffles the list items in place (Fisher-Yates).
+        Several swap indices are taken from each 64-bit value (as digits in a mixed-radix number), so short lists,
+        such as the outbound Edges of a Node, only need a single draw.
+        '''
+        value = 0
+        value_range = 1    # number of distinct values left in value
+        for index in range(len(items) - 1, 0, -1):
+            bound = index + 1
+            if value_range < bound << 16:    # keeps the bias of each index below 2**-16
+                value = self.next_value()
+                value_range = 1 << 64
+            value, other_index = divmod(value, bound)
+            value_range //= bound
+            items[index], items[other_index] = items[other_index], items[index]
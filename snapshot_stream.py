@@ -0,0 +1,258 @@
+from array import array
+import bisect
+import mmap
+import os
+import struct
+import sys
+
+# File layout (little-endian):
+#   file header:   FILE_MAGIC
+#   tick blocks:   TICK_HEADER (timestamp, number_cars), followed by one column per Car attribute, each number_cars long:
+#                      car_id (int64), edge_id (int64, -1 while waiting to enter the Network),
+#                      position (float64, NaN while waiting), potential (float64), status (uint8 status code),
+#                  padded with zero bytes to a multiple of 8 bytes so every column stays aligned.
+# Index file (file_path + INDEX_SUFFIX):  one INDEX_ENTRY (timestamp, byte offset of the tick block) per tick.
+FILE_MAGIC = b"TSNAPv1\0"
+TICK_HEADER = struct.Struct("<qq")
+INDEX_ENTRY = struct.Struct("<qq")
+INDEX_SUFFIX = ".idx"
+COLUMN_TYPECODES = (("car_id", "q"), ("edge_id", "q"), ("position", "d"), ("potential", "d"), ("status", "B"))
+
+STATUS_CODES = {'In progress': 0, 'Paused': 1, 'Route Completed': 2, 'Removed from simulation': 3}
+STATUS_NAMES = {code: status for status, code in STATUS_CODES.items()}
+OTHER_STATUS_CODE = 255
+WAITING_EDGE_ID = -1    # stored as the edge_id of Cars waiting to enter the Network
+
+
+def get_status_code(route_status):
+    '''Returns the one-byte code stored for a Car.route_status string.
+    'Removed from simulation at tick #n' is stored as 'Removed from simulation';  unknown statuses are stored as OTHER_STATUS_CODE.
+    '''
+    if route_status in STATUS_CODES:
+        return STATUS_CODES[route_status]
+    if route_status.startswith('Removed from simulation'):
+        return STATUS_CODES['Removed from simulation']
+    return OTHER_STATUS_CODE
+
+
+def check_stream_IDs(car_IDs, edge_IDs):
+    '''Returns a detailed Exception if any of car_IDs or edge_IDs cannot be stored in a snapshot stream:  IDs must be 64-bit integers,
+    and no Edge may use WAITING_EDGE_ID.
+    '''
+    for item_name, IDs in (("Car", car_IDs), ("Edge", edge_IDs)):
+        for ID in IDs:
+            if type(ID) is not int or not -2**63 <= ID < 2**63:
+                raise Exception(item_name + " ID " + repr(ID) + " is not a 64-bit integer;  snapshot streams only store integer Car and Edge IDs.")
+    if WAITING_EDGE_ID in edge_IDs:
+        raise Exception("Edge ID " + str(WAITING_EDGE_ID) + " is reserved in snapshot streams for Cars waiting to enter the Network.")
+    return True
+
+
+class SnapshotStreamWriter:
+    def __init__(self, file_path, buffer_size = 4194304) -> None:
+        '''Append-only sink for per-tick Car state, written as compact fixed-width columns (33 bytes per Car per tick).
+        Ticks are encoded into an in-memory buffer and written to disk in batches of at least buffer_size bytes.
+        If file_path already holds a snapshot stream, new ticks are appended to it.
+        Attributes:
+            file_path:  Path of the snapshot stream data file.
+            index_file_path:  Path of the index file mapping timestamps to byte offsets (file_path + '.idx').
+            buffer_size:  Number of buffered bytes that triggers a write to disk.
+            data_buffer:  Encoded tick blocks not yet written to file_path.
+            index_buffer:  Encoded index entries not yet written to index_file_path.
+            file_offset:  Byte offset in file_path at which the next tick block starts.
+        '''
+        self.file_path = file_path
+        self.index_file_path = file_path + INDEX_SUFFIX
+        self.buffer_size = buffer_size
+        self.data_buffer = bytearray()
+        self.index_buffer = bytearray()
+
+        if os.path.exists(file_path) and os.path.getsize(file_path) > 0:
+            with open(file_path, 'rb') as existing_file:
+                if existing_file.read(len(FILE_MAGIC)) != FILE_MAGIC:
+                    raise Exception(file_path, "exists and is not a snapshot stream.")
+        else:
+            with open(file_path, 'wb') as new_file:
+                new_file.write(FILE_MAGIC)
+            with open(self.index_file_path, 'wb'):
+                pass
+        self.data_file = open(file_path, 'ab')
+        self.index_file = open(self.index_file_path, 'ab')
+        self.file_offset = os.path.getsize(file_path)
+
+
+    def write_tick(self, timestamp, cars):
+        '''Buffers one tick block holding the current state of every Car in cars.
+        Car and Edge IDs must be 64-bit integers (see check_stream_IDs());  otherwise an Exception naming the Car is raised
+        and nothing is written for this tick.
+        '''
+        car_IDs = array('q')
+        edge_IDs = array('q')
+        positions = array('d')
+        potentials = array('d')
+        statuses = array('B')
+        for car in cars:
+            if car is None:
+                continue
+            try:
+                car_IDs.append(car.id)
+                if car.current_edge is None:    # waiting to enter the Network
+                    edge_IDs.append(WAITING_EDGE_ID)
+                    positions.append(float('nan'))
+                else:
+                    edge_IDs.append(car.current_edge)
+                    positions.append(car.current_pos_meter_car_front)
+            except (TypeError, OverflowError) as E:
+                raise Exception("Car " + repr(car.id) + " on Edge " + repr(car.current_edge)
+                                + ":  snapshot streams only store 64-bit integer Car and Edge IDs.") from E
+            potentials.append(car.max_tick_potential)     # written between ticks, when every Car's potential is restored
+            statuses.append(get_status_code(car.route_status))
+
+        block_start = len(self.data_buffer)
+        self.data_buffer += TICK_HEADER.pack(timestamp, len(car_IDs))
+        for column in (car_IDs, edge_IDs, positions, potentials, statuses):
+            if sys.byteorder == 'big':
+                column.byteswap()
+            self.data_buffer += column.tobytes()
+        self.data_buffer += bytes(-len(self.data_buffer) % 8)
+
+        self.index_buffer += INDEX_ENTRY.pack(timestamp, self.file_offset)
+        self.file_offset += len(self.data_buffer) - block_start
+
+        if len(self.data_buffer) >= self.buffer_size:
+            self.flush()
+
+
+    def flush(self):
+        '''Writes all buffered tick blocks to disk.
+        The data file is written before the index, so the index never refers to a tick that is not on disk.
+        '''
+        self.data_file.write(self.data_buffer)
+        self.data_file.flush()
+        self.index_file.write(self.index_buffer)
+        self.index_file.flush()
+        self.data_buffer = bytearray()
+        self.index_buffer = bytearray()
+
+
+    def close(self):
+        '''Flushes remaining buffered ticks and closes the files.
+        '''
+        self.flush()
+        self.data_file.close()
+        self.index_file.close()
+
+
+class SnapshotStreamReader:
+    def __init__(self, file_path) -> None:
+        '''Random-access reader for files written by SnapshotStreamWriter.
+        The data file is memory-mapped, and ticks are located through the index file, so reading a tick only touches that tick's bytes.
+        If the index file is missing or incomplete, it is rebuilt by hopping from one tick header to the next.
+        Attributes:
+            file_path:  Path of the snapshot stream data file.
+            timestamps:  Sorted list of the timestamps stored in the file.
+            timestamp_to_offset:  Dictionary mapping timestamps to the byte offset of their tick block.
+        '''
+        self.file_path = file_path
+        self.data_file = open(file_path, 'rb')
+        self.data_map = mmap.mmap(self.data_file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.data_map[:len(FILE_MAGIC)] != FILE_MAGIC:
+            self.close()
+            raise Exception(file_path, "is not a snapshot stream.")
+
+        self.timestamp_to_offset = {}
+        index_file_path = file_path + INDEX_SUFFIX
+        if os.path.exists(index_file_path):
+            with open(index_file_path, 'rb') as index_file:
+                index_bytes = index_file.read()
+            index_bytes = index_bytes[:len(index_bytes) - len(index_bytes) % INDEX_ENTRY.size]
+            for timestamp, offset in INDEX_ENTRY.iter_unpack(index_bytes):
+                self.timestamp_to_offset[timestamp] = offset
+
+        last_offset = max(self.timestamp_to_offset.values(), default=None)
+        if last_offset is None:
+            next_offset = len(FILE_MAGIC)
+        else:
+            next_offset = last_offset + self.get_block_size(last_offset)
+        while next_offset + TICK_HEADER.size <= len(self.data_map):    # ticks missing from the index
+            timestamp = TICK_HEADER.unpack_from(self.data_map, next_offset)[0]
+            block_size = self.get_block_size(next_offset)
+            if next_offset + block_size > len(self.data_map):    # partially written tick
+                break
+            self.timestamp_to_offset[timestamp] = next_offset
+            next_offset += block_size
+
+        self.timestamps = sorted(self.timestamp_to_offset)
+
+
+    def get_block_size(self, offset):
+        '''Returns the size in bytes of the tick block starting at offset, including its header and padding.
+        '''
+        number_cars = TICK_HEADER.unpack_from(self.data_map, offset)[1]
+        block_size = TICK_HEADER.size
+        for column_name, typecode in COLUMN_TYPECODES:
+            block_size += number_cars * array(typecode).itemsize
+        return block_size + (-block_size % 8)
+
+
+    def get_timestamps(self):
+        '''Returns the sorted list of timestamps stored in the file.
+        '''
+        return self.timestamps
+
+
+    def get_nearest_timestamp(self, timestamp):
+        '''Returns the latest stored timestamp at or before timestamp, or None if there is none.
+        '''
+        position = bisect.bisect_right(self.timestamps, timestamp)
+        if position == 0:
+            return None
+        return self.timestamps[position - 1]
+
+
+    def read_tick(self, timestamp):
+        '''Returns a dictionary of columns (arrays) for the given tick:  "car_id", "edge_id", "position", "potential", "status".
+        "status" holds status codes;  see STATUS_NAMES.  "timestamp" and "number_cars" are included as well.
+        '''
+        if timestamp not in self.timestamp_to_offset:
+            raise Exception("There is no snapshot for timestamp", timestamp, "in", self.file_path)
+        offset = self.timestamp_to_offset[timestamp]
+        number_cars = TICK_HEADER.unpack_from(self.data_map, offset)[1]
+        offset += TICK_HEADER.size
+
+        columns = {"timestamp": timestamp, "number_cars": number_cars}
+        for column_name, typecode in COLUMN_TYPECODES:
+            column = array(typecode)
+            column_size = number_cars * column.itemsize
+            column.frombytes(self.data_map[offset:offset + column_size])
+            if sys.byteorder == 'big':
+                column.byteswap()
+            columns[column_name] = column
+            offset += column_size
+        return columns
+
+
+    def read_tick_cars(self, timestamp):
+        '''Returns the given tick as a list of Car dictionaries using the Car snapshot keys
+        "id", "current_edge", "current_pos_meter_car_front", "current_tick_potential", and "route_status".
+        Waiting Cars have current_edge and current_pos_meter_car_front set to None.
+        '''
+        columns = self.read_tick(timestamp)
+        cars = []
+        for car_ID, edge_ID, position, potential, status in zip(columns["car_id"], columns["edge_id"], columns["position"],
+                                                                columns["potential"], columns["status"]):
+            car = {}
+            car["id"] = car_ID
+            car["current_edge"] = edge_ID if edge_ID != WAITING_EDGE_ID else None
+            car["current_pos_meter_car_front"] = position if edge_ID != WAITING_EDGE_ID else None
+            car["current_tick_potential"] = potential
+            car["route_status"] = STATUS_NAMES.get(status, 'Other')
+            cars.append(car)
+        return cars
+
+
+    def close(self):
+        '''Releases the memory map and closes the data file.
+        '''
+        self.data_map.close()
+        self.data_file.close()
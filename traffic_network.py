@@ -1,20 +1,64 @@
+from car_archive import CarArchive
 from network_cars import Car
+from network_loader import NetworkIndex, build_network_index, load_default_config, pause_garbage_collection, resume_garbage_collection
+from network_routing import Router
+from simulation_random import CounterRandom, create_seed, hash_key
 
 import collections
 import copy
+import heapq
+import itertools
+import logging
 import random
 from cmath import inf
-import json
+
+logger = logging.getLogger("Traffic_Simulator." + __name__)
+EMPTY_EDGE_SET = frozenset()     # open inbound Edges of a Node while all of its lights are red
+
+# Edge travel-time estimates ('Fastest_now' routing), see Edge.update_travel_time_estimate()
+TRAVEL_TIME_SMOOTHING = 0.3      # weight of the latest tick in the exponentially weighted moving average
+MINIMUM_SPEED_FRACTION = 0.05    # caps estimates at 20 times the free-flow travel time
+CONGESTION_FACTOR = 0.15         # occupancy penalty:  free-flow time * (1 + CONGESTION_FACTOR * (Cars / max_capacity) ** CONGESTION_POWER)
+CONGESTION_POWER = 4
 
 class Network:
-    def __init__(self, TrafficManagerPointer, config) -> None:
+    def __init__(self, TrafficManagerPointer, config, route_cache_size = 100000, edge_backend = 'python', check_invariants = False, seed = None, shuffle_rng = 'mersenne', car_archive_file = None) -> None:
         '''Contains all functions and attributes pertaining to the (road) network as a whole.
         Attributes:
             TrafficManager_pointer:  Identifies which TrafficManger simulation is associated with this network
             node_ID_to_node:  Dictionary mapping Node IDs to Node objects.
             edge_ID_to_edge:  Dictionary mapping Edge IDs to Edge objects.
-            car_ID_to_car:  Dictionary mapping Car IDs to Car objects.
-            global_tick:  Tick index, aligns with TrafficManager tick
+            car_ID_to_car:  Dictionary mapping Car IDs to Car objects, for every Car that has not finished its trip (see car_archive).
+            global_tick:  Tick index, aligns with TrafficManager tick.  Cars restore their tick potential lazily, the first time
+                they are moved on a new global_tick (see Car.refresh_tick_potential()).
+            router:  Shortest-path engine used to assign 'Shortest', 'Fastest', 'Fastest_now', and 'Random' routes.
+                Keeps an LRU cache of up to route_cache_size paths, cleared whenever the Network topology changes.
+            active_edge_ID_to_edge:  Dictionary mapping IDs to Edge objects for every Edge holding current, waiting, or processed Cars.
+                Only Nodes touching an active Edge are ticked.
+            vectorized_edge_engine:  VectorizedEdgeEngine used to advance Cars along Edges when edge_backend = 'numpy'.
+                None when edge_backend = 'python' (default), in which case Edge.advance_current_cars() is used.
+            changed_car_IDs, changed_edge_IDs, changed_node_IDs:  IDs (ordered dictionary keys) of every Car, Edge, and Node whose
+                snapshot may have changed (position, Edge, status, queue membership) since the last call to get_snapshot_deltas().
+            track_changes:  If False, the changed IDs are discarded at the end of every tick (see discard_changes()), so that they
+                do not grow with the length of a simulation that never calls get_snapshot_deltas().
+            stoplight_node_ID_to_node:  Dictionary mapping IDs to Node objects for every Node with a stoplight_pattern.
+            vacated_edge_ID_to_edge:  Edges that lost their last Car since the last call to update_travel_time_estimates().
+            congested_edge_ID_to_edge:  Edges whose travel_time_estimate is above their free-flow travel time;  they keep being updated
+                (relaxing back to free flow) while empty.
+            deltas_global_tick:  global_tick at the last call to get_snapshot_deltas(), used to find Nodes whose stoplight moved on to another set.
+            check_invariants:  If True, every Edge tick verifies that its Cars are still ordered by position (debug mode).
+            seed:  Seed of this Network's random number generators (drawn from the operating system if not given).
+                The same seed, config, and Cars always give the same simulation.
+            rng:  random.Random generator used for 'Random' routes (and for tick order shuffles unless shuffle_rng = 'counter').
+            car_keyed_random_routes:  If True, every 'Random' route is drawn from its own generator, keyed on the Car and global_tick
+                (see get_car_route_rng()), instead of from rng.  Used by partition workers, so that routes do not depend on the partitioning.
+            shuffle_rng:  Generator used to shuffle the order in which Nodes and Edges tick:  rng ('mersenne', default),
+                or a CounterRandom ('counter', see simulation_random.py).
+            car_archive:  CarArchive holding the Cars that finished their trip (completed their route or were removed),
+                spilling them to car_archive_file if given.  See archive_finished_cars().
+            finished_car_IDs:  IDs of Cars that finished their trip since the last call to archive_finished_cars().
+            first_generated_car_ID:  First Car ID reserved for the Cars of a DemandGenerator, or None (see reserve_generated_car_IDs()).
+            next_generated_car_ID:  Lowest Car ID a newly set DemandGenerator may start from, or None.
         '''
         self.TrafficManager_pointer = TrafficManagerPointer
         self.node_ID_to_node = collections.defaultdict(lambda: None)
@@ -24,34 +68,81 @@ class Network:
         self.node_default_config = {}
         self.car_default_config = {}
         self.global_tick = 0
+        self.router = Router(self, route_cache_size)
+        self.active_edge_ID_to_edge = {}
+        self.changed_car_IDs = {}
+        self.changed_edge_IDs = {}
+        self.changed_node_IDs = {}
+        self.track_changes = True
+        self.stoplight_node_ID_to_node = {}
+        self.vacated_edge_ID_to_edge = {}
+        self.congested_edge_ID_to_edge = {}
+        self.deltas_global_tick = self.global_tick
+        self.check_invariants = check_invariants
+        self.shuffle_rng_type = shuffle_rng
+        self.car_keyed_random_routes = False
+        self.set_seed(seed)
+        self.car_archive = CarArchive(car_archive_file)
+        self.finished_car_IDs = []
+        self.first_generated_car_ID = None
+        self.next_generated_car_ID = None
+
+        if edge_backend == 'python':
+            self.vectorized_edge_engine = None
+        elif edge_backend == 'numpy':
+            from vectorized_edges import VectorizedEdgeEngine    # numpy is only required for this backend
+            self.vectorized_edge_engine = VectorizedEdgeEngine()
+        else:
+            raise Exception('"', edge_backend, '" is not a supported edge backend.  Instead try "python" or "numpy".')
 
-        # load edge default config
-        try:
-            with open("./configs/DEFAULT_edge_values_config.json") as edge_defaults:   # need fully qualified path, not relative
-                self.edge_default_config = json.load(edge_defaults)
-        except:
-            print("Edge value defaults configuration file is missing.")
-
-        # load node default config
-        try:
-            with open("./configs/DEFAULT_node_values_config.json") as node_defaults:   # need fully qualified path, not relative
-                self.node_default_config = json.load(node_defaults)
-        except:
-            print("Node value defaults configuration file is missing.")    
+        # load default configs (parsed once per process, see network_loader.py)
+        self.edge_default_config = load_default_config("edge")
+        if self.edge_default_config is None:
+            self.edge_default_config = {}
+            logger.warning("Edge value defaults configuration file is missing.")
 
-        # load car default config
-        try:
-            with open("./configs/DEFAULT_car_values_config.json") as car_defaults:   # need fully qualified path, not relative
-                self.car_default_config = json.load(car_defaults)
-        except:
-            print("No Car object defaults have been given.  May raise errors if incomplete Car objects are added to the Network.")  
+        self.node_default_config = load_default_config("node")
+        if self.node_default_config is None:
+            self.node_default_config = {}
+            logger.warning("Node value defaults configuration file is missing.")
 
+        self.car_default_config = load_default_config("car")
+        if self.car_default_config is None:
+            self.car_default_config = {}
+            logger.warning("No Car object defaults have been given.  May raise errors if incomplete Car objects are added to the Network.")
 
         # create dictionaries mapping Node and Edge objects to Network
-        for node in config["node_list"]:
-            self.add_node(node)
-        for edge in config["edge_list"]:
-            self.add_edge(edge)
+        if not isinstance(config, NetworkIndex):
+            config = build_network_index(config, self.node_default_config, self.edge_default_config)
+        self.load_network_index(config)
+
+    def set_seed(self, seed = None):
+        '''Resets this Network's random number generators to seed (drawn from the operating system if None).
+        '''
+        if seed is None:
+            seed = create_seed()
+        self.seed = seed
+        self.rng = random.Random(seed)
+        if self.shuffle_rng_type == 'mersenne':
+            self.shuffle_rng = self.rng
+        elif self.shuffle_rng_type == 'counter':
+            self.shuffle_rng = CounterRandom(seed)
+        else:
+            raise Exception('"', self.shuffle_rng_type, '" is not a supported shuffle generator.  Instead try "mersenne" or "counter".')
+
+    def get_seed(self):
+        '''Returns the seed of this Network's random number generators.
+        '''
+        return self.seed
+
+    def get_car_route_rng(self, car_ID, start_edge_ID):
+        '''Returns the generator for a 'Random' route of the Car associated with car_ID from start_edge_ID:  None (rng is used),
+        or, with car_keyed_random_routes, a CounterRandom keyed on (seed, car_ID, global_tick, start_edge_ID), so that the route
+        is the same whichever process draws it and whatever else was drawn before.
+        '''
+        if not self.car_keyed_random_routes:
+            return None
+        return CounterRandom(hash_key(self.seed, car_ID, self.global_tick, start_edge_ID))
 
     def get_Network_pointer(self):
         '''Returns tick index (which aligns with TrafficManager tick).
@@ -64,21 +155,34 @@ class Network:
         '''
         return self.global_tick
 
-    def get_snapshot(self):
+    def get_snapshot(self, include_completed_cars = True):
         '''Outputs dictionary containing snapshot data for all nodes and edges in the network.
+        Cars that finished their trip are read back from the car_archive (from disk, if spilled) and listed under "completed_cars",
+        and under the "completed_cars" of the Edge they finished on.  Set include_completed_cars = False to skip them.
         '''
         car_set = set()
         completed_car_set = set()
         snapshot = {}
 
+        archived_car_snapshots = []
+        edge_ID_to_archived_car_IDs = collections.defaultdict(list)
+        if include_completed_cars:
+            for car_raw in self.car_archive.get_car_snapshots():
+                archived_car_snapshots.append(car_raw)
+                edge_ID_to_archived_car_IDs[car_raw["current_edge"]].append(car_raw["id"])
+
         edge_snapshots = []
         for edge_key in self.edge_ID_to_edge:
             edge = self.edge_ID_to_edge[edge_key]
             edge_raw = edge.get_snapshot()
             for car_id in edge_raw["current_cars"]:  
                 car_set.add(car_id)
-            for car_id in edge_raw["completed_cars"]:  
-                completed_car_set.add(car_id)
+            if include_completed_cars:
+                for car_id in edge_raw["completed_cars"]:  
+                    completed_car_set.add(car_id)
+                edge_raw["completed_cars"] = edge_ID_to_archived_car_IDs.get(edge_key, []) + edge_raw["completed_cars"]
+            else:
+                edge_raw["completed_cars"] = []
             edge_snapshots.append(edge_raw)
         snapshot["edge_list"] = edge_snapshots
 
@@ -90,12 +194,12 @@ class Network:
         snapshot["node_list"] = node_snapshots
 
         car_snapshots_current = []
-        car_snapshots_completed = []
+        car_snapshots_completed = archived_car_snapshots
         for car_id in car_set:   # cars on edge
             car = self.car_ID_to_car[car_id]
             car_raw = car.get_snapshot()
             car_snapshots_current.append(car_raw)
-        for car_id in completed_car_set:    # cars that completed their route on this edge
+        for car_id in completed_car_set:    # cars that finished their trip on this edge, not yet archived
             car = self.car_ID_to_car[car_id]
             car_raw = car.get_snapshot()
             car_snapshots_completed.append(car_raw)
@@ -104,6 +208,101 @@ class Network:
         return snapshot
 
 
+    def get_snapshot_deltas(self):
+        '''Outputs dictionary containing snapshot data for only the Nodes, Edges, and Cars that changed since the previous call.
+        Keys match get_snapshot(), so TrafficManager.apply_snapshot_deltas() can rebuild a full snapshot from a base and a chain of deltas.
+        Cars waiting to enter the Network are not listed (as in get_snapshot()), but the waiting queue of their Edge is.
+        Edge "completed_cars" only list the Cars that finished on the Edge and are not archived yet (see TrafficManager.apply_snapshot_deltas()).
+        '''
+        for node_ID, node in self.stoplight_node_ID_to_node.items():
+            if node.get_stoplight_pattern_current_index(self.deltas_global_tick) != node.get_stoplight_pattern_current_index():
+                self.changed_node_IDs[node_ID] = None
+        self.deltas_global_tick = self.global_tick
+
+        snapshot = {}
+        snapshot["edge_list"] = [self.edge_ID_to_edge[edge_ID].get_snapshot() for edge_ID in self.changed_edge_IDs]
+        snapshot["node_list"] = [self.node_ID_to_node[node_ID].get_snapshot() for node_ID in self.changed_node_IDs]
+
+        car_snapshots_current = []
+        car_snapshots_completed = []
+        archived_car_IDs = set()
+        for car_ID in self.changed_car_IDs:
+            car = self.car_ID_to_car.get(car_ID)
+            if car is None:    # finished and archived since the previous call
+                archived_car_IDs.add(car_ID)
+                continue
+            route_status = car.get_route_status()
+            if route_status == 'Route Completed' or route_status.startswith('Removed from simulation'):
+                car_snapshots_completed.append(car.get_snapshot())
+            elif car.get_current_edge() is not None:    # otherwise still waiting to enter the Network
+                car_snapshots_current.append(car.get_snapshot())
+        if archived_car_IDs:
+            car_snapshots_completed.extend(self.car_archive.get_car_snapshots(archived_car_IDs))
+        snapshot["current_cars"] = car_snapshots_current
+        snapshot["completed_cars"] = car_snapshots_completed
+
+        self.changed_car_IDs = {}
+        self.changed_edge_IDs = {}
+        self.changed_node_IDs = {}
+        return snapshot
+
+    def discard_changes(self):
+        '''Forgets which Nodes, Edges, and Cars changed, without building their snapshots.
+        Called at the end of every tick when track_changes is False.
+        '''
+        self.changed_car_IDs = {}
+        self.changed_edge_IDs = {}
+        self.changed_node_IDs = {}
+        self.deltas_global_tick = self.global_tick
+
+
+    def load_network_index(self, network_index):
+        '''Creates every Node and Edge of network_index (see network_loader.py) at once, with the same result as calling
+        add_node() and add_edge() on each Node and Edge of the config in order, but without per-field lookups or per-Edge cache invalidation.
+        '''
+        was_enabled = pause_garbage_collection()
+        try:
+            node_columns = network_index.node_columns
+            stoplight_patterns = network_index.node_index_to_stoplight_pattern
+            nodes = [Node(self, node_ID, intersection_cost, stoplight_patterns.get(node_index), stoplight_duration, stoplight_delay)
+                     for node_index, (node_ID, intersection_cost, stoplight_duration, stoplight_delay)
+                     in enumerate(zip(network_index.node_IDs,
+                                      node_columns["intersection_time_cost"],
+                                      node_columns["stoplight_duration"],
+                                      node_columns["stoplight_delay"]))]
+            for node in nodes:
+                if node.get_node_ID() in self.node_ID_to_node:
+                    raise Exception("There is already a Node with this ID")
+
+            edge_columns = network_index.edge_columns
+            node_IDs = network_index.node_IDs
+            edges = [Edge(edge_ID, node_IDs[start_node_index], node_IDs[end_node_index], edge_length, speed_limit, max_capacity)
+                     for edge_ID, start_node_index, end_node_index, edge_length, speed_limit, max_capacity
+                     in zip(network_index.edge_IDs,
+                            network_index.edge_start_node_indices,
+                            network_index.edge_end_node_indices,
+                            edge_columns["edge_length"],
+                            edge_columns["max_speed"],
+                            edge_columns["max_capacity"])]
+            for edge, start_node_index, end_node_index in zip(edges, network_index.edge_start_node_indices, network_index.edge_end_node_indices):
+                edge.Network_pointer = self
+                edge.start_node = nodes[start_node_index]
+                edge.end_node = nodes[end_node_index]
+
+            edge_IDs = network_index.edge_IDs
+            for node_index, node in enumerate(nodes):
+                node.outbound_edge_ID_to_edge.update((edge_IDs[edge_index], edges[edge_index]) for edge_index in network_index.get_outbound_edge_indices(node_index))
+                node.inbound_edge_ID_to_edge.update((edge_IDs[edge_index], edges[edge_index]) for edge_index in network_index.get_inbound_edge_indices(node_index))
+
+            self.node_ID_to_node.update(zip(node_IDs, nodes))
+            for node_index in network_index.node_index_to_stoplight_pattern:
+                self.stoplight_node_ID_to_node[node_IDs[node_index]] = nodes[node_index]
+            self.edge_ID_to_edge.update(zip(edge_IDs, edges))
+            self.router.invalidate_cache()
+        finally:
+            resume_garbage_collection(was_enabled)
+
+
     def add_node(self, node):
         '''Imports node(s) from given node dictionary and adds them to the network.
         '''
@@ -138,6 +337,9 @@ class Network:
         if self.node_ID_to_node[new_node.get_node_ID()]:
             raise Exception("There is already a Node with this ID")
         self.node_ID_to_node[new_node.get_node_ID()] = new_node
+        if stoplight_pattern is not None:
+            self.stoplight_node_ID_to_node[new_node.get_node_ID()] = new_node
+        self.router.invalidate_cache()
 
 
     def add_edge(self, edge):
@@ -163,7 +365,6 @@ class Network:
             max_capacity = self.edge_default_config["max_capacity"]
             if max_capacity == 'Infinity':
                 max_capacity = inf
-                print(max_capacity)
 
         # create new Edge object
         new_edge = Edge(edge["id"],
@@ -175,6 +376,7 @@ class Network:
 
         if new_edge.get_start_node_id() in self.node_ID_to_node:
             if new_edge.get_end_node_id() in self.node_ID_to_node:
+                new_edge.set_Network_pointer(self)
                 start_node = self.node_ID_to_node[new_edge.get_start_node_id()]
                 new_edge.set_start_node(start_node)
                 start_node.add_to_outbound(new_edge)
@@ -184,6 +386,7 @@ class Network:
                 end_node.add_to_inbound(new_edge)
 
                 self.edge_ID_to_edge[new_edge.get_edge_ID()] = new_edge
+                self.router.invalidate_cache()
             else:
                 raise Exception("End Node ID is not part of the network.")
         else:
@@ -194,6 +397,71 @@ class Network:
         Validity checks have been passed up to the TrafficManager level as a part of "add_car(car)",
         ensuring that any Cars received are valid OR can be made valid using the DEFAULT_car_values_config.json file.
         '''
+        # calculate path if absent, using "route_preference" as the assignment metric
+        if "path" in car:
+            path = car["path"]           
+        else:    
+            path = self.calculate_path(car["start_edge"], car["end_edge"], self.get_car_route_preference(car),
+                                       self.get_car_route_rng(car["id"], car["start_edge"]))
+            if path == []:
+                raise Exception("There is no possible path to this car's destination.")
+            path = path[1:]    # Car.path only lists upcoming Edges, as given in car configs
+
+        new_car = self.create_car(car, path)
+        self.car_ID_to_car[new_car.get_car_ID()] = new_car
+        start_edge_ID = new_car.get_start_edge()
+        start_edge = self.edge_ID_to_edge[start_edge_ID]
+        start_edge.add_car_to_wait_queue(new_car)
+        logger.debug("Adding Car %s to the Network waiting queue.", new_car.get_car_ID())
+
+
+    def add_cars(self, car_list):
+        '''Places every Car (dictionary object) in car_list on the waiting queue of its start_edge, with the same result as
+        calling add_car() on each of them in order.
+        Paths are calculated once per (start_edge, end_edge, route_preference) group of Cars without a given path
+        ('Random' routes are still drawn per Car), and each start Edge's waiting queue is extended once.
+        Validity checks have been passed up to the TrafficManager level as a part of "add_cars(car_list)".
+        Every path is calculated and every Car created before any of them is placed, so if one of them has no possible path
+        an Exception is raised and none of them are added.
+        '''
+        route_key_to_path = {}
+        new_cars = []
+        for car in car_list:
+            if "path" in car:
+                path = car["path"]
+            else:
+                route_preference = self.get_car_route_preference(car)
+                route_key = (car["start_edge"], car["end_edge"], route_preference)
+                if route_preference == 'Random' or route_key not in route_key_to_path:
+                    route_key_to_path[route_key] = self.calculate_path(car["start_edge"], car["end_edge"], route_preference,
+                                                                       self.get_car_route_rng(car["id"], car["start_edge"]))
+                    if route_key_to_path[route_key] == []:
+                        raise Exception("There is no possible path to this car's destination.")
+                path = route_key_to_path[route_key][1:]    # new list per Car, as Cars consume their path
+
+            new_cars.append(self.create_car(car, path))
+
+        start_edge_ID_to_new_cars = {}
+        for new_car in new_cars:
+            self.car_ID_to_car[new_car.get_car_ID()] = new_car
+            start_edge_ID_to_new_cars.setdefault(new_car.get_start_edge(), []).append(new_car)
+        for start_edge_ID, start_edge_new_cars in start_edge_ID_to_new_cars.items():
+            self.edge_ID_to_edge[start_edge_ID].add_cars_to_wait_queue(start_edge_new_cars)
+        logger.debug("Adding %s Cars to the Network waiting queues.", len(new_cars))
+
+
+    def get_car_route_preference(self, car):
+        '''Returns the "route_preference" of car (dictionary object), or the default from DEFAULT_car_values_config.json.
+        '''
+        if "route_preference" in car:           
+            return car["route_preference"]
+        return self.car_default_config["route_preference"]
+
+
+    def create_car(self, car, path):
+        '''Returns a new Car object for car (dictionary object) following path,
+        using DEFAULT_car_values_config.json (or the Edge length, for end_pos_meter) for any value car does not give.
+        '''
         # check if values exist in config, else assign defaults
         if "start_pos_meter" in car:
             start_pos_meter = car["start_pos_meter"]
@@ -217,51 +485,36 @@ class Network:
         else:
             car_type = self.car_default_config["car_type"]
 
-        if "route_preference" in car:           
-            route_preference = car["route_preference"]
-        else:
-            route_preference = self.car_default_config["route_preference"]
-
         if "max_tick_potential" in car:
             max_tick_potential = car["max_tick_potential"]           
         else:
             max_tick_potential = 1
 
-        # calculate path if absent, using "route_preference" as the assignment metric
-        if "path" in car:
-            path = car["path"]           
-        else:    
-            potential_paths_list = self.all_paths_depth_first_search(car["start_edge"], car["end_edge"], [], [])
-            path = self.choose_path(potential_paths_list, route_preference)
-
-
         # create the Car object
-        new_car = Car(car["id"],
-                        car_length,
-                        car["start_edge"],
-                        start_pos_meter,
-                        car["end_edge"],
-                        end_pos_meter,
-                        path,
-                        car_type,
-                        route_preference,
-                        max_tick_potential)
-        self.car_ID_to_car[new_car.get_car_ID()] = new_car
-        start_edge_ID = new_car.get_start_edge()
-        start_edge = self.edge_ID_to_edge[start_edge_ID]
-        start_edge.add_car_to_wait_queue(new_car)
-        print("Adding Car" , new_car.get_car_ID(), "to the Network waiting queue.")
-
-
-    def check_valid_car(self, car):
+        return Car(car["id"],
+                   car_length,
+                   car["start_edge"],
+                   start_pos_meter,
+                   car["end_edge"],
+                   end_pos_meter,
+                   path,
+                   car_type,
+                   self.get_car_route_preference(car),
+                   max_tick_potential)
+
+
+    def check_valid_car(self, car, generated = False):
         '''Returns a detailed Exception if the given car does not conform to expected input structure.
+        The IDs of generated Cars (from a DemandGenerator) are unique by construction, so they are not looked up in the car_archive.
         '''
         car_ID = car["id"]  # check uniqueness
-        if car_ID in list(self.car_ID_to_car.keys()):
+        if car_ID in self.car_ID_to_car or (not generated and self.car_archive.contains(car_ID)):
             raise Exception("That car ID already exists.")
+        if not generated and self.is_generated_car_ID(car_ID):
+            raise Exception("That car ID is reserved for generated cars.")
         
         start_edge_ID = car["start_edge"]
-        if start_edge_ID not in list(self.edge_ID_to_edge.keys()):
+        if start_edge_ID not in self.edge_ID_to_edge:
             raise Exception("Start edge does not exist")
 
         # Default start_pos_meter set to 0 on addition if absent
@@ -271,6 +524,8 @@ class Network:
         #     raise Exception("Start position exceeds max edge length")
 
         end_edge_ID = car["end_edge"]
+        if end_edge_ID not in self.edge_ID_to_edge:
+            raise Exception("End edge does not exist")
         end_edge = self.edge_ID_to_edge[end_edge_ID]
         end_pos_meter = car["end_pos_meter"]
         if end_pos_meter > end_edge.get_length():
@@ -283,16 +538,73 @@ class Network:
                 if path_edge_list[-1] != end_edge_ID:
                     raise Exception("Path invalid: end does not match ")
                 for edge in path_edge_list:
-                    if edge not in list(self.edge_ID_to_edge.keys()):
+                    if edge not in self.edge_ID_to_edge:
                         raise Exception("Path has edges that do not exist")
             else:
-                print("Calculating path on placement.")
+                logger.debug("Calculating path on placement.")
         return True
+
+
+    def check_valid_cars(self, car_list, generated = False):
+        '''Returns a detailed Exception (naming the Car) if any car in car_list does not conform to expected input structure,
+        including Car IDs repeated within car_list.  Every check is a dictionary or set lookup, so this takes time proportional to len(car_list).
+        '''
+        new_car_IDs = set()
+        for car in car_list:
+            try:
+                self.check_valid_car(car, generated)
+                if car["id"] in new_car_IDs:
+                    raise Exception("That car ID already exists.")
+            except Exception as E:
+                raise Exception("Invalid car", car.get("id"), ":", *E.args) from E
+            new_car_IDs.add(car["id"])
+        return True
+
+
+    def check_valid_od_entries(self, od_entries):
+        '''Returns a detailed Exception (naming the entry) if any OD entry of a DemandGenerator (see demand_generator.py) would
+        generate Cars that cannot be placed, so that it is reported when the generator is set rather than in the middle of a tick.
+        Whether a path exists does not depend on the route_preference, so every entry is checked with a 'Shortest' path.
+        '''
+        for entry_index, entry in enumerate(od_entries):
+            start_edge_ID = entry["start_edge"]
+            end_edge_ID = entry["end_edge"]
+            if start_edge_ID not in self.edge_ID_to_edge:
+                raise Exception("Invalid OD entry", entry_index, ":", "Start edge does not exist")
+            if end_edge_ID not in self.edge_ID_to_edge:
+                raise Exception("Invalid OD entry", entry_index, ":", "End edge does not exist")
+            if "end_pos_meter" in entry and entry["end_pos_meter"] > self.edge_ID_to_edge[end_edge_ID].get_length():
+                raise Exception("Invalid OD entry", entry_index, ":", "End position exceeds max edge length")
+            if "path" not in entry and self.calculate_path(start_edge_ID, end_edge_ID, 'Shortest') == []:
+                raise Exception("Invalid OD entry", entry_index, ":", "There is no possible path to this entry's end edge.")
+        return True
+
+
+    def reserve_generated_car_IDs(self, first_car_ID):
+        '''Reserves every integer Car ID from first_car_ID up for the Cars of a DemandGenerator (see TrafficManager.set_demand_generator()).
+        Cars added by other means may no longer use these IDs, and the car_archive does not keep them (see CarArchive.first_unrecorded_car_ID),
+        so that its memory does not grow with the number of generated Cars.  A later DemandGenerator must start after every ID already generated.
+        '''
+        if self.first_generated_car_ID is None:
+            for car_ID in itertools.chain(self.car_ID_to_car, self.car_archive.car_IDs):
+                if isinstance(car_ID, int) and car_ID >= first_car_ID:
+                    raise Exception("Car ID " + str(car_ID) + " is already in use;  generated Car IDs must start above it.")
+            self.first_generated_car_ID = first_car_ID
+            self.car_archive.set_first_unrecorded_car_ID(first_car_ID)
+        elif first_car_ID < self.next_generated_car_ID:
+            raise Exception("Generated Car IDs must start after the IDs already generated (" + str(self.next_generated_car_ID) + ").")
+        self.next_generated_car_ID = first_car_ID
+
+    def is_generated_car_ID(self, car_ID):
+        '''Returns True if car_ID is reserved for generated Cars (see reserve_generated_car_IDs()).
+        '''
+        return self.first_generated_car_ID is not None and isinstance(car_ID, int) and car_ID >= self.first_generated_car_ID
         
 
     def remove_node(self, node):
         '''Placeholder for future software version:
         Will remove a Node and all of its associated inbound/outbound Edges from the Network.
+        Any implementation must call self.router.invalidate_cache() once the Network has changed.
         '''
         # raise exception: not implemented yet
         pass
@@ -300,10 +612,32 @@ class Network:
     def remove_edge(self, edge):
         '''Placeholder for future software version:
         Will remove an Edge and all of its associated Cars from the Network.
+        Any implementation must call self.router.invalidate_cache() once the Network has changed.
         '''
         # raise exception: not implemented yet
         pass
 
+    def set_edge_max_speed(self, edge_ID, new_max_speed):
+        '''Changes the speed limit of the Edge associated with edge_ID.
+        Cached routes are discarded as 'Fastest' paths may no longer be valid.
+        The Edge's travel_time_estimate moves towards its new free-flow travel time from the next tick on.
+        '''
+        edge_object = self.edge_ID_to_edge.get(edge_ID)     # get() does not insert unknown IDs into the defaultdict
+        if not edge_object:
+            raise Exception("There is no Edge associated with this ID.")
+        edge_object.set_max_speed(new_max_speed)
+        self.congested_edge_ID_to_edge[edge_ID] = edge_object
+        self.router.invalidate_cache()
+
+    def set_edge_max_capacity(self, edge_ID, new_max_capacity):
+        '''Changes the maximum number of Cars allowed on the Edge associated with edge_ID.
+        Cars already on the Edge stay;  no new Car enters while the Edge is at (or over) the new capacity.
+        '''
+        edge_object = self.edge_ID_to_edge.get(edge_ID)
+        if not edge_object:
+            raise Exception("There is no Edge associated with this ID.")
+        edge_object.set_max_capacity(new_max_capacity)
+
     def get_node_from_id(self, node_id):
         '''Uses Network.node_ID_to_node dictionary to map a Node IDs to its corresponding Node object.
         '''
@@ -316,34 +650,123 @@ class Network:
 
     def tick(self):
         '''Shuffles the order in which Node ticks will be processed with each global tick to ensure no node is favored.
+        Only Nodes with an active inbound or outbound Edge are ticked, as no other Node can move or receive a Car.
         Note:  global tick != Node tick.  Global tick is the unit of time until the next state of the simulation, 
         while Node tick the proportion of that time that its components can move uninterrupted.  
         Node ticks will occur until the sum of their durations reaches that of a global tick/no further movement is possible.
+        Returns [expended, max] energy and the number of Cars that crossed a Node.
         '''
-        node_keys = list(self.node_ID_to_node.keys())
+        node_keys = list(self.get_active_node_IDs())
         expended_energy = 0                       # work actually done
         sum_maximum_expendible_energy = 0         # maximum work possible
+        number_crossings = 0
 
-        random.shuffle(node_keys)
+        self.shuffle_rng.shuffle(node_keys)
         for node_key in node_keys:
             node = self.node_ID_to_node[node_key]
             node_tick_outputs = node.tick()
             expended_energy += node_tick_outputs[0]
             sum_maximum_expendible_energy += node_tick_outputs[1]
+            number_crossings += node_tick_outputs[2]
+
+        return expended_energy, sum_maximum_expendible_energy, number_crossings
+
+    def get_active_node_IDs(self):
+        '''Returns the IDs of all Nodes that are the start or end of an active Edge (ordered dictionary keys, without repeats).
+        '''
+        active_node_IDs = {}
+        for edge in self.active_edge_ID_to_edge.values():
+            active_node_IDs[edge.get_start_node_id()] = None
+            active_node_IDs[edge.get_end_node_id()] = None
+        return active_node_IDs.keys()
+
+    def activate_edge(self, edge):
+        '''Marks edge as holding Cars, so that its Nodes are included in Network.tick.
+        '''
+        edge_ID = edge.get_edge_ID()
+        if edge_ID not in self.active_edge_ID_to_edge:
+            self.active_edge_ID_to_edge[edge_ID] = edge
+            edge.get_start_node().active_outbound_edge_ID_to_edge[edge_ID] = edge
+            edge.get_end_node().active_inbound_edge_ID_to_edge[edge_ID] = edge
+
+    def deactivate_edge(self, edge):
+        '''Removes edge from the active Edges once it no longer holds any Cars.
+        '''
+        edge_ID = edge.get_edge_ID()
+        if edge_ID in self.active_edge_ID_to_edge:
+            del self.active_edge_ID_to_edge[edge_ID]
+            del edge.get_start_node().active_outbound_edge_ID_to_edge[edge_ID]
+            del edge.get_end_node().active_inbound_edge_ID_to_edge[edge_ID]
+            self.vacated_edge_ID_to_edge[edge_ID] = edge
+
+    def update_travel_time_estimates(self):
+        '''Folds this tick's observations into the travel_time_estimate of every Edge that held Cars during the tick
+        or is still relaxing back to free flow (see Edge.update_travel_time_estimate()).
+        Called once per global tick, so 'Fastest_now' routes read ready-made weights;  routes calculated with the previous
+        weights are discarded.
+        Returns a dictionary mapping the IDs of the updated Edges to their Edge objects.
+        '''
+        edge_ID_to_edge = dict(self.active_edge_ID_to_edge)
+        edge_ID_to_edge.update(self.vacated_edge_ID_to_edge)
+        edge_ID_to_edge.update(self.congested_edge_ID_to_edge)
+        self.vacated_edge_ID_to_edge = {}
+        for edge_ID, edge in edge_ID_to_edge.items():
+            if edge.update_travel_time_estimate():
+                self.congested_edge_ID_to_edge[edge_ID] = edge
+            else:
+                self.congested_edge_ID_to_edge.pop(edge_ID, None)
+        if edge_ID_to_edge:
+            self.router.invalidate_live_routes()
+        return edge_ID_to_edge
+
+    def set_travel_time_estimates(self, edge_ID_to_estimate):
+        '''Replaces the travel_time_estimate of every Edge in edge_ID_to_estimate (Edge ID to ticks), for Edges whose Cars are
+        observed elsewhere (see network_partitioning.py).  These Edges are not added to congested_edge_ID_to_edge, as their
+        estimates are updated by whoever observes them.
+        '''
+        for edge_ID, travel_time_estimate in edge_ID_to_estimate.items():
+            self.edge_ID_to_edge[edge_ID].set_travel_time_estimate(travel_time_estimate)
+        if edge_ID_to_estimate:
+            self.router.invalidate_live_routes()
+
+    def archive_finished_cars(self):
+        '''Moves every Car that finished its trip since the previous call from car_ID_to_car (and the completed_cars of its Edge)
+        to the car_archive, so that later ticks no longer visit it.  Called by TrafficManager.tick() at the end of every tick.
+        '''
+        finished_cars = []
+        for car_ID in self.finished_car_IDs:
+            car = self.car_ID_to_car.pop(car_ID, None)
+            if car is not None:
+                self.edge_ID_to_edge[car.get_current_edge()].completed_cars = []
+                finished_cars.append(car)
+        self.finished_car_IDs = []
+        if finished_cars:
+            self.car_archive.add_cars(finished_cars)
+
+    def start_tick(self):
+        '''Advances global_tick, which restores the tick potential of every Car:  each Car is refreshed to its maximum potential
+        the first time it is moved on the new tick (see Car.refresh_tick_potential()), instead of in a pass over all Cars.
+        '''
+        self.global_tick += 1
 
-        return expended_energy, sum_maximum_expendible_energy
 
-    def restore_tick_potential(self):
-        '''Resets the tick_potential to its maximum value for all Cars on the Network.
+    def calculate_path(self, start_edge_ID, end_edge_ID, metric, rng = None):
+        '''Given a start and end Edge id, returns the "best" path between them with regards to input metric (see Router.get_path()).
+        Returns [] if there is no possible path.  'Random' paths are drawn with rng if given (see get_car_route_rng()).
         '''
-        for car_ID in list(self.car_ID_to_car.keys()):
-            car_object = self.car_ID_to_car[car_ID]
-            new_tick_potential = car_object.get_max_tick_potential() 
-            car_object.set_current_tick_potential(new_tick_potential)
-            
+        return self.router.get_path(start_edge_ID, end_edge_ID, metric, rng)
+
+
+    def calculate_paths(self, start_edge_IDs, end_edge_ID, metric):
+        '''Given a list of start Edge ids and one end Edge id, returns a dictionary mapping each start Edge id to its "best" path
+        with regards to input metric, computed together (see Router.get_paths()).  Paths are [] where no path is possible.
+        '''
+        return self.router.get_paths(start_edge_IDs, end_edge_ID, metric)
+
 
     def all_paths_depth_first_search(self, current_edge_ID, end_edge_ID, visited_list = [], valid_paths = []):
         '''Given a start and end Edge id, return a list of all valid paths that do not repeat Edges.
+        Note:  the number of such paths grows exponentially with Network size.  Use calculate_path() to route Cars.
         '''
         visited_list.append(current_edge_ID)
         
@@ -404,15 +827,30 @@ class Network:
         return time_cost       
 
 
+    def path_cost_current_time(self, path_list):
+        '''Given path_list, evaluate the time it is currently expected to take to travel (in ticks), given each Edge's travel_time_estimate
+        (see Edge.update_travel_time_estimate()).  Counts Node-crossing time penalties as path_cost_minimum_time() does.
+        '''
+        time_cost = 0
+        final_edge_ID = path_list[-1]
+
+        for edge_ID in path_list:
+            edge_object = self.edge_ID_to_edge[edge_ID]
+            time_cost += edge_object.get_travel_time_estimate()
+            if edge_ID != final_edge_ID:
+                time_cost += edge_object.get_end_node().get_intersection_time_cost()
+
+        return time_cost
+
+
     def choose_path(self, all_paths_list, metric):
         '''Given a list of paths from A to B (ex: as calculated using self.all_paths_depth_first_search()),
         returns the "best" path with regards to input metric.
         Currently supported input metrics:
             'Fastest': best path = minimum total travel time (assuming no congestion).
+            'Fastest_now': best path = minimum travel time after accounting for current Network congestion.
             'Shortest': best path = shortest total distance in terms of length.
             'Random':  pay no heed to metics, choose an available path at random.
-        Future versions may include metrics like:
-            'Fastest_now': best path = minimum travel time after accounting for current Network congestion.
         '''
         path_cost_list = []
 
@@ -422,6 +860,13 @@ class Network:
                 path_cost_list.append(path_cost)
             index_minimum = path_cost_list.index(min(path_cost_list))
             return all_paths_list[index_minimum]
+
+        elif metric == 'Fastest_now':
+            for path in all_paths_list:
+                path_cost = self.path_cost_current_time(path)
+                path_cost_list.append(path_cost)
+            index_minimum = path_cost_list.index(min(path_cost_list))
+            return all_paths_list[index_minimum]
         
         elif metric == 'Shortest':
             for path in all_paths_list:
@@ -431,10 +876,10 @@ class Network:
             return all_paths_list[index_minimum]
 
         elif metric == 'Random':
-            return random.choice(all_paths_list)
+            return self.rng.choice(all_paths_list)
 
         else:
-            raise Exception('"', metric, '" is not a supported metric.  Instead try "Fastest", "Shortest", or "Random".')
+            raise Exception('"', metric, '" is not a supported metric.  Instead try "Fastest", "Fastest_now", "Shortest", or "Random".')
 
 
 class Node:
@@ -451,24 +896,37 @@ class Node:
             inbound_edge_ID_to_edge:  Dictionary mapping inbound Edge IDs to Edge objects.
             outbound_edge_ID_to_edge:  Dictionary mapping outbound Edge IDs to Edge objects.
             intersection_time_cost:  Value representing time in ticks required to cross intersection.  0 <= value < 1.
-            stoplight_pattern:  Ordered list of sets of simeltaneous Edges eligible for car exiting. Pattern cycles through sets. (Will be implemented in future versions of the software).
-            stoplight_pattern_current_index:  Index representing which set of stoplight_pattern the Node is currently on.  (Will be implemented in future versions of the software).
-            stoplight_duration: Number of ticks that the stoplight_pattern stays on its current Edge set. (Will be implemented in future versions of the software).
-            stoplight_delay: Number of ticks between change of stoplight_pattern Edge sets. (Will be implemented in future versions of the software).
-            node_tick_number:  Used in stoplight changes, increments by one with each global TrafficManager tick. (Reference function will be established in future versions of this software).
+            stoplight_pattern:  Ordered list of sets of simeltaneous inbound Edge IDs eligible for car exiting, or None (no stoplight:  every inbound Edge is eligible).
+                Pattern cycles through sets:  each set is green for stoplight_duration ticks, followed by stoplight_delay ticks during which every light is red.
+                Only Cars at the head of a green inbound Edge may cross the Node (see get_open_inbound_edge_IDs()).
+            stoplight_duration: Number of ticks that the stoplight_pattern stays on its current Edge set.
+            stoplight_delay: Number of ticks between change of stoplight_pattern Edge sets (all lights red).
+            stoplight_phase_table:  Precomputed tuple of frozensets, one per set of stoplight_pattern, so that looking up the green inbound Edges
+                on a given tick is plain arithmetic on the global tick (nothing is built per tick).  None if there is no stoplight_pattern.
+            node_tick_number:  Global tick at which the Node was created.  Its stoplight cycle starts on the following tick.
+            active_inbound_edge_ID_to_edge:  Subset of inbound_edge_ID_to_edge holding Cars (see Network.activate_edge()).
+            active_outbound_edge_ID_to_edge:  Subset of outbound_edge_ID_to_edge holding Cars (see Network.activate_edge()).
         '''
         self.id = id
         self.inbound_edge_ID_to_edge = collections.defaultdict(lambda: None)
         self.outbound_edge_ID_to_edge = collections.defaultdict(lambda: None)
+        self.active_inbound_edge_ID_to_edge = {}
+        self.active_outbound_edge_ID_to_edge = {}
         self.intersection_time_cost = intersection_cost    
 
         self.Network_pointer = Network_reference     # allows Node to call on Network's path-finding algorithms
 
         self.stoplight_pattern = stoplight_pattern
-        self.stoplight_pattern_current_index = 0
         self.stoplight_duration = stoplight_duration
         self.stoplight_delay = stoplight_delay
         self.node_tick_number = self.Network_pointer.get_Network_pointer()
+        self.stoplight_phase_table = None
+        if stoplight_pattern is not None:
+            if len(stoplight_pattern) == 0:
+                raise Exception("stoplight_pattern must hold at least one set of inbound Edge IDs.")
+            if stoplight_duration <= 0 or stoplight_delay < 0:
+                raise Exception("stoplight_duration must be positive and stoplight_delay must not be negative.")
+            self.stoplight_phase_table = tuple(frozenset(edge_IDs) for edge_IDs in stoplight_pattern)
 
 
     def add_to_inbound(self, edge):
@@ -485,123 +943,195 @@ class Node:
 
     def get_snapshot(self):
         '''Outputs dictionary of Node attributes.
+        Built directly from the relevant fields (no copy of the Node, its Edges, or the Network is made).
         '''
-        raw = copy.deepcopy(self.__dict__)
-        raw.pop("Network_pointer", {})  # exclude from snapshot
-
-        outbound_processing = raw.pop("outbound_edge_ID_to_edge", {})
-        raw["outbound_edges"] = list(outbound_processing.keys())
-        inbound_processing = raw.pop("inbound_edge_ID_to_edge", {})
-        raw["inbound_edges"] = list(inbound_processing.keys())
+        raw = {}
+        raw["id"] = self.id
+        raw["intersection_time_cost"] = self.intersection_time_cost
+        raw["stoplight_pattern"] = self.stoplight_pattern
+        raw["stoplight_pattern_current_index"] = self.get_stoplight_pattern_current_index()
+        raw["stoplight_duration"] = self.stoplight_duration
+        raw["stoplight_delay"] = self.stoplight_delay
+        raw["node_tick_number"] = self.node_tick_number
+        raw["outbound_edges"] = list(self.outbound_edge_ID_to_edge.keys())
+        raw["inbound_edges"] = list(self.inbound_edge_ID_to_edge.keys())
 
         return raw      #{"id": self.id}
 
 
     def tick(self):
         '''Facilitates Edge ticks and movement of Car objects from one Edge to another.
-        If a Car that is eligible to cross the Node has type "Dynamic", then its path is recalculated upon crossing.
+        If a Car that is eligible to cross the Node has type "Dynamic", then its path is recalculated upon crossing;
+        these recalculations are batched per destination before any Car crosses (see recalculate_car_paths()).
         Each Node tick shuffles the order in which Edges tick to ensure no particular Edge is favored. 
+        Only active Edges (those holding Cars) are considered.
+        Returns [expended, max] energy and the number of Cars that crossed this Node.
         '''
         # print("Current Node Tick: ", self.id)
         expended_energy = 0                       # work actually done
         sum_maximum_expendible_energy = 0         # maximum work possible
-        intersection_crossing_cost = self.intersection_time_cost  # absorbs time delay for crossing intersection
 
-        # look for inbound_exit_candidates
-        candidate_list_dictionary = self.get_inbound_exit_candidates()
-        candidate_cars_list = list(candidate_list_dictionary.values())
-        candidate_cars_list.sort(key=lambda x:x.get_current_tick_potential(), reverse=True)  # cars with the highest potential left move first
-        
-        for car in candidate_cars_list:
-            # check if car can be placed on next edge -- allow to exist in intersection (absorbed into intersection cost)
-            remaining_potential = car.get_current_tick_potential()
-            if remaining_potential >= intersection_crossing_cost:
-                if car.get_car_type() == 'Dynamic':   
-                    # recalculate path:
-                    route_metric = car.get_route_metric()
-                    all_possible_paths = self.Network_pointer.all_paths_depth_first_search(car.get_current_edge(), car.get_end_edge(), [], [])
-                    new_path = self.Network_pointer.choose_path(all_possible_paths, route_metric)
-                    if len(new_path) <= 1:
-                        raise Exception("There is no possible path to this car's destination.")
-                    new_path = new_path[1:]    # remove current edge
-                    car.set_path(new_path)
-
-                # place car on next Edge in path
-                car_path = car.get_path()
-                next_edge_ID = car_path[0]    
-                next_edge_object = self.outbound_edge_ID_to_edge[next_edge_ID]
-
-                # check next edge for capacity
-                if len(next_edge_object.get_current_cars()) < next_edge_object.get_max_capacity():
-                    # move to position 0 at new edge
-                    next_edge_object.move_existing_car_to_edge(car)           
-                    car.set_current_edge(next_edge_ID)                        
-                    car.set_current_pos_meter_car_front(0) 
-                    new_potential = remaining_potential - intersection_crossing_cost  
-                    car.set_current_tick_potential(new_potential)
-                    car.get_path().pop(0)      # remove current edge from upcoming path
-                else:                
-                    # place car back on original edge
-                    current_edge = car.get_current_edge()
-                    current_edge_object = self.inbound_edge_ID_to_edge[current_edge]
-                    current_edge_object.move_existing_car_to_edge(car)        # reassociate car and edge with each other
-
-            else:
-                # place car back on original edge
-                current_edge = car.get_current_edge()
-                current_edge_object = self.inbound_edge_ID_to_edge[current_edge]
-                current_edge_object.move_existing_car_to_edge(car)        # reassociate car and edge with each other
+        number_crossings = 0
+        if not self.is_all_red():    # otherwise no Car can cross this Node for the rest of the tick
+            # look for inbound_exit_candidates
+            candidate_list_dictionary = self.get_inbound_exit_candidates()
+            candidate_cars_list = list(candidate_list_dictionary.values())
+            global_tick = self.Network_pointer.global_tick
+            for car in candidate_cars_list:
+                car.refresh_tick_potential(global_tick)
+            candidate_cars_list.sort(key=lambda x:x.get_current_tick_potential(), reverse=True)  # cars with the highest potential left move first
+
+            # the potential of each candidate is fixed until it crosses, so the Dynamic Cars that will be rerouted are known up front
+            dynamic_cars_list = [car for car in candidate_cars_list if car.get_car_type() == 'Dynamic'
+                                 and car.get_current_tick_potential() >= self.intersection_time_cost]
+            self.recalculate_car_paths(dynamic_cars_list)
+
+            for car in candidate_cars_list:
+                if self.cross_car(car, recalculate_path = False) is not None:
+                    number_crossings += 1
                 
         # advance existing cars on outbound edges as much as possible
-        outbound_edge_keys = list(self.outbound_edge_ID_to_edge.keys())
-        random.shuffle(outbound_edge_keys)
+        outbound_edge_keys = list(self.active_outbound_edge_ID_to_edge.keys())
+        self.Network_pointer.shuffle_rng.shuffle(outbound_edge_keys)
         for outbound_edge_ID in outbound_edge_keys:
             outbound_edge = self.outbound_edge_ID_to_edge[outbound_edge_ID]
             edge_tick_outputs = outbound_edge.tick()  # move and place new cars, returning list [expended, max] energy
             expended_energy += edge_tick_outputs[0]
             sum_maximum_expendible_energy += edge_tick_outputs[1]
 
-        return expended_energy, sum_maximum_expendible_energy
+        return expended_energy, sum_maximum_expendible_energy, number_crossings
+
+    def cross_car(self, car, recalculate_path = True):
+        '''Moves car (taken from the head of one of this Node's inbound Edges) onto the next Edge in its path, at position 0.
+        The crossing costs intersection_time_cost of the Car's remaining tick potential.  If the Car's inbound Edge has a red light,
+        the Car has too little potential left, or the next Edge is at capacity, it is placed back at the head of its inbound Edge.
+        If the Car has type "Dynamic", its path is recalculated first, unless recalculate_path is False (already done by the caller).
+        Returns the next Edge object, or None if the Car was placed back.
+        '''
+        intersection_crossing_cost = self.intersection_time_cost  # absorbs time delay for crossing intersection
+
+        # check if car can be placed on next edge -- allow to exist in intersection (absorbed into intersection cost)
+        car.refresh_tick_potential(self.Network_pointer.global_tick)
+        remaining_potential = car.get_current_tick_potential()
+        if remaining_potential >= intersection_crossing_cost and self.is_inbound_edge_open(car.get_current_edge()):
+            if recalculate_path and car.get_car_type() == 'Dynamic':
+                self.recalculate_car_path(car)
+
+            # place car on next Edge in path
+            car_path = car.get_path()
+            next_edge_ID = car_path[0]    
+            next_edge_object = self.outbound_edge_ID_to_edge[next_edge_ID]
+
+            # check next edge for capacity (including Cars that crossed onto it earlier in this Node tick)
+            if len(next_edge_object.get_current_cars()) + len(next_edge_object.arriving_cars) < next_edge_object.get_max_capacity():
+                # move to position 0 at new edge
+                next_edge_object.move_existing_car_to_edge(car)           
+                car.set_current_edge(next_edge_ID)                        
+                car.set_current_pos_meter_car_front(0) 
+                new_potential = remaining_potential - intersection_crossing_cost  
+                car.set_current_tick_potential(new_potential)
+                car.get_path().pop(0)      # remove current edge from upcoming path
+                return next_edge_object
+
+        # place car back at the head of its original edge
+        current_edge = car.get_current_edge()
+        current_edge_object = self.inbound_edge_ID_to_edge[current_edge]
+        current_edge_object.return_head_car(car)        # reassociate car and edge with each other
+        return None
+
+    def recalculate_car_path(self, car):
+        '''Replaces the path of a "Dynamic" car (waiting to cross this Node) with a newly calculated route from its current Edge.
+        '''
+        route_metric = car.get_route_metric()
+        new_path = self.Network_pointer.calculate_path(car.get_current_edge(), car.get_end_edge(), route_metric,
+                                                       self.Network_pointer.get_car_route_rng(car.get_car_ID(), car.get_current_edge()))
+        if len(new_path) <= 1:
+            raise Exception("There is no possible path to this car's destination.")
+        new_path = new_path[1:]    # remove current edge
+        car.set_path(new_path)
+
+    def recalculate_car_paths(self, cars_list):
+        '''Recalculates the paths of several "Dynamic" cars, as recalculate_car_path() would.
+        Cars are grouped by destination and route metric so that each group is answered by one search (see Network.calculate_paths()).
+        '''
+        destination_to_cars = {}
+        for car in cars_list:
+            destination_to_cars.setdefault((car.get_end_edge(), car.get_route_metric()), []).append(car)
+
+        for (end_edge_ID, route_metric), group_cars_list in destination_to_cars.items():
+            if len(group_cars_list) == 1 or (route_metric == 'Random' and self.Network_pointer.car_keyed_random_routes):
+                for car in group_cars_list:
+                    self.recalculate_car_path(car)
+                continue
+            start_edge_ID_to_path = self.Network_pointer.calculate_paths([car.get_current_edge() for car in group_cars_list], end_edge_ID, route_metric)
+            for car in group_cars_list:
+                new_path = start_edge_ID_to_path[car.get_current_edge()]
+                if len(new_path) <= 1:
+                    raise Exception("There is no possible path to this car's destination.")
+                car.set_path(new_path[1:])    # remove current edge
 
     def get_inbound_exit_candidates(self):
-        '''Checks all inbound edges of a Node.  
-        Any edge that has a Car at the end position of its length is considered a candidate to advance on to the next Edge in its path.
+        '''Checks all active inbound edges of a Node.  
+        The head Car of an edge (the Car furthest along it) is considered a candidate to advance on to the next Edge in its path
+        if it is at the end position of the edge's length and has an Edge left in its path.  Only head Cars are inspected, as no other Car can be further along.
+        Edges with a red light (see get_open_inbound_edge_IDs()) are skipped.
         '''
         outbound_candidates = collections.defaultdict(lambda: None)
-        for inbound_edge_ID in list(self.inbound_edge_ID_to_edge.keys()):
+        open_edge_IDs = self.get_open_inbound_edge_IDs()
+        for inbound_edge_ID in list(self.active_inbound_edge_ID_to_edge.keys()):
+            if open_edge_IDs is not None and inbound_edge_ID not in open_edge_IDs:
+                continue
             inbound_edge = self.inbound_edge_ID_to_edge[inbound_edge_ID]
-            inbound_edge_current_cars_list = inbound_edge.get_current_cars()
-
-            # print("N", self.get_node_ID(), " EDGE INBOUND: ", inbound_edge_ID, ":" ,inbound_edge_current_cars_list)
-            for car in inbound_edge_current_cars_list:
-                current_front_pos = car.get_current_pos_meter_car_front()
-                if current_front_pos == inbound_edge.get_length():
-                    outbound_candidates[inbound_edge_ID] = car
-                    car_index = inbound_edge_current_cars_list.index(car)
-                    new_current_cars_list = inbound_edge_current_cars_list[0:car_index] + inbound_edge_current_cars_list[car_index+1::]
-                    inbound_edge.set_current_cars(new_current_cars_list)
-                    inbound_edge.edge_car_ID_to_car.pop(car.get_car_ID())
+            head_car = inbound_edge.get_head_car()
+            # a Car with no path left is at the exit of its end Edge, and completes its route when the Edge ticks
+            if head_car is not None and head_car.get_current_pos_meter_car_front() == inbound_edge.get_length() and head_car.get_path():
+                outbound_candidates[inbound_edge_ID] = inbound_edge.pop_head_car()
                 
         # print("N: ", self.id ,"\tcars trying to leave : ", outbound_candidates)
         return outbound_candidates
 
 
-    def update_stoplight_attributes(self):  
-        '''Toggles which Edges allow cars to exit by cycling through sets in stoplight_pattern.
-        Returns the set of which inbound Edge set in stoplight_pattern is currently active, or NULL set (denoting red lights for all edges).
-        Communication to TrafficManager to establish global tick and increment will be solved in future versions.
-        Communication to prevent cars from leaving inbound Edges during the node tick will be established in future versions.
+    def get_stoplight_cycle_position(self, global_tick = None):
+        '''Returns the number of ticks since the start of the current stoplight cycle on global_tick (default:  the current global tick).
+        The first cycle starts on the tick after node_tick_number.  Requires a stoplight_pattern.
+        '''
+        if global_tick is None:
+            global_tick = self.Network_pointer.global_tick
+        return (global_tick - self.node_tick_number - 1) % ((self.stoplight_duration + self.stoplight_delay) * len(self.stoplight_phase_table))
+
+    def get_open_inbound_edge_IDs(self):
+        '''Returns the frozenset of inbound Edge IDs with a green light on the current global tick (empty during stoplight_delay),
+        or None if the Node has no stoplight_pattern (every inbound Edge may release Cars).
+        Lights only change between global ticks, so the result holds for the whole tick.
+        '''
+        if self.stoplight_phase_table is None:
+            return None
+        phase_length = self.stoplight_duration + self.stoplight_delay
+        cycle_position = self.get_stoplight_cycle_position()
+        if cycle_position % phase_length < self.stoplight_duration:
+            return self.stoplight_phase_table[cycle_position // phase_length]
+        return EMPTY_EDGE_SET
+
+    def is_inbound_edge_open(self, edge_ID):
+        '''Returns True if Cars at the head of inbound Edge edge_ID may cross this Node on the current global tick.
+        '''
+        open_edge_IDs = self.get_open_inbound_edge_IDs()
+        return open_edge_IDs is None or edge_ID in open_edge_IDs
+
+    def is_all_red(self):
+        '''Returns True if no inbound Edge may release Cars on the current global tick, in which case the Node can be skipped
+        by the crossing step of every tick engine for the rest of the tick.
         '''
-        open_time = self.stoplight_duration
-        off_time_between = self.stoplight_delay
-        one_on_off_cycle = open_time + off_time_between
+        open_edge_IDs = self.get_open_inbound_edge_IDs()
+        return open_edge_IDs is not None and not open_edge_IDs
 
-        if self.node_tick_number % one_on_off_cycle in range(open_time + 1, one_on_off_cycle + 1):  # +1 to offset base-0
-            # Node is in delay stage, no inbound Edges are open
-            return []
-        else:
-            cycle_index = self.node_tick_number // one_on_off_cycle
-            return self.stoplight_pattern[cycle_index]
+    def get_stoplight_pattern_current_index(self, global_tick = None):
+        '''Returns the index of the set of stoplight_pattern the Node is on at global_tick (default:  the current global tick),
+        including the stoplight_delay that follows it.  Always 0 if the Node has no stoplight_pattern.
+        '''
+        if self.stoplight_phase_table is None:
+            return 0
+        return self.get_stoplight_cycle_position(global_tick) // (self.stoplight_duration + self.stoplight_delay)
 
 
     def get_node_ID(self):
@@ -645,6 +1175,7 @@ class Edge:
             end_node_id:  Node from which this Edge terminates (this Edge is an inbound_edge for end_node).
             start_node:  Node object represented by start_node_id.
             end_node:  Node object represented by end_node_id.
+            Network_pointer:  Network this Edge belongs to; notified when the Edge gains or loses all of its Cars.
             edge_length:  Physical length of the Edge (ex: meter length of a road).
                 default value can be found and adjusted at edge_default_config["edge_length"]
             max_speed:  (optional) Unit speed limit of the road.  Without obstructions, this is the maximum distance a Car can move on this Edge in one tick.
@@ -652,10 +1183,16 @@ class Edge:
             max_capacity:  (optional) Maximum number of Car objects allowed on the Edge (max length of current_cars).
                 default value can be found and adjusted at edge_default_config["max_capacity"]
             edge_car_ID_to_car:  Dictionary containing all Car objects associated with the Edge; maps Car IDs to Car objects.
-            current_cars:  List of IDs of all Cars currently on the Edge.
+            current_cars:  Deque of all Cars currently on the Edge, ordered by position from the Edge end backwards (head Car first).
+                The order is kept on every insertion (Cars cannot pass each other on an Edge), so the head Car can be inspected
+                and removed in constant time and the Edge tick is a single pass over its Cars.
             waiting_cars:  List of IDs for Cars that are trying to enter the Network at this Edge.
             processed_cars:  List capturing IDs of Cars that have already been processed on the current tick.  Becomes current_cars at the end of the Edge tick.
-            completed_cars:  List of IDs of any Cars that have completed their route on this Edge in the duration of the simulation.
+            arriving_cars:  List of Cars that crossed onto the Edge (at position 0) since its last tick.  Placed behind processed_cars at the end of the Edge tick.
+            completed_cars:  List of IDs of any Cars that have completed their route on this Edge and are not archived yet (see Network.archive_finished_cars()).
+            travel_time_estimate:  Rolling estimate of the number of ticks currently needed to traverse the Edge, used by 'Fastest_now' routes.
+                Starts at the free-flow travel time (edge_length / max_speed).  See update_travel_time_estimate().
+            tick_distance_advanced:  Total distance moved by Cars along the Edge on the current global tick.
         Note:  some attributes have been given default values in the case that the user did not provide them.
         '''
         self.id = id
@@ -663,17 +1200,27 @@ class Edge:
         self.start_node_id = start_node_id
         self.end_node_id = end_node_id
         self.start_node = self.end_node = None 
+        self.Network_pointer = None
         self.edge_length = edge_length
 
         self.max_speed = max_speed
         self.max_capacity = max_capacity
 
-        self.edge_car_ID_to_car = collections.defaultdict(lambda: None)
-        self.current_cars = []
+        self.edge_car_ID_to_car = {}
+        self.current_cars = collections.deque()
         self.waiting_cars = []
         self.processed_cars = []
+        self.arriving_cars = []
         self.completed_cars = []
+        self.travel_time_estimate = edge_length / max_speed
+        self.tick_distance_advanced = 0
+
 
+    def set_Network_pointer(self, network_ptr):
+        '''Associates Network pointer with Edge object.
+        Used when adding an Edge to the Network.
+        '''
+        self.Network_pointer = network_ptr
 
     def set_start_node(self, node_ptr):
         '''Associates (start) Node pointer with Edge object.
@@ -687,45 +1234,99 @@ class Edge:
         '''
         self.end_node = node_ptr
 
-    def tick(self):
+    def tick(self, number_pending_cars = 0):
         '''Facilitates the movement of Car objects traversing this Edge.  There are three types of movement:
             car entry:  a Car from the waiting_car list will be placed on the Edge if and when space becomes available.
+                number_pending_cars (Cars that crossed onto this Edge but are not placed yet, see network_partitioning.py)
+                count against max_capacity.
             car exiting:  a Car will exit the Network if and when it reaches its end_pos_meter in the process of its movement IF self.id = Car.end_edge.
             car movement:  a Car with status mobile = True will advance as far as possible (maximum potential distance, edge end, or until obstructed by another car).
         '''
         expended_energy = 0                       # work actually done
         sum_maximum_expendible_energy = 0         # maximum work possible
 
-        # Sort Current Cars on starting position, ascending
-        self.current_cars.sort(key=lambda x:x.get_current_pos_meter_car_front(), reverse=True)
-
         # Process any waiting cars
-        if len(self.current_cars) < self.max_capacity: 
+        if len(self.current_cars) + number_pending_cars < self.max_capacity:
+            entry_outputs = self.enter_waiting_cars()
+            expended_energy += entry_outputs[0]
+            sum_maximum_expendible_energy += entry_outputs[1]
+        else:
+            logger.debug("Edge %s has no capacity for waiting cars.  Will try again next tick.", self.id)
+
+        # Process current cars on edge
+        vectorized_edge_engine = self.Network_pointer.vectorized_edge_engine
+        if vectorized_edge_engine is not None:
+            advance_outputs = vectorized_edge_engine.advance_current_cars(self)
+        else:
+            advance_outputs = self.advance_current_cars()
+        expended_energy += advance_outputs[0]
+        sum_maximum_expendible_energy += advance_outputs[1]
+        self.tick_distance_advanced += advance_outputs[0] * self.max_speed
+
+        # edge done processing, set up for next tick:  Cars that arrived at position 0 go behind all others
+        self.processed_cars.extend(self.arriving_cars)
+        self.current_cars = collections.deque(self.processed_cars)
+        self.processed_cars = []
+        self.arriving_cars = []
+        if self.Network_pointer.check_invariants:
+            self.check_car_order()
+        if not self.current_cars and not self.waiting_cars:
+            self.Network_pointer.deactivate_edge(self)
+        return expended_energy, sum_maximum_expendible_energy
+
+
+    def enter_waiting_cars(self):
+        '''Places every Car in self.waiting_cars onto the Edge at its start position, using all of its tick potential.
+        The Cars are merged into current_cars by position, where they obstruct the Cars behind them.
+        Returns [expended, max] energy for these Cars.
+        '''
+        expended_energy = 0                       # work actually done
+        sum_maximum_expendible_energy = 0         # maximum work possible
+        if self.waiting_cars:
+            self.Network_pointer.changed_edge_IDs[self.id] = None
+            global_tick = self.Network_pointer.global_tick
             for waiting_car in self.waiting_cars:
+                self.Network_pointer.changed_car_IDs[waiting_car.get_car_ID()] = None
                 car_pos_front = waiting_car.get_start_pos_meter() 
                 entry_edge_ID = self.id   
                 waiting_car.set_current_edge(entry_edge_ID)
                 waiting_car.set_current_pos_meter_car_front(car_pos_front)
-                self.processed_cars.append(waiting_car)
                 expended_energy += waiting_car.get_max_tick_potential()
                 sum_maximum_expendible_energy += waiting_car.get_max_tick_potential()
+                waiting_car.refresh_tick_potential(global_tick)
                 waiting_car.set_current_tick_potential(0)     # all energy used entering network
-            self.waiting_cars = []
-        else:
-            print("Edge ", self.id, "has no capacity for waiting cars.  Will try again next tick.")                     
+            self.waiting_cars.sort(key=lambda x:x.get_current_pos_meter_car_front(), reverse=True)
+            self.current_cars = collections.deque(heapq.merge(self.current_cars, self.waiting_cars,
+                                                              key=lambda x:-x.get_current_pos_meter_car_front()))
+        self.waiting_cars = []
+        return expended_energy, sum_maximum_expendible_energy
 
-        # Process current cars on edge
+
+    def advance_current_cars(self):
+        '''Moves every Car in self.current_cars (ordered from the Edge end backwards) as far as possible:
+        maximum potential distance, its exit position, or until obstructed by the Car ahead of it.
+        Halted Cars and Cars without remaining potential stay put and obstruct the Cars behind them, and a Car overlapping
+        the Car ahead of it (ex: after crossing onto a crowded Edge) waits instead of moving backwards, so the order is kept.
+        Cars still on the Edge are appended to self.processed_cars.
+        Returns [expended, max] energy for these Cars.
+        '''
+        expended_energy = 0                       # work actually done
+        sum_maximum_expendible_energy = 0         # maximum work possible
+        changed_car_IDs = self.Network_pointer.changed_car_IDs
+        global_tick = self.Network_pointer.global_tick
         prev_car_back = self.edge_length  # max position a car can travel, resets with each car
 
         for current_car in self.current_cars:
             current_car_id = current_car.get_car_ID()
             current_car_object = self.edge_car_ID_to_car[current_car_id]
+            current_car_object.refresh_tick_potential(global_tick)
             old_potential = current_car_object.get_current_tick_potential()
             sum_maximum_expendible_energy += old_potential
 
             if current_car.get_mobility() == False:
                 # car is halted and cannot move
                 current_car_object.set_current_tick_potential(0)
+                prev_car_back = current_car.current_pos_meter_car_front - current_car.get_car_length()
                 self.processed_cars.append(current_car)
 
             elif current_car.get_current_tick_potential() > 0:  # move only if there is still energy to do so
@@ -738,69 +1339,162 @@ class Edge:
                     exit_position = current_car.get_end_pos_meter()
                     dist_to_exit = exit_position - current_car_front
 
-                    if dist_to_exit < min(max_distance_current_tick_potential, prev_car_back - current_car_front):
-                        # set positions to destination
-                        current_car.set_current_pos_meter_car_front(exit_position)
-                        destination_edge_ID = current_car.get_end_edge()
-                        current_car.set_current_edge(destination_edge_ID)
-
-                        # car exits -- append to completed_cars and remove from further processing
-                        current_car.set_route_status('Route Completed')
-                        current_car.set_mobility(False)
-                        completed_car_ID = current_car.get_car_ID()
-                        self.completed_cars.append(completed_car_ID)
-                        self.edge_car_ID_to_car.pop(completed_car_ID)  
-                        # del current_car  # car no longer exists
+                    # dist_to_exit == 0:  the Car is at its exit, which may be the very end of the Edge (no room left to advance)
+                    if dist_to_exit < min(max_distance_current_tick_potential, prev_car_back - current_car_front) or dist_to_exit == 0:
+                        self.complete_car_route(current_car)
                     else:
                         # otherwise move as far as possible (exit further than travel distance)
-                        distance_to_advance = min(max_distance_current_tick_potential, prev_car_back - current_car_front)      # no buffer distance
+                        distance_to_advance = max(0, min(max_distance_current_tick_potential, prev_car_back - current_car_front))      # no buffer distance, never backwards
                         distance_to_advance_ticks = distance_to_advance/self.max_speed   # percent of possible tick moved
                         current_car_object.current_tick_potential -= distance_to_advance_ticks  
                         current_car.current_pos_meter_car_front += distance_to_advance  # actually move
                         expended_energy += current_car.tick(old_potential)   # get potential differential
                         prev_car_back = current_car.current_pos_meter_car_front - current_car.get_car_length()
+                        if distance_to_advance:
+                            changed_car_IDs[current_car_id] = None
 
                         self.processed_cars.append(current_car)
                 else:
                     # otherwise move as far as possible
-                    distance_to_advance = min(max_distance_current_tick_potential, prev_car_back - current_car_front)      # no buffer distance
+                    distance_to_advance = max(0, min(max_distance_current_tick_potential, prev_car_back - current_car_front))      # no buffer distance, never backwards
                     distance_to_advance_ticks = distance_to_advance/self.max_speed   # percent of possible tick moved
                     current_car_object.current_tick_potential -= distance_to_advance_ticks 
                     current_car.current_pos_meter_car_front += distance_to_advance  # actually move
                     expended_energy += current_car.tick(old_potential)   # get potential differential
                     prev_car_back = current_car.current_pos_meter_car_front - current_car.get_car_length()
+                    if distance_to_advance:
+                        changed_car_IDs[current_car_id] = None
 
                     self.processed_cars.append(current_car)
 
             else:
                 # car has already moved max possible along tick, append to "processed"
+                prev_car_back = current_car.current_pos_meter_car_front - current_car.get_car_length()
                 self.processed_cars.append(current_car)
 
-        # edge done processing, set up for next tick
-        self.current_cars = self.processed_cars
-        self.processed_cars = []
         return expended_energy, sum_maximum_expendible_energy
 
+    def advance_car(self, car, prev_car_back):
+        '''Moves a single Car as far as possible without passing prev_car_back, following advance_current_cars() rules.
+        Used by the event engine (see event_engine.py).
+        Returns (completed, expended energy), where completed is True if the Car reached its exit position and left the Network.
+        '''
+        car.refresh_tick_potential(self.Network_pointer.global_tick)
+        old_potential = car.get_current_tick_potential()
+        if car.get_mobility() == False or old_potential <= 0:
+            return False, 0
+
+        car_front = car.get_current_pos_meter_car_front()
+        max_distance = min(old_potential * self.max_speed, prev_car_back - car_front)
+        if car.get_end_edge() == self.id and (car.get_end_pos_meter() - car_front < max_distance or car.get_end_pos_meter() == car_front):
+            self.complete_car_route(car)
+            return True, 0
+
+        distance_to_advance = max(0, max_distance)      # no buffer distance, never backwards
+        if not distance_to_advance:
+            return False, 0
+        car.current_tick_potential -= distance_to_advance/self.max_speed
+        car.current_pos_meter_car_front += distance_to_advance
+        self.tick_distance_advanced += distance_to_advance
+        self.Network_pointer.changed_car_IDs[car.get_car_ID()] = None
+        return False, car.tick(old_potential)
+
+    def advance_unblocked_cars(self):
+        '''Event engine:  after the head Car has left the Edge, moves the Cars behind it that can now advance.
+        Stops at the first Car that does not move, as every Car behind it is still obstructed exactly as before.
+        Returns expended energy.
+        '''
+        expended_energy = 0
+        advanced_cars = []
+        prev_car_back = self.edge_length
+        while self.current_cars:
+            car = self.current_cars[0]
+            old_front = car.get_current_pos_meter_car_front()
+            completed, car_expended_energy = self.advance_car(car, prev_car_back)
+            if completed:
+                self.current_cars.popleft()
+                continue
+            if car.get_current_pos_meter_car_front() == old_front:
+                break
+            expended_energy += car_expended_energy
+            prev_car_back = car.get_current_pos_meter_car_front() - car.get_car_length()
+            advanced_cars.append(self.current_cars.popleft())
+        self.current_cars.extendleft(reversed(advanced_cars))
+        return expended_energy
+
+    def advance_arriving_cars(self):
+        '''Event engine:  moves every Car in self.arriving_cars (at position 0) as far as possible behind the last Car on the Edge,
+        then appends it to self.current_cars.
+        Returns expended energy.
+        '''
+        expended_energy = 0
+        for car in self.arriving_cars:
+            if self.current_cars:
+                last_car = self.current_cars[-1]
+                prev_car_back = last_car.get_current_pos_meter_car_front() - last_car.get_car_length()
+            else:
+                prev_car_back = self.edge_length
+            completed, car_expended_energy = self.advance_car(car, prev_car_back)
+            if not completed:
+                expended_energy += car_expended_energy
+                self.current_cars.append(car)
+        self.arriving_cars = []
+        return expended_energy
+
+    def check_car_order(self):
+        '''Raises an Exception if self.current_cars is not ordered by position from the Edge end backwards.
+        Called after every Edge tick when Network.check_invariants is True.
+        '''
+        prev_car_front = inf
+        for car in self.current_cars:
+            car_front = car.get_current_pos_meter_car_front()
+            if car_front > prev_car_front:
+                raise Exception("Cars on Edge", self.id, "are out of order:  Car", car.get_car_ID(), "at", car_front, "is behind a Car at", prev_car_front)
+            prev_car_front = car_front
+
+    def complete_car_route(self, car):
+        '''Places car at its exit position and removes it from the Edge, as it has reached its destination.
+        '''
+        # set positions to destination
+        car.set_current_pos_meter_car_front(car.get_end_pos_meter())
+        destination_edge_ID = car.get_end_edge()
+        car.set_current_edge(destination_edge_ID)
+
+        # car exits -- append to completed_cars and remove from further processing
+        car.set_route_status('Route Completed')
+        car.set_mobility(False)
+        completed_car_ID = car.get_car_ID()
+        self.completed_cars.append(completed_car_ID)
+        self.edge_car_ID_to_car.pop(completed_car_ID)  
+        self.Network_pointer.finished_car_IDs.append(completed_car_ID)
+        # del current_car  # car no longer exists
+        self.Network_pointer.changed_car_IDs[completed_car_ID] = None
+        self.Network_pointer.changed_edge_IDs[self.id] = None
+
 
     def get_snapshot(self):
         '''Outputs dictionary of Edge attributes, including lists of Cars that are:
         currently on the Edge, waiting to enter the Edge, or completed their trip on this Edge.
+        Built directly from the relevant fields (no copy of the Edge, its Cars, or the Network is made).
         '''
-        raw = copy.deepcopy(self.__dict__)
-        raw.pop("start_node")
-        raw.pop("end_node")
-        raw.pop("processed_cars")
-        raw.pop("edge_car_ID_to_car")
-
-        waiting_cars = raw.pop("waiting_cars", [])
+        raw = {}
+        raw["id"] = self.id
+        raw["start_node_id"] = self.start_node_id
+        raw["end_node_id"] = self.end_node_id
+        raw["edge_length"] = self.edge_length
+        raw["max_speed"] = self.max_speed
+        raw["max_capacity"] = self.max_capacity
+        raw["completed_cars"] = list(self.completed_cars)
+
+        waiting_cars = self.waiting_cars
         if waiting_cars != []:
             cleaned_waiting_cars = [car.get_car_ID() for car in waiting_cars]
             raw["waiting_cars"] = cleaned_waiting_cars
         else:
             raw["waiting_cars"] = {}
 
-        current_cars = raw.pop("current_cars", [])    
-        if current_cars != []:
+        current_cars = self.current_cars
+        if current_cars:
             cleaned_current_cars = [car.get_car_ID() for car in current_cars]
             raw["current_cars"] = cleaned_current_cars
         else:
@@ -850,33 +1544,129 @@ class Edge:
         '''
         return self.max_speed
 
+    def set_max_speed(self, new_max_speed):
+        '''Replaces self.max_speed with new_max_speed.
+        Use Network.set_edge_max_speed() so that routing is updated accordingly.
+        '''
+        self.max_speed = new_max_speed
+
+    def get_travel_time_estimate(self):
+        '''Returns self.travel_time_estimate, the number of ticks currently expected to traverse the Edge.
+        '''
+        return self.travel_time_estimate
+
+    def set_travel_time_estimate(self, new_travel_time_estimate):
+        '''Replaces self.travel_time_estimate with new_travel_time_estimate.
+        Use Network.set_travel_time_estimates() so that cached 'Fastest_now' routes are discarded.
+        '''
+        self.travel_time_estimate = new_travel_time_estimate
+
+    def update_travel_time_estimate(self):
+        '''Moves travel_time_estimate towards the travel time observed on this tick (exponentially weighted, see TRAVEL_TIME_SMOOTHING):
+            observed:  free-flow travel time / speed fraction, where the speed fraction is the average distance advanced per Car on the Edge
+                (tick_distance_advanced / Cars on the Edge) relative to max_speed, and 1 if the Edge is empty.
+            occupancy:  for capacity-limited Edges, at least free-flow travel time * (1 + CONGESTION_FACTOR * (Cars / max_capacity) ** CONGESTION_POWER).
+        Both are capped at free-flow travel time / MINIMUM_SPEED_FRACTION.
+        Resets tick_distance_advanced for the next tick.  Returns True if the estimate is still above the free-flow travel time.
+        '''
+        free_flow_travel_time = self.edge_length / self.max_speed
+        number_cars = len(self.current_cars)
+        speed_fraction = 1
+        if number_cars:
+            speed_fraction = min(1, max(MINIMUM_SPEED_FRACTION, self.tick_distance_advanced / (number_cars * self.max_speed)))
+        observed_travel_time = free_flow_travel_time / speed_fraction
+        if 0 < self.max_capacity < inf:
+            congestion = min(1 / MINIMUM_SPEED_FRACTION, 1 + CONGESTION_FACTOR * (number_cars / self.max_capacity) ** CONGESTION_POWER)
+            observed_travel_time = max(observed_travel_time, free_flow_travel_time * congestion)
+        self.tick_distance_advanced = 0
+
+        self.travel_time_estimate += TRAVEL_TIME_SMOOTHING * (observed_travel_time - self.travel_time_estimate)
+        if self.travel_time_estimate - free_flow_travel_time <= 1e-6 * free_flow_travel_time:
+            self.travel_time_estimate = free_flow_travel_time
+            return False
+        return True
+
     def get_max_capacity(self):       
         '''Returns self.max_capacity.
         Used when calling value from outside the Edge class.
         '''
         return self.max_capacity
 
+    def set_max_capacity(self, new_max_capacity):
+        '''Replaces self.max_capacity with new_max_capacity.
+        Used when updating value from outside the Edge class.
+        '''
+        self.max_capacity = new_max_capacity
+
     def get_current_cars(self):       
-        '''Returns self.current_cars, the list of Car IDs for all cars currently on the Edge.
+        '''Returns self.current_cars, the deque of all Cars currently on the Edge (head Car first).
         Used when calling value from outside the Edge class.
         '''
         return self.current_cars
 
     def set_current_cars(self, new_list):       
-        '''Replaces the list contents of self.current_cars with new_list.
+        '''Replaces the contents of self.current_cars with new_list, which must be ordered head Car first.
         Used when updating value from outside the Edge class.
         '''
-        self.current_cars = new_list
+        self.current_cars = collections.deque(new_list)
+
+    def get_head_car(self):
+        '''Returns the Car furthest along the Edge (first in self.current_cars), or None if the Edge holds no current Cars.
+        '''
+        if self.current_cars:
+            return self.current_cars[0]
+        return None
+
+    def return_head_car(self, car):
+        '''Places car, previously removed with pop_head_car(), back at the head of self.current_cars and relinks it to the Edge.
+        Used when the Car cannot cross the Node at the end of the Edge on this Node tick.
+        '''
+        self.current_cars.appendleft(car)
+        self.edge_car_ID_to_car[car.get_car_ID()] = car
+        self.Network_pointer.changed_car_IDs[car.get_car_ID()] = None
+        self.Network_pointer.changed_edge_IDs[self.id] = None
+
+    def append_tail_car(self, car):
+        '''Places car (already positioned on this Edge) behind every other Car in self.current_cars and links it to the Edge.
+        Used by partitioned execution to receive Cars that crossed onto the Edge during the previous pass.
+        '''
+        self.current_cars.append(car)
+        self.edge_car_ID_to_car[car.get_car_ID()] = car
+        self.Network_pointer.activate_edge(self)
+        self.Network_pointer.changed_car_IDs[car.get_car_ID()] = None
+        self.Network_pointer.changed_edge_IDs[self.id] = None
+
+    def pop_head_car(self):
+        '''Removes the Car furthest along the Edge from self.current_cars and unlinks it from the Edge.  Returns that Car.
+        '''
+        car = self.current_cars.popleft()
+        self.edge_car_ID_to_car.pop(car.get_car_ID())
+        self.Network_pointer.changed_edge_IDs[self.id] = None
+        return car
+
+    def add_cars_to_wait_queue(self, cars):
+        '''Adds every Car object in cars to the waiting queue (in order) and links the Cars to the Edge on Car ID.
+        '''
+        self.waiting_cars.extend(cars)
+        for car in cars:
+            self.edge_car_ID_to_car[car.get_car_ID()] = car
+        self.Network_pointer.activate_edge(self)
+        self.Network_pointer.changed_edge_IDs[self.id] = None
 
     def add_car_to_wait_queue(self, car):
         '''Adds Car object to the waiting queue and links Car to Edge on Car ID.
         '''
         self.waiting_cars.append(car)
         self.edge_car_ID_to_car[car.get_car_ID()] = car
+        self.Network_pointer.activate_edge(self)
+        self.Network_pointer.changed_edge_IDs[self.id] = None
 
     def move_existing_car_to_edge(self, car):
-        '''Adds Car object to the 'processed-cars' list and links Car to (new) Edge on Car ID.
+        '''Adds Car object (arriving at position 0) to the 'arriving-cars' list and links Car to (new) Edge on Car ID.
         '''
-        self.processed_cars.append(car)     
+        self.arriving_cars.append(car)     
         self.edge_car_ID_to_car[car.get_car_ID()] = car
+        self.Network_pointer.activate_edge(self)
+        self.Network_pointer.changed_car_IDs[car.get_car_ID()] = None
+        self.Network_pointer.changed_edge_IDs[self.id] = None
 
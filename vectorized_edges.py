@@ -0,0 +1,137 @@
+import numpy as np
+from cmath import inf
+
+class VectorizedEdgeEngine:
+    def __init__(self) -> None:
+        '''Struct-of-arrays replacement for Edge.advance_current_cars(), selected with TrafficManager(edge_backend = 'numpy').
+        On each Edge tick the Cars' positions, lengths, tick potentials, and mobility flags are gathered into NumPy arrays,
+        follow-the-leader advancement, exit detection, and energy accounting are computed in batched vector operations,
+        and only the resulting values are written back to the Car objects.
+        Results follow Edge.advance_current_cars() semantics exactly (up to floating point rounding of queued Cars' positions) as long as Cars do not overlap:
+            - halted Cars lose their remaining potential, stay put, and obstruct the Cars behind them.
+            - Cars without remaining potential stay put and obstruct the Cars behind them.
+            - Cars reaching their exit position leave the Edge and do not obstruct the Cars behind them.
+        '''
+
+
+    def advance_current_cars(self, edge):
+        '''Vectorized equivalent of edge.advance_current_cars().
+        Cars still on the Edge are appended to edge.processed_cars in their original order.
+        Returns [expended, max] energy for these Cars.
+        '''
+        current_cars = list(edge.current_cars)    # indexed below
+        number_cars = len(current_cars)
+        if number_cars == 0:
+            return 0, 0
+
+        edge_ID = edge.get_edge_ID()
+        max_speed = edge.get_max_speed()
+
+        # gather Car attributes (Edge.current_cars is ordered from the Edge end backwards)
+        global_tick = edge.Network_pointer.global_tick
+        for car in current_cars:
+            car.refresh_tick_potential(global_tick)
+        front = np.fromiter((car.current_pos_meter_car_front for car in current_cars), dtype=float, count=number_cars)
+        car_length = np.fromiter((car.car_length for car in current_cars), dtype=float, count=number_cars)
+        potential = np.fromiter((car.current_tick_potential for car in current_cars), dtype=float, count=number_cars)
+        mobile = np.fromiter((car.mobile for car in current_cars), dtype=bool, count=number_cars)
+        exit_position = np.fromiter((car.end_pos_meter if car.end_edge == edge_ID else inf for car in current_cars),
+                                    dtype=float, count=number_cars)
+
+        sum_maximum_expendible_energy = float(potential.sum())
+
+        # only mobile Cars with energy left move, but every Car obstructs the Cars behind it
+        movers = mobile & (potential > 0)
+        mover_indices = np.flatnonzero(movers)
+        all_distance_to_advance, all_exited = self.follow_the_leader(front,
+                                                                     car_length,
+                                                                     np.where(movers, potential * max_speed, 0),
+                                                                     exit_position,
+                                                                     edge.get_length())
+        distance_to_advance = all_distance_to_advance[mover_indices]
+        exited = all_exited[mover_indices]
+
+        new_potential = potential.copy()
+        new_potential[~mobile] = 0      # halted Cars cannot move
+        staying_movers = mover_indices[~exited]
+        staying_distance = distance_to_advance[~exited]
+        new_potential[staying_movers] = potential[staying_movers] - staying_distance / max_speed
+        new_front = front[staying_movers] + staying_distance
+        expended_energy = float((potential[staying_movers] - new_potential[staying_movers]).sum())
+
+        # write results back to the Car objects
+        for car_index in np.flatnonzero(~mobile):
+            current_cars[car_index].set_current_tick_potential(0)
+        changed_car_IDs = edge.Network_pointer.changed_car_IDs
+        for car_index, car_front, car_potential, car_distance in zip(staying_movers.tolist(), new_front.tolist(),
+                                                                      new_potential[staying_movers].tolist(), staying_distance.tolist()):
+            car = current_cars[car_index]
+            car.current_pos_meter_car_front = car_front
+            car.current_tick_potential = car_potential
+            if car_distance:
+                changed_car_IDs[car.id] = None
+
+        exited_indices = set(mover_indices[exited].tolist())
+        for car_index, car in enumerate(current_cars):
+            if car_index in exited_indices:
+                edge.complete_car_route(car)
+            else:
+                edge.processed_cars.append(car)
+
+        return expended_energy, sum_maximum_expendible_energy
+
+
+    def follow_the_leader(self, front, car_length, max_distance, exit_position, edge_length):
+        '''Given ordered arrays for the Cars on an Edge (leader first), returns (distance_to_advance, exited):
+            distance_to_advance:  max(0, min(max_distance, back of the closest non-exiting Car ahead - front)) per Car.
+            exited:  Boolean array, True where the Car reaches its exit position before being obstructed.
+        Without exits or overlaps, the obstruction for Car k is min(edge_length, new_front[j] - car_length[j] for every earlier Car j),
+        which is a running minimum once cumulative Car lengths are factored out.  It is recomputed after every exiting Car,
+        since an exiting Car no longer obstructs the Cars behind it, and after every Car overlapping the Car ahead of it,
+        since such a Car stays put (rather than moving backwards) and obstructs from its current position.
+        '''
+        number_movers = len(front)
+        distance_to_advance = np.empty(number_movers)
+        exited = np.zeros(number_movers, dtype=bool)
+        unobstructed_front = front + max_distance
+
+        segment_start = 0
+        prev_car_back = edge_length      # max position the segment's leader can travel
+        while segment_start < number_movers:
+            segment = slice(segment_start, number_movers)
+
+            # cumulative length of the Cars ahead of each Car within this segment
+            length_ahead = np.zeros(number_movers - segment_start)
+            np.cumsum(car_length[segment_start:number_movers - 1], out=length_ahead[1:])
+
+            # back of the Car ahead = min over earlier Cars of their unobstructed back, capped by prev_car_back
+            leader_limit = np.minimum.accumulate(unobstructed_front[segment] + length_ahead)
+            prev_back = np.empty(number_movers - segment_start)
+            prev_back[0] = prev_car_back
+            prev_back[1:] = np.minimum(prev_car_back, leader_limit[:-1])
+            prev_back[1:] -= length_ahead[1:]
+            prev_back[0] -= length_ahead[0]
+
+            gap = prev_back - front[segment]
+            segment_distance = np.minimum(max_distance[segment], gap)
+            at_exit = exit_position[segment] == front[segment]     # includes an exit at the very end of the Edge
+            segment_breaks = np.flatnonzero((exit_position[segment] - front[segment] < segment_distance) | at_exit | (gap < 0))
+
+            if len(segment_breaks) == 0:
+                distance_to_advance[segment] = segment_distance
+                break
+
+            # everything ahead of the first exiting (or overlapping) Car is final
+            first_break = segment_breaks[0]
+            distance_to_advance[segment_start:segment_start + first_break] = segment_distance[:first_break]
+            if gap[first_break] < 0 and not at_exit[first_break]:
+                # overlapping Car stays put;  the Cars behind it are obstructed by its current position
+                distance_to_advance[segment_start + first_break] = 0
+                prev_car_back = front[segment_start + first_break] - car_length[segment_start + first_break]
+            else:
+                # exiting Car;  the Cars behind it are no longer obstructed by it
+                exited[segment_start + first_break] = True
+                prev_car_back = prev_back[first_break]
+            segment_start += first_break + 1
+
+        return distance_to_advance, exited